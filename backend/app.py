@@ -10,6 +10,9 @@ logger = logging.getLogger(__name__)
 
 socketio = SocketIO(cors_allowed_origins="*", async_mode='threading')
 
+# Public fallback for local development; never trusted for signing session tokens
+DEFAULT_SECRET_KEY = "rico_cx_secret_key_129837"
+
 def create_app():
     # Determine the static folder. If frontend/dist exists, serve from it. Otherwise, serve from frontend/ directly.
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -34,7 +37,9 @@ def create_app():
     CORS(app, supports_credentials=True)
     
     # Set a secret key for flask sessions (optional but good practice)
-    app.secret_key = os.environ.get("FLASK_SECRET_KEY", "rico_cx_secret_key_129837")
+    app.secret_key = os.environ.get("FLASK_SECRET_KEY") or DEFAULT_SECRET_KEY
+    if os.environ.get("SESSION_TOKEN_MODE", "db").lower() == "signed" and app.secret_key == DEFAULT_SECRET_KEY:
+        logger.error("SESSION_TOKEN_MODE=signed requires FLASK_SECRET_KEY to be set; falling back to database sessions.")
     
     # Initialize DB (creates files and tables)
     Database() 
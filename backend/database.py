@@ -3,6 +3,9 @@ import threading
 import logging
 import json
 import os
+import queue
+import time
+from contextlib import contextmanager
 from typing import Any
 
 logger = logging.getLogger(__name__)
@@ -19,24 +22,130 @@ class Database:
                 if cls._instance is None:
                     cls._instance = super(Database, cls).__new__(cls)
                     cls._instance.db_path = db_path
+                    cls._instance._init_pool()
                     cls._instance._init_db()
         return cls._instance
 
     @classmethod
     def reset_instance(cls):
         with cls._lock:
+            if cls._instance is not None:
+                cls._instance.close_all()
             cls._instance = None
 
+    def _init_pool(self):
+        # Bounded pool of long-lived connections shared by request handlers and monitor threads
+        try:
+            self.pool_size = max(1, int(os.environ.get("DATABASE_POOL_SIZE", "8")))
+        except ValueError:
+            self.pool_size = 8
+        self.pool_timeout = 30
+        self._pool = queue.LifoQueue()
+        self._pool_lock = threading.Lock()
+        self._connections = []
+        self._closed = False
+        self._pool_stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "opened": 0
+        }
+
     def _get_conn(self):
-        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5)
         conn.row_factory = sqlite3.Row
         # Enable foreign keys
         conn.execute("PRAGMA foreign_keys = ON")
+        # WAL readers never block the writer, so NORMAL sync is durable enough across app crashes
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA busy_timeout = 5000")
         return conn
 
+    def _checkout(self):
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._pool_lock:
+                if len(self._connections) < self.pool_size:
+                    conn = self._get_conn()
+                    self._connections.append(conn)
+                    self._pool_stats["opened"] += 1
+            if conn is None:
+                # Pool is exhausted; block until another thread releases a connection
+                started = time.time()
+                try:
+                    conn = self._pool.get(timeout=self.pool_timeout)
+                except queue.Empty:
+                    raise sqlite3.OperationalError("Database connection pool exhausted")
+                finally:
+                    with self._pool_lock:
+                        self._pool_stats["waits"] += 1
+                        self._pool_stats["wait_time"] += time.time() - started
+        with self._pool_lock:
+            self._pool_stats["checkouts"] += 1
+        return conn
+
+    def _release(self, conn):
+        if self._closed:
+            try:
+                conn.close()
+            except Exception:
+                pass
+            return
+        self._pool.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Checks a pooled connection out for the duration of the block. The open
+        transaction is committed when the block exits cleanly and rolled back
+        if it raises, so no uncommitted writes go back into the pool. Unlike
+        query() and execute(), raises sqlite3.OperationalError when the pool
+        stays exhausted for pool_timeout seconds.
+        """
+        conn = self._checkout()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+
+    def close_all(self):
+        """Closes every pooled connection. Connections still checked out are closed on release."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def pool_stats(self) -> dict:
+        with self._pool_lock:
+            stats = dict(self._pool_stats)
+            stats["size"] = self.pool_size
+            stats["open"] = len(self._connections)
+        stats["idle"] = self._pool.qsize()
+        stats["in_use"] = stats["open"] - stats["idle"]
+        stats["wait_time"] = round(stats["wait_time"], 4)
+        return stats
+
     def _init_db(self):
         conn = self._get_conn()
         cursor = conn.cursor()
+
+        # WAL is persistent on the database file, so it only needs to be set once
+        try:
+            cursor.execute("PRAGMA journal_mode = WAL")
+        except Exception as e:
+            logger.error(f"Database: Failed to enable WAL journal mode: {e}")
         
         # Load schema.sql from the project root folder
         current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -63,7 +172,8 @@ class Database:
                     ("first_name", "TEXT"),
                     ("last_name", "TEXT"),
                     ("profile_picture", "TEXT"),
-                    ("created_at", "TIMESTAMP")
+                    ("created_at", "TIMESTAMP"),
+                    ("session_generation", "INTEGER DEFAULT 0")
                 ]
                 for col_name, col_type in migrations:
                     if col_name not in existing_cols:
@@ -103,7 +213,12 @@ class Database:
         conn.close()
 
     def query(self, query: str, args: tuple = (), one: bool = False) -> Any:
-        conn = self._get_conn()
+        try:
+            conn = self._checkout()
+        except sqlite3.OperationalError as e:
+            # An exhausted pool is reported like any other query failure
+            logger.error(f"Database query error: {e}")
+            return None
         cursor = conn.cursor()
         try:
             cursor.execute(query, args)
@@ -112,12 +227,18 @@ class Database:
             return (rv[0] if rv else None) if one else rv
         except Exception as e:
             logger.error(f"Database query error: {e}")
+            conn.rollback()
             return None
         finally:
-            conn.close()
+            cursor.close()
+            self._release(conn)
 
     def execute(self, query: str, args: tuple = ()) -> int:
-        conn = self._get_conn()
+        try:
+            conn = self._checkout()
+        except sqlite3.OperationalError as e:
+            logger.error(f"Database execute error: {e}")
+            return -1
         cursor = conn.cursor()
         try:
             cursor.execute(query, args)
@@ -125,6 +246,8 @@ class Database:
             return cursor.lastrowid
         except Exception as e:
             logger.error(f"Database execute error: {e}")
+            conn.rollback()
             return -1
         finally:
-            conn.close()
+            cursor.close()
+            self._release(conn)
@@ -34,6 +34,9 @@ class Group:
         db = Database()
         permissions_json = json.dumps(self.permissions)
         db.execute("UPDATE groups SET name = ?, permissions = ? WHERE id = ?", (self.name, permissions_json, self.id))
+        # Cached sessions carry their group; permissions changed for everyone in it
+        from .user import session_cache
+        session_cache.clear()
 
     def has_permission(self, permission: str) -> bool:
         return permission in self.permissions or "admin" in self.permissions
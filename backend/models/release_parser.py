@@ -0,0 +1,277 @@
+import os
+import re
+import sys
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Tuple
+
+# Keyword tables. Order matters: it decides the first codec/source at a
+# position and the order of the feature and audio labels.
+RESOLUTIONS = ('2160p', '1080p', '720p', '480p', '360p', '4k', '8k')
+CODECS = ('x264', 'x265', 'hevc', 'h264', 'h.264', 'h265', 'h.265', 'av1', 'divx', 'xvid')
+SOURCES = ('bluray', 'blu-ray', 'web-dl', 'webdl', 'webrip', 'web', 'brrip', 'bdrip', 'dvdrip', 'hdtv')
+FEATURES = (
+    ('hdr10+', 'HDR10+'),
+    ('hdr10', 'HDR10'),
+    ('hdr', 'HDR'),
+    ('dv', 'DV'),
+    ('dolby vision', 'DV'),
+    ('10bit', '10bit'),
+    ('10-bit', '10bit')
+)
+AUDIO = (
+    ('atmos', 'Atmos'),
+    ('dts-hd', 'DTS-HD'),
+    ('dts', 'DTS'),
+    ('truehd', 'TrueHD'),
+    ('dd5.1', 'DD5.1'),
+    ('ac3', 'AC3'),
+    ('dd+7.1', 'DD+7.1'),
+    ('aac', 'AAC'),
+    ('5.1', '5.1'),
+    ('7.1', '7.1')
+)
+
+# The scanner reports one keyword per position; these also match wherever the longer one does
+_IMPLIED = {
+    'hdr10+': ('hdr10',),
+    'dts-hd': ('dts',)
+}
+
+# Labels are built once, so every parsed record shares the same string objects
+_CODEC_LABELS = {w: w.replace('.', '').upper() for w in CODECS}
+_SOURCE_LABELS = {w: w.replace('-', '').upper() for w in SOURCES}
+_RESOLUTION_LABELS = dict({w: w for w in RESOLUTIONS}, **{'4k': '2160p', '8k': '4320p'})
+
+_KEYWORD_KIND = {}
+for _kind, _words in (('res', RESOLUTIONS), ('codec', CODECS), ('source', SOURCES),
+                      ('tag', [p for p, _ in FEATURES + AUDIO])):
+    for _word in _words:
+        _KEYWORD_KIND[_word] = _kind
+
+_SEP = r'[\s._-]'
+
+# One pass over the lowercased title. Every token starts at a word boundary
+# and the lookahead lets finditer visit each boundary, so tokens may overlap
+# (e.g. '7.1' inside 'dd+7.1'). No two alternatives can match at the same
+# position apart from the _IMPLIED pairs, so each hit is the first match of
+# its kind's own pattern from that position.
+_SCANNER = re.compile(
+    r'\b(?=(?:'
+    r'(?P<se>s(?P<se_s>\d{1,2})e(?P<se_e>\d{1,2}))\b'
+    r'|(?P<x>(?P<x_s>\d{1,2})x(?P<x_e>\d{1,2}))\b'
+    r'|(?P<sw>seasons?' + _SEP + r'*(?P<sw_s>\d{1,2}))\b'
+    r'|(?P<s>s(?P<s_s>\d{1,2}))\b'
+    r'|(?P<ew>(?:episode|ep)' + _SEP + r'*(?P<ew_e>\d{1,2}))\b'
+    r'|(?P<e>e(?P<e_e>\d{1,2}))\b'
+    r'|(?P<pack>complete' + _SEP + r'+(?:series|season)|season' + _SEP + r'+pack|series' + _SEP + r'+pack)\b'
+    r'|(?P<year>19\d{2}|20\d{2})\b'
+    r'|(?P<kw>' + '|'.join(re.escape(w) for w in _KEYWORD_KIND) + r')\b'
+    r'))'
+)
+
+# Case-sensitive TV/year patterns, used on titles whose lowercase form is not a plain ASCII copy
+_TV_PATTERNS = (
+    ('se', re.compile(r'\b[sS](\d{1,2})[eE](\d{1,2})\b')),
+    ('x', re.compile(r'\b(\d{1,2})x(\d{1,2})\b')),
+    ('sw', re.compile(r'\b[sS]eason[s]?[\s._-]*(\d{1,2})\b', re.IGNORECASE)),
+    ('s', re.compile(r'\b[sS](\d{1,2})\b')),
+    ('ew', re.compile(r'\b(?:[eE]pisode|[eE]p)[\s._-]*(\d{1,2})\b', re.IGNORECASE)),
+    ('e', re.compile(r'\b[eE](\d{1,2})\b')),
+    ('year', re.compile(r'\b(19\d{2}|20\d{2})\b'))
+)
+
+# Capture groups holding the numbers of each TV/year token
+_VALUE_GROUPS = {
+    'se': ('se_s', 'se_e'),
+    'x': ('x_s', 'x_e'),
+    'sw': ('sw_s',),
+    's': ('s_s',),
+    'ew': ('ew_e',),
+    'e': ('e_e',),
+    'year': ('year',)
+}
+
+_PUNCTUATION = re.compile(r'[\.\-\_\+\[\]\(\)\:\,]')
+_SUBTITLE = re.compile(r'\b[sS]\d{1,2}[\s._-]*[:\-][\s._-]*([A-Za-z0-9\s._-]+?)(?=[\s._-]*(?:\d{3,4}p|4k|8k|web|bluray|hdtv|nf|\(|\[|$))')
+
+
+# One shared tuple per distinct label combination; most releases have none
+_EMPTY: Tuple[str, ...] = ()
+_label_tuples: Dict[Tuple[str, ...], Tuple[str, ...]] = {_EMPTY: _EMPTY}
+
+
+def _labels(table, tags) -> Tuple[str, ...]:
+    """Labels of the table patterns found in tags, in table order and without duplicates."""
+    if not tags:
+        return _EMPTY
+    labels = []
+    for pattern, label in table:
+        if pattern in tags and label not in labels:
+            labels.append(label)
+    labels = tuple(labels)
+    return _label_tuples.setdefault(labels, labels)
+
+
+def _scan(title: str, title_lower: str):
+    """
+    Returns (tokens, keywords, tags): the first (position, *values) of every
+    TV/year kind, the first (position, word) of the resolution/codec/source
+    keywords, and the feature/audio patterns found.
+    """
+    tokens: Dict[str, tuple] = {}
+    keywords: Dict[str, tuple] = {}
+    tags = set()
+    plain = title.isascii()
+
+    for m in _SCANNER.finditer(title_lower):
+        kind = m.lastgroup
+        if kind == 'kw':
+            word = m.group('kw')
+            word_kind = _KEYWORD_KIND[word]
+            if word_kind == 'tag':
+                tags.add(word)
+                tags.update(_IMPLIED.get(word, ()))
+            elif word_kind not in keywords:
+                keywords[word_kind] = (m.start(), word)
+            continue
+        if kind == 'pack':
+            if kind not in tokens:
+                tokens[kind] = (m.start(),)
+            continue
+        if not plain:
+            continue
+        if kind == 'x' and title[m.end('x_s')] != 'x':
+            # The NxN form only takes a lowercase 'x'
+            continue
+        if kind not in tokens:
+            tokens[kind] = (m.start(),) + tuple(int(m.group(g)) for g in _VALUE_GROUPS[kind])
+
+    if not plain:
+        # Lowercasing can change lengths and case-folding rules outside ASCII
+        for kind, pattern in _TV_PATTERNS:
+            match = pattern.search(title)
+            if match:
+                tokens[kind] = (match.start(),) + tuple(int(v) for v in match.groups())
+
+    return tokens, keywords, tags
+
+
+class ParsedRelease(NamedTuple):
+    """Metadata parsed from a release name; shared between every result with that name."""
+    clean_title: str
+    year: Optional[int]
+    resolution: str
+    codec: str
+    source: str
+    features: Tuple[str, ...]
+    audio: Tuple[str, ...]
+    season: Optional[int]
+    episode: Optional[int]
+    is_tv: bool
+
+
+def _parse_release(title: str) -> ParsedRelease:
+    title_lower = title.lower()
+    tokens, keywords, tags = _scan(title, title_lower)
+
+    is_tv = False
+    season: Optional[int] = None
+    episode: Optional[int] = None
+    tv_match_pos = None
+
+    # Same precedence as the individual patterns: SxxEyy, NxN, Season N, Sxx, Episode N, Exx, pack keywords
+    if 'se' in tokens:
+        tv_match_pos, season, episode = tokens['se']
+        is_tv = True
+    if not is_tv and 'x' in tokens:
+        tv_match_pos, season, episode = tokens['x']
+        is_tv = True
+    for kind in ('sw', 's'):
+        if season is None and kind in tokens:
+            pos, season = tokens[kind]
+            is_tv = True
+            if tv_match_pos is None or pos < tv_match_pos:
+                tv_match_pos = pos
+    for kind in ('ew', 'e'):
+        if episode is None and kind in tokens:
+            pos, episode = tokens[kind]
+            is_tv = True
+            if tv_match_pos is None or pos < tv_match_pos:
+                tv_match_pos = pos
+    if not is_tv and 'pack' in tokens:
+        is_tv = True
+        pos = tokens['pack'][0]
+        if tv_match_pos is None or pos < tv_match_pos:
+            tv_match_pos = pos
+
+    year = None
+    split_indices = []
+    if 'year' in tokens:
+        pos, year = tokens['year']
+        split_indices.append(pos)
+    if tv_match_pos is not None:
+        split_indices.append(tv_match_pos)
+
+    resolution = "Unknown"
+    if 'res' in keywords:
+        pos, val = keywords['res']
+        split_indices.append(pos)
+        resolution = _RESOLUTION_LABELS[val]
+    elif '2160' in title_lower or 'uhd' in title_lower:
+        resolution = '2160p'
+    elif '1080' in title_lower:
+        resolution = '1080p'
+    elif '720' in title_lower:
+        resolution = '720p'
+
+    raw_clean = title[:min(split_indices)] if split_indices else title
+    clean_title = ' '.join(_PUNCTUATION.sub(' ', raw_clean).split()).strip()
+
+    # Season subtitle following the season notation (e.g. S03: The Ed Gein Story)
+    sub_match = _SUBTITLE.search(title)
+    if sub_match:
+        sub_clean = ' '.join(_PUNCTUATION.sub(' ', sub_match.group(1)).split()).strip()
+        if sub_clean and sub_clean.lower() not in ('complete', 'season', 'pack', 'series'):
+            clean_title = f"{clean_title} {sub_clean}".strip()
+
+    codec = _CODEC_LABELS[keywords['codec'][1]] if 'codec' in keywords else "Unknown"
+    source = _SOURCE_LABELS[keywords['source'][1]] if 'source' in keywords else "Unknown"
+
+    return ParsedRelease(
+        clean_title=sys.intern(clean_title),
+        year=year,
+        resolution=resolution,
+        codec=codec,
+        source=source,
+        features=_labels(FEATURES, tags),
+        audio=_labels(AUDIO, tags),
+        season=season,
+        episode=episode,
+        is_tv=is_tv
+    )
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+@lru_cache(maxsize=_env_int("RELEASE_PARSE_CACHE_SIZE", 8192))
+def parse_release(title: str) -> ParsedRelease:
+    """
+    Parses a release name, memoized by the raw title: Prowlarr results, the
+    monitor task and the delete path all see the same names repeatedly.
+    """
+    return _parse_release(title)
+
+
+def parse_cache_stats() -> dict:
+    info = parse_release.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize
+    }
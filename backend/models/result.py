@@ -1,185 +1,85 @@
 import re
-from typing import List, Dict, Any
+import sys
+from operator import attrgetter
+from typing import List, Dict, Any, NamedTuple, Optional
+from .release_parser import ParsedRelease, parse_release
+
+def _parsed_field(name: str) -> property:
+    return property(attrgetter(f"parsed.{name}"))
+
+_MAGNET_HASH = re.compile(r'xt=urn:btih:([0-9a-z]+)', re.IGNORECASE)
+
 
 class TorrentResult:
-    def __init__(self, title: str, size: int, download_url: str, seeders: int, leechers: int, indexer: str, guid: str = None, info_hash: str = None):
+    # Thousands of these stay alive in the search cache; no per-instance __dict__
+    __slots__ = ("title", "size", "download_url", "seeders", "leechers", "indexer", "guid", "info_hash", "parsed", "_indexers")
+
+    def __init__(self, title: str, size: int, download_url: str, seeders: int, leechers: int, indexer: str, guid: str = None, info_hash: str = None,
+                 indexers: tuple = None):
         self.title = title
         self.size = size
         self.download_url = download_url
         self.seeders = seeders
         self.leechers = leechers
-        self.indexer = indexer
+        # Every result from an indexer shares one copy of its name
+        self.indexer = sys.intern(indexer) if isinstance(indexer, str) else indexer
         self.guid = guid
         self.info_hash = info_hash
-        
-        # Parsed attributes
-        self.clean_title = ""
-        self.year = None
-        self.resolution = "Unknown"
-        self.codec = "Unknown"
-        self.source = "Unknown"
-        self.features = []
-        self.audio = []
-        self.season = None
-        self.episode = None
-        self.is_tv = False
-        
-        self._parse_metadata()
-
-    def _parse_metadata(self):
-        title_lower = self.title.lower()
-        tv_match_pos = None
-
-        # 1. Detect S01E02, S1E2, S01E01-E04, S01E01-04
-        s_e_match = re.search(r'\b[sS](\d{1,2})[eE](\d{1,2})\b', self.title)
-        if s_e_match:
-            self.is_tv = True
-            self.season = int(s_e_match.group(1))
-            self.episode = int(s_e_match.group(2))
-            tv_match_pos = s_e_match.start()
-
-        # 2. Detect 1x02, 01x02
-        if not self.is_tv:
-            x_match = re.search(r'\b(\d{1,2})x(\d{1,2})\b', self.title)
-            if x_match:
-                self.is_tv = True
-                self.season = int(x_match.group(1))
-                self.episode = int(x_match.group(2))
-                tv_match_pos = x_match.start()
-
-        # 3. Explicit Season: Season 1, Seasons 1-3, Season.01, Season_1
-        if self.season is None:
-            season_match = re.search(r'\b[sS]eason[s]?[\s._-]*(\d{1,2})\b', self.title, re.IGNORECASE)
-            if season_match:
-                self.is_tv = True
-                self.season = int(season_match.group(1))
-                if tv_match_pos is None or season_match.start() < tv_match_pos:
-                    tv_match_pos = season_match.start()
-
-        # 4. Standalone Season token: S01, S1, S01-S03, S01-03
-        if self.season is None:
-            s_match = re.search(r'\b[sS](\d{1,2})\b', self.title)
-            if s_match:
-                self.is_tv = True
-                self.season = int(s_match.group(1))
-                if tv_match_pos is None or s_match.start() < tv_match_pos:
-                    tv_match_pos = s_match.start()
-
-        # 5. Explicit Episode word: Episode 1, Ep 1, Ep.01, Ep_01
-        if self.episode is None:
-            ep_match = re.search(r'\b(?:[eE]pisode|[eE]p)[\s._-]*(\d{1,2})\b', self.title, re.IGNORECASE)
-            if ep_match:
-                self.is_tv = True
-                self.episode = int(ep_match.group(1))
-                if tv_match_pos is None or ep_match.start() < tv_match_pos:
-                    tv_match_pos = ep_match.start()
-
-        # 6. Standalone Episode token: E01, E1
-        if self.episode is None:
-            e_match = re.search(r'\b[eE](\d{1,2})\b', self.title)
-            if e_match:
-                self.is_tv = True
-                self.episode = int(e_match.group(1))
-                if tv_match_pos is None or e_match.start() < tv_match_pos:
-                    tv_match_pos = e_match.start()
-
-        # 7. Complete Series / Complete Season / Season Pack / Series Pack keywords
-        if not self.is_tv:
-            series_kw = re.search(r'\b(?:complete[\s._-]+(?:series|season)|season[\s._-]+pack|series[\s._-]+pack)\b', title_lower)
-            if series_kw:
-                self.is_tv = True
-                if tv_match_pos is None or series_kw.start() < tv_match_pos:
-                    tv_match_pos = series_kw.start()
-
-        # 2. Detect Year
-        year_match = re.search(r'\b(19\d{2}|20\d{2})\b', self.title)
-        if year_match:
-            self.year = int(year_match.group(1))
-
-        # 3. Determine clean title boundary
-        split_indices = []
-        if year_match:
-            split_indices.append(year_match.start())
-        if tv_match_pos is not None:
-            split_indices.append(tv_match_pos)
-        
-        # Resolution detection
-        res_match = re.search(r'\b(2160p|1080p|720p|480p|360p|4k|8k)\b', title_lower)
-        if res_match:
-            split_indices.append(res_match.start())
-            val = res_match.group(1)
-            if val in ['4k', '8k']:
-                self.resolution = '2160p' if val == '4k' else '4320p'
-            else:
-                self.resolution = val
-        elif '2160' in title_lower or 'uhd' in title_lower:
-            self.resolution = '2160p'
-        elif '1080' in title_lower:
-            self.resolution = '1080p'
-        elif '720' in title_lower:
-            self.resolution = '720p'
-
-        # Extract title before the split point
-        if split_indices:
-            first_split = min(split_indices)
-            raw_clean = self.title[:first_split]
-        else:
-            raw_clean = self.title
-
-        # Clean punctuation and extra spaces
-        raw_clean = re.sub(r'[\.\-\_\+\[\]\(\)\:\,]', ' ', raw_clean)
-        self.clean_title = ' '.join(raw_clean.split()).strip()
-
-        # Check for season subtitle following season/episode notation (e.g. S03: The Ed Gein Story)
-        sub_match = re.search(r'\b[sS]\d{1,2}[\s._-]*[:\-][\s._-]*([A-Za-z0-9\s._-]+?)(?=[\s._-]*(?:\d{3,4}p|4k|8k|web|bluray|hdtv|nf|\(|\[|$))', self.title)
-        if sub_match:
-            sub_text = re.sub(r'[\.\-\_\+\[\]\(\)\:\,]', ' ', sub_match.group(1))
-            sub_clean = ' '.join(sub_text.split()).strip()
-            if sub_clean and sub_clean.lower() not in ['complete', 'season', 'pack', 'series']:
-                self.clean_title = f"{self.clean_title} {sub_clean}".strip()
-
-        # Codec detection
-        codec_match = re.search(r'\b(x264|x265|hevc|h264|h\.264|h265|h\.265|av1|divx|xvid)\b', title_lower)
-        if codec_match:
-            self.codec = codec_match.group(1).replace('.', '').upper()
-
-        # Source detection
-        source_match = re.search(r'\b(bluray|blu-ray|web-dl|webdl|webrip|web|brrip|bdrip|dvdrip|hdtv)\b', title_lower)
-        if source_match:
-            self.source = source_match.group(1).replace('-', '').upper()
-
-        # Features detection
-        features_list = {
-            'hdr10+': 'HDR10+',
-            'hdr10': 'HDR10',
-            'hdr': 'HDR',
-            'dv': 'DV',
-            'dolby vision': 'DV',
-            '10bit': '10bit',
-            '10-bit': '10bit'
-        }
-        for pattern, label in features_list.items():
-            if re.search(r'\b' + re.escape(pattern) + r'\b', title_lower):
-                if label not in self.features:
-                    self.features.append(label)
-
-        # Audio detection
-        audio_list = {
-            'atmos': 'Atmos',
-            'dts-hd': 'DTS-HD',
-            'dts': 'DTS',
-            'truehd': 'TrueHD',
-            'dd5.1': 'DD5.1',
-            'ac3': 'AC3',
-            'dd+7.1': 'DD+7.1',
-            'aac': 'AAC',
-            '5.1': '5.1',
-            '7.1': '7.1'
-        }
-        for pattern, label in audio_list.items():
-            if re.search(r'\b' + re.escape(pattern) + r'\b', title_lower):
-                if label not in self.audio:
-                    self.audio.append(label)
+
+        # Title-derived metadata is shared with every result of the same release name
+        self.parsed: ParsedRelease = parse_release(title)
+        # Every indexer that returned this torrent, once duplicates are merged
+        self._indexers = tuple(indexers) if indexers and len(indexers) > 1 else None
+
+    clean_title = _parsed_field("clean_title")
+    year = _parsed_field("year")
+    resolution = _parsed_field("resolution")
+    codec = _parsed_field("codec")
+    source = _parsed_field("source")
+    features = _parsed_field("features")
+    audio = _parsed_field("audio")
+    season = _parsed_field("season")
+    episode = _parsed_field("episode")
+    is_tv = _parsed_field("is_tv")
+
+    @property
+    def indexers(self) -> tuple:
+        return self._indexers or (self.indexer,)
+
+    @property
+    def dedupe_key(self) -> tuple:
+        """Identifies the same torrent across indexers: its info hash, else its size and title."""
+        info_hash = self.info_hash
+        if not info_hash and self.download_url and self.download_url.startswith("magnet:"):
+            match = _MAGNET_HASH.search(self.download_url)
+            info_hash = match.group(1) if match else None
+        if info_hash:
+            return ("hash", info_hash.lower())
+        return ("release", self.size, self.title.lower())
+
+    @classmethod
+    def merge_duplicates(cls, copies: List['TorrentResult']) -> 'TorrentResult':
+        """
+        Collapses copies of one torrent into the best-seeded copy, listing
+        every indexer that returned it. The inputs are left untouched.
+        """
+        best = copies[0]
+        for other in copies[1:]:
+            if other.seeders > best.seeders:
+                best = other
+        if len(copies) == 1:
+            return best
+
+        indexers = list(best.indexers)
+        for other in copies:
+            for indexer in other.indexers:
+                if indexer not in indexers:
+                    indexers.append(indexer)
+        merged = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(merged, name, getattr(best, name))
+        merged._indexers = tuple(indexers)
+        return merged
 
     @classmethod
     def from_prowlarr(cls, data: dict):
@@ -212,6 +112,7 @@ class TorrentResult:
             "seeders": self.seeders,
             "leechers": self.leechers,
             "indexer": self.indexer,
+            "indexers": list(self.indexers),
             "guid": self.guid,
             "info_hash": self.info_hash,
             "clean_title": self.clean_title,
@@ -219,92 +120,150 @@ class TorrentResult:
             "resolution": self.resolution,
             "codec": self.codec,
             "source": self.source,
-            "features": self.features,
-            "audio": self.audio,
+            "features": list(self.features),
+            "audio": list(self.audio),
             "season": self.season,
             "episode": self.episode,
             "is_tv": self.is_tv
         }
 
 
+class _CardFields(NamedTuple):
+    resolutions: List[str]
+    features: List[str]
+    audio: List[str]
+    size_range: str
+    total_seeders: int
+
+
+def _format_size(size_bytes) -> str:
+    if size_bytes == 0:
+        return "0 B"
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if size_bytes < 1024:
+            return f"{size_bytes:.1f} {unit}"
+        size_bytes /= 1024
+    return f"{size_bytes:.1f} PB"
+
+
 class AggregatedResult:
+    # _fields and _serialized are derived from the downloads and dropped whenever one is added
+    __slots__ = ("clean_title", "year", "is_tv", "downloads", "poster_url", "collapsed", "_fields", "_serialized")
+
     def __init__(self, clean_title: str, year: int, is_tv: bool):
         self.clean_title = clean_title
         self.year = year
         self.is_tv = is_tv
         self.downloads: List[TorrentResult] = []
         self.poster_url = None
+        # Duplicate copies of downloads (same torrent from several indexers) merged away
+        self.collapsed = 0
+        self._fields: Optional[_CardFields] = None
+        self._serialized: Optional[dict] = None
 
     def add_result(self, result: TorrentResult):
         self.downloads.append(result)
+        self._fields = None
+        self._serialized = None
+
+    def _card_fields(self) -> _CardFields:
+        fields = self._fields
+        if fields is None:
+            resolutions = set()
+            feats = set()
+            auds = set()
+            for d in self.downloads:
+                if d.resolution != "Unknown":
+                    resolutions.add(d.resolution)
+                feats.update(d.features)
+                auds.update(d.audio)
+
+            if not self.downloads:
+                size_range = "0 B"
+            else:
+                min_size = min(d.size for d in self.downloads)
+                max_size = max(d.size for d in self.downloads)
+                if min_size == max_size:
+                    size_range = _format_size(min_size)
+                else:
+                    size_range = f"{_format_size(min_size)} - {_format_size(max_size)}"
+
+            fields = self._fields = _CardFields(
+                resolutions=sorted(resolutions),
+                features=sorted(feats),
+                audio=sorted(auds),
+                size_range=size_range,
+                total_seeders=sum(d.seeders for d in self.downloads)
+            )
+        return fields
 
     @property
     def resolutions(self) -> List[str]:
-        res = set(d.resolution for d in self.downloads if d.resolution != "Unknown")
-        return sorted(list(res))
+        return self._card_fields().resolutions
 
     @property
     def features(self) -> List[str]:
-        feats = set()
-        for d in self.downloads:
-            feats.update(d.features)
-        return sorted(list(feats))
+        return self._card_fields().features
 
     @property
     def audio(self) -> List[str]:
-        auds = set()
-        for d in self.downloads:
-            auds.update(d.audio)
-        return sorted(list(auds))
+        return self._card_fields().audio
 
     @property
     def total_size_range(self) -> str:
-        if not self.downloads:
-            return "0 B"
-        sizes = [d.size for d in self.downloads]
-        min_size = min(sizes)
-        max_size = max(sizes)
-        
-        def format_size(size_bytes):
-            if size_bytes == 0:
-                return "0 B"
-            for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-                if size_bytes < 1024:
-                    return f"{size_bytes:.1f} {unit}"
-                size_bytes /= 1024
-            return f"{size_bytes:.1f} PB"
-
-        if min_size == max_size:
-            return format_size(min_size)
-        return f"{format_size(min_size)} - {format_size(max_size)}"
+        return self._card_fields().size_range
+
+    @property
+    def total_seeders(self) -> int:
+        return self._card_fields().total_seeders
 
     @classmethod
     def aggregate(cls, results: List[TorrentResult]) -> List['AggregatedResult']:
         groups: Dict[tuple, 'AggregatedResult'] = {}
+        # card key -> dedupe key -> copies of that torrent, in arrival order
+        copies: Dict[tuple, Dict[tuple, List[TorrentResult]]] = {}
         for r in results:
             key = (r.clean_title.lower(), r.year, r.is_tv)
             if key not in groups:
                 groups[key] = cls(r.clean_title, r.year, r.is_tv)
-            groups[key].add_result(r)
-        
+                copies[key] = {}
+            copies[key].setdefault(r.dedupe_key, []).append(r)
+
+        for key, agg in groups.items():
+            for torrent_copies in copies[key].values():
+                agg.add_result(TorrentResult.merge_duplicates(torrent_copies))
+                agg.collapsed += len(torrent_copies) - 1
+
         # Sort downloads inside each aggregated card by seeders descending
         for agg in groups.values():
             agg.downloads.sort(key=lambda x: x.seeders, reverse=True)
             
         # Sort cards by sum of seeders descending
         aggregated_list = list(groups.values())
-        aggregated_list.sort(key=lambda x: sum(d.seeders for d in x.downloads), reverse=True)
+        aggregated_list.sort(key=lambda x: x.total_seeders, reverse=True)
         return aggregated_list
 
     def to_dict(self) -> dict:
-        return {
-            "clean_title": self.clean_title,
-            "year": self.year,
-            "is_tv": self.is_tv,
-            "resolutions": self.resolutions,
-            "features": self.features,
-            "audio": self.audio,
-            "size_range": self.total_size_range,
-            "poster_url": self.poster_url,
-            "downloads": [d.to_dict() for d in self.downloads]
-        }
\ No newline at end of file
+        """
+        Serializes the card. The serialized form is built once and reused by
+        later calls (e.g. cache hits); each call gets its own top-level and
+        download dicts, so per-request fields can be overlaid on them.
+        """
+        serialized = self._serialized
+        if serialized is None:
+            fields = self._card_fields()
+            serialized = self._serialized = {
+                "clean_title": self.clean_title,
+                "year": self.year,
+                "is_tv": self.is_tv,
+                "resolutions": fields.resolutions,
+                "features": fields.features,
+                "audio": fields.audio,
+                "size_range": fields.size_range,
+                "poster_url": None,
+                "collapsed": self.collapsed,
+                "downloads": [d.to_dict() for d in self.downloads]
+            }
+        card = dict(serialized, poster_url=self.poster_url)
+        card["downloads"] = [dict(d) for d in serialized["downloads"]]
+        return card
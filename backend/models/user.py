@@ -1,17 +1,105 @@
+import os
+import copy
+import hmac
 import json
+import time
+import hashlib
 import secrets
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
 from ..database import Database
 from .group import Group
-from typing import Optional
+from typing import Optional, Tuple
+
+class SessionCache:
+    """
+    TTL'd, size-bounded LRU of session token -> User (with its Group loaded),
+    so login_required can authenticate without touching the database.
+    Logout, role changes, user saves and deletions invalidate entries
+    explicitly; the TTL bounds staleness for anything else.
+    """
+
+    def __init__(self, ttl: float = None, max_size: int = None):
+        self.ttl = ttl if ttl is not None else float(os.environ.get("SESSION_CACHE_TTL", 60))
+        self.max_size = max_size or int(os.environ.get("SESSION_CACHE_SIZE", 1024))
+        self.lock = threading.Lock()
+        # maps token -> (expires_at, User)
+        self._entries: OrderedDict = OrderedDict()
+        self._db = None
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "invalidations": 0
+        }
+
+    def get(self, token: str) -> Optional['User']:
+        db = Database()
+        with self.lock:
+            if self._db is not db:
+                # Database was swapped out; nothing cached belongs to it
+                self._entries.clear()
+                self._db = db
+            entry = self._entries.get(token)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[token]
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(token)
+            self._stats["hits"] += 1
+            user = entry[1]
+        # Handlers may mutate g.user, so each request gets its own copy
+        user_copy = copy.copy(user)
+        user_copy.settings = dict(user.settings)
+        return user_copy
+
+    def set(self, token: str, user: 'User', session_expires_at: float):
+        if self.ttl <= 0:
+            return
+        expires_at = min(time.time() + self.ttl, session_expires_at)
+        cached = copy.copy(user)
+        cached.settings = dict(user.settings)
+        with self.lock:
+            self._entries[token] = (expires_at, cached)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_token(self, token: str):
+        with self.lock:
+            if self._entries.pop(token, None) is not None:
+                self._stats["invalidations"] += 1
+
+    def invalidate_user(self, user_id: int):
+        with self.lock:
+            for token in [t for t, (_, u) in self._entries.items() if u.id == user_id]:
+                del self._entries[token]
+                self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self.lock:
+            self._entries.clear()
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        stats["ttl"] = self.ttl
+        stats["max_size"] = self.max_size
+        return stats
+
+# Process-wide cache of authenticated sessions
+session_cache = SessionCache()
 
 class User:
     def __init__(self, id: int, username: str, password_hash: str, group_id: int, 
                  api_key: str = None, settings: dict = None, 
                  full_name: str = None, first_name: str = None, 
                  last_name: str = None, profile_picture: str = None, 
-                 created_at: str = None):
+                 created_at: str = None, session_generation: int = 0):
         self.id = id
         self.username = username
         self.password_hash = password_hash
@@ -23,10 +111,15 @@ class User:
         self.last_name = last_name
         self.profile_picture = profile_picture
         self.created_at = created_at
+        self.session_generation = session_generation or 0
+        self._group = None
 
     @property
     def group(self) -> Optional[Group]:
-        return Group.get_by_id(self.group_id)
+        # Loaded once per group_id rather than on every access
+        if self._group is None or self._group.id != self.group_id:
+            self._group = Group.get_by_id(self.group_id) if self.group_id else None
+        return self._group
 
     @classmethod
     def get_by_id(cls, user_id: int):
@@ -45,7 +138,8 @@ class User:
                 first_name=row['first_name'] if 'first_name' in keys else None,
                 last_name=row['last_name'] if 'last_name' in keys else None,
                 profile_picture=row['profile_picture'] if 'profile_picture' in keys else None,
-                created_at=row['created_at'] if 'created_at' in keys else None
+                created_at=row['created_at'] if 'created_at' in keys else None,
+                session_generation=row['session_generation'] if 'session_generation' in keys else 0
             )
         return None
 
@@ -66,7 +160,8 @@ class User:
                 first_name=row['first_name'] if 'first_name' in keys else None,
                 last_name=row['last_name'] if 'last_name' in keys else None,
                 profile_picture=row['profile_picture'] if 'profile_picture' in keys else None,
-                created_at=row['created_at'] if 'created_at' in keys else None
+                created_at=row['created_at'] if 'created_at' in keys else None,
+                session_generation=row['session_generation'] if 'session_generation' in keys else 0
             )
         return None
 
@@ -145,6 +240,7 @@ class User:
                    WHERE id = ?""", 
                 (self.username, self.password_hash, self.group_id, self.api_key, settings_json, self.id)
             )
+        session_cache.invalidate_user(self.id)
 
     def has_permission(self, permission: str) -> bool:
         grp = self.group
@@ -152,15 +248,73 @@ class User:
             return grp.has_permission(permission)
         return False
 
+    # Expired rows in the sessions table are purged at most this often (seconds)
+    SESSION_PURGE_INTERVAL = 3600
+    _last_session_purge = 0.0
+
+    @staticmethod
+    def _signing_key() -> Optional[bytes]:
+        """The app's secret key, or None outside an app context or while it is unset or the shipped default."""
+        from flask import current_app, has_app_context
+        from ..app import DEFAULT_SECRET_KEY
+        if not has_app_context():
+            return None
+        secret = current_app.secret_key
+        if not secret or secret == DEFAULT_SECRET_KEY:
+            return None
+        return secret.encode() if isinstance(secret, str) else secret
+
+    @classmethod
+    def signed_sessions_enabled(cls) -> bool:
+        """
+        SESSION_TOKEN_MODE=signed issues stateless HMAC tokens instead of
+        sessions table rows. It stays off unless FLASK_SECRET_KEY is set to a
+        private value, since anyone could mint tokens with the public default.
+        """
+        if os.environ.get("SESSION_TOKEN_MODE", "db").lower() != "signed":
+            return False
+        return cls._signing_key() is not None
+
+    @classmethod
+    def _sign(cls, payload: str) -> str:
+        return hmac.new(cls._signing_key(), payload.encode(), hashlib.sha256).hexdigest()
+
+    @classmethod
+    def _parse_signed_token(cls, token: str) -> Optional[Tuple[int, int, int]]:
+        """Returns (user_id, expires_at, generation) for a well-signed, unexpired token, else None."""
+        parts = token.split(".")
+        if len(parts) != 5 or parts[0] != "v1" or cls._signing_key() is None:
+            return None
+        payload = ".".join(parts[:4])
+        if not hmac.compare_digest(cls._sign(payload), parts[4]):
+            return None
+        try:
+            user_id, expires_at, generation = int(parts[1]), int(parts[2]), int(parts[3])
+        except ValueError:
+            return None
+        if expires_at <= time.time():
+            return None
+        return user_id, expires_at, generation
+
     @classmethod
     def create_session(cls, user_id: int, days_valid: int = 30) -> str:
+        if cls.signed_sessions_enabled():
+            db = Database()
+            row = db.query("SELECT session_generation FROM users WHERE id = ?", (user_id,), one=True)
+            generation = (row["session_generation"] or 0) if row else 0
+            expires_at = int(time.time() + days_valid * 86400)
+            payload = f"v1.{user_id}.{expires_at}.{generation}"
+            return f"{payload}.{cls._sign(payload)}"
+
         db = Database()
         token = secrets.token_hex(32)
         expires_at = datetime.utcnow() + timedelta(days=days_valid)
         expires_str = expires_at.isoformat()
         
-        # Clear expired sessions
-        db.execute("DELETE FROM sessions WHERE expires_at < ?", (datetime.utcnow().isoformat(),))
+        # Clear expired sessions (throttled; verify_session filters on expiry anyway)
+        if time.time() - cls._last_session_purge > cls.SESSION_PURGE_INTERVAL:
+            cls._last_session_purge = time.time()
+            db.execute("DELETE FROM sessions WHERE expires_at < ?", (datetime.utcnow().isoformat(),))
         
         db.execute(
             "INSERT INTO sessions (session_token, user_id, expires_at) VALUES (?, ?, ?)",
@@ -172,23 +326,69 @@ class User:
     def verify_session(cls, token: str) -> Optional['User']:
         if not token:
             return None
+
+        # Signed tokens are checked in pure CPU; forged or expired ones never reach the cache or DB
+        signed = None
+        if token.startswith("v1."):
+            signed = cls._parse_signed_token(token) if cls.signed_sessions_enabled() else None
+            if signed is None:
+                return None
+
+        cached = session_cache.get(token)
+        if cached is not None:
+            return cached
+
+        if signed is not None:
+            user_id, expires_at, generation = signed
+            user = cls.get_by_id(user_id)
+            # Revoked by a generation bump (logout, revoke_sessions)
+            if not user or user.session_generation != generation:
+                return None
+            user.group  # load the group now so cached requests never query it
+            session_cache.set(token, user, expires_at)
+            return user
+
         db = Database()
-        now_str = datetime.utcnow().isoformat()
+        now = datetime.utcnow()
         row = db.query(
-            "SELECT user_id FROM sessions WHERE session_token = ? AND expires_at > ?",
-            (token, now_str),
+            "SELECT user_id, expires_at FROM sessions WHERE session_token = ? AND expires_at > ?",
+            (token, now.isoformat()),
             one=True
         )
         if row:
-            return cls.get_by_id(row['user_id'])
+            user = cls.get_by_id(row['user_id'])
+            if user:
+                user.group  # load the group now so cached requests never query it
+                remaining = (datetime.fromisoformat(row['expires_at']) - now).total_seconds()
+                session_cache.set(token, user, time.time() + remaining)
+            return user
         return None
 
     @classmethod
     def delete_session(cls, token: str):
         if not token:
             return
+        signed = cls._parse_signed_token(token) if token.startswith("v1.") else None
+        if signed is not None:
+            # Stateless tokens can only be revoked together, by bumping the user's generation
+            cls.revoke_sessions(signed[0])
+            return
         db = Database()
         db.execute("DELETE FROM sessions WHERE session_token = ?", (token,))
+        session_cache.invalidate_token(token)
+
+    @classmethod
+    def revoke_sessions(cls, user_id: int):
+        """Logs a user out everywhere: drops their session rows and invalidates all signed tokens."""
+        db = Database()
+        db.execute("UPDATE users SET session_generation = COALESCE(session_generation, 0) + 1 WHERE id = ?", (user_id,))
+        db.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+        session_cache.invalidate_user(user_id)
+
+    @classmethod
+    def invalidate_sessions(cls, user_id: int):
+        """Drops cached sessions for a user whose row was changed or deleted outside save()."""
+        session_cache.invalidate_user(user_id)
 
     def to_dict(self):
         return {
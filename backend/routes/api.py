@@ -4,14 +4,27 @@ import time
 import logging
 import requests
 import shutil
+import uuid
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
 from functools import wraps
 from flask import Blueprint, request, jsonify, g, redirect
-from ..models.user import User
+from flask_socketio import join_room
+from ..models.user import User, session_cache
 from ..models.result import TorrentResult, AggregatedResult
-from ..services.search_client import SearchClient
+from ..models.release_parser import parse_release, parse_cache_stats
+from ..services.search_client import SearchClient, prowlarr_flights, fanout_stats
+from ..services.search_cache import global_search_cache
 from ..services.torbox_client import TorboxClient
 from ..services.tmdb_client import TmdbClient
+from ..services.progress_buffer import global_progress_buffer
+from ..services.cancellation import global_cancellation_registry
+from ..services.torbox_poller import global_torbox_poller
+from ..services.library_index import global_library_index
+from ..services.tmdb_cache import global_tmdb_cache
+from ..services.http_pool import http_pool_stats
+from ..services.client_registry import global_client_registry
+from ..services.settings_cache import global_settings_cache
 from ..database import Database
 from ..app import socketio
 
@@ -19,6 +32,10 @@ logger = logging.getLogger(__name__)
 api_bp = Blueprint('api', __name__)
 
 def get_server_settings():
+    """Returns the server settings, served from the in-process cache between writes."""
+    return global_settings_cache.get(_load_server_settings)
+
+def _load_server_settings():
     db = Database()
     rows = db.query("SELECT key, value FROM server_settings") or []
     settings = {}
@@ -36,6 +53,9 @@ def save_server_settings(settings):
     db = Database()
     for key, value in settings.items():
         db.execute("INSERT OR REPLACE INTO server_settings (key, value) VALUES (?, ?)", (key, value))
+    global_settings_cache.invalidate()
+    # Clients are keyed by their credentials; drop them so the new settings take effect
+    global_client_registry.invalidate()
 
 # Authentication Decorator
 def login_required(f):
@@ -70,6 +90,9 @@ ACTIVE_TASKS_LOCK = threading.Lock()
 _RESUMPTION_INITIALIZED = False
 _RESUMPTION_LOCK = threading.Lock()
 
+# Seconds between slow-path database checks for downloads deleted outside this process
+CANCEL_DB_CHECK_INTERVAL = 5
+
 # Background Task for Torbox Lifecycle Monitoring & Downloader
 def monitor_and_download_task(user_id, torbox_id, metadata, db_download_id):
     """
@@ -83,9 +106,11 @@ def monitor_and_download_task(user_id, torbox_id, metadata, db_download_id):
             return
         ACTIVE_DOWNLOAD_TASKS.add(task_key)
 
+    global_cancellation_registry.register(db_download_id)
     try:
         _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id)
     finally:
+        global_cancellation_registry.release(db_download_id)
         with ACTIVE_TASKS_LOCK:
             ACTIVE_DOWNLOAD_TASKS.discard(task_key)
 
@@ -103,9 +128,10 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
         logger.error(f"User {user_id} not found. Exiting task.")
         return
 
+    settings_version = global_settings_cache.version
     settings = get_server_settings()
     torbox_key = settings.get("torbox_api_key") or os.environ.get("TORBOX_API_KEY", "")
-    torbox = TorboxClient(api_key=torbox_key)
+    torbox = global_client_registry.get("torbox", TorboxClient, api_key=torbox_key)
 
     library_root = settings.get("library_path") or os.environ.get("ROOT_LIBRARY_LOCATION", "./library")
     library_root = os.path.abspath(library_root)
@@ -114,18 +140,38 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
 
     last_emit_time = 0
 
+    cancel_event = global_cancellation_registry.register(db_download_id)
+    last_cancel_db_check = 0
+
+    def is_cancelled(force_db_check=False):
+        # Deletions through the API signal the in-memory token; the database is
+        # only consulted every few seconds as a fallback for out-of-band deletes.
+        nonlocal last_cancel_db_check
+        if cancel_event.is_set():
+            return True
+        now_c = time.time()
+        if force_db_check or now_c - last_cancel_db_check >= CANCEL_DB_CHECK_INTERVAL:
+            last_cancel_db_check = now_c
+            if not db.query("SELECT id FROM downloads WHERE id = ?", (db_download_id,), one=True):
+                cancel_event.set()
+                return True
+        return False
+
+    # Torrent state comes from the shared poller, which fetches the Torbox list once per tick for all tasks
+    subscription = global_torbox_poller.subscribe(torbox_id, torbox)
+
     while True:
         try:
             # Check if cancelled (i.e. deleted from local database)
-            exists = db.query("SELECT id FROM downloads WHERE id = ?", (db_download_id,), one=True)
+            exists = not is_cancelled()
             if not exists:
                 logger.info(f"Download {db_download_id} (Torbox ID: {torbox_id}) was cancelled/deleted from database. Exiting monitor task.")
                 break
 
-            info = torbox.get_torrent_info(torbox_id)
+            info = subscription.next()
             if not info:
                 logger.error(f"Torrent {torbox_id} could not be found in Torbox.")
-                db.execute("UPDATE downloads SET status = 'failed' WHERE id = ?", (db_download_id,))
+                global_progress_buffer.update(db_download_id, status='failed', flush=True)
                 socketio.emit('download_progress', {
                     'id': torbox_id,
                     'title': metadata.get('title', 'Unknown'),
@@ -174,13 +220,9 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
                 status_str = f"Downloading ({friendly_state})"
                 db_status = f"downloading ({friendly_state})"
 
-            # Throttle websocket emits and persist live state in database
+            # Throttle websocket emits and buffer live state for the next batched database flush
             now = time.time()
             if now - last_emit_time > 1:
-                db.execute(
-                    "UPDATE downloads SET status = ?, progress = ?, speed = ?, size = ? WHERE id = ?",
-                    (status_str, progress, speed, size, db_download_id)
-                )
                 socketio.emit('download_progress', {
                     'id': torbox_id,
                     'title': metadata.get('title'),
@@ -194,16 +236,13 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
                 })
                 last_emit_time = now
 
-            db.execute(
-                "UPDATE downloads SET status = ?, progress = ?, speed = ?, size = ? WHERE id = ?",
-                (db_status, progress, speed, size, db_download_id)
-            )
+            global_progress_buffer.update(db_download_id, status=db_status, progress=progress, speed=speed, size=size)
 
             # Complete on Torbox?
             if state in ("completed", "cached", "uploading") or progress >= 100 or info.get("download_finished"):
                 logger.info(f"Torbox finished downloading {torbox_id}. Copying files locally...")
 
-                db.execute("UPDATE downloads SET status = 'moving', speed = 0 WHERE id = ?", (db_download_id,))
+                global_progress_buffer.update(db_download_id, status='moving', speed=0, flush=True)
                 socketio.emit('download_progress', {
                     'id': torbox_id,
                     'title': metadata.get('title'),
@@ -219,11 +258,13 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
                 # Fetch file objects
                 files = info.get("files", [])
                 if not files:
-                    # Wait and retry once
-                    time.sleep(3)
-                    info = torbox.get_torrent_info(torbox_id)
+                    # Wait for the next poller tick and retry once
+                    info = subscription.next()
                     files = info.get("files", []) if info else []
 
+                # Remote side is finished; stop polling Torbox for this torrent during the local transfer
+                subscription.close()
+
                 video_extensions = {'.mkv', '.mp4', '.avi', '.mov', '.m4v'}
                 video_files = []
                 for f in files:
@@ -239,7 +280,7 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
                         video_files = [largest]
                     else:
                         logger.error("No files found in Torbox torrent.")
-                        db.execute("UPDATE downloads SET status = 'failed' WHERE id = ?", (db_download_id,))
+                        global_progress_buffer.update(db_download_id, status='failed', flush=True)
                         socketio.emit('download_progress', {
                             'id': torbox_id,
                             'title': metadata.get('title'),
@@ -256,10 +297,11 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
                 total_downloaded = 0
                 local_transfer_success = True
 
-                # Resolve official metadata from TMDb
-                settings = get_server_settings()
+                # Resolve official metadata from TMDb (re-reading settings only if they changed mid-download)
+                if global_settings_cache.version != settings_version:
+                    settings = get_server_settings()
                 tmdb_key = settings.get("tmdb_api_key") or os.environ.get("TMDB_API_KEY", "")
-                tmdb = TmdbClient(api_key=tmdb_key)
+                tmdb = global_client_registry.get("tmdb", TmdbClient, api_key=tmdb_key)
 
                 import urllib.parse
                 magnet_str = metadata.get("magnet", "")
@@ -269,10 +311,10 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
                 else:
                     full_release_name = metadata.get("filename") or metadata.get("title", "Unknown")
 
-                parsed_torrent = TorrentResult(title=full_release_name, size=0, download_url="", seeders=0, leechers=0, indexer="")
-                title_clean = parsed_torrent.clean_title or metadata.get("title", "Unknown")
+                parsed = parse_release(full_release_name)
+                title_clean = parsed.clean_title or metadata.get("title", "Unknown")
                 category = metadata.get("category", "movie")
-                year = parsed_torrent.year or metadata.get("year")
+                year = parsed.year or metadata.get("year")
 
                 tmdb_id = None
                 official_title = title_clean
@@ -284,6 +326,17 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
                         return ""
                     return re.sub(r'[\/\\\:\*\?\"\<\>\|]', '', name).strip()
 
+                refreshed_shows = set()
+
+                def get_valid_seasons(show_id, season_number):
+                    valid = tmdb.get_tv_seasons(show_id)
+                    if valid and season_number not in valid and show_id not in refreshed_shows:
+                        # The cached list may predate a newly aired season; refetch it once per show,
+                        # as every file of a pack asks about the same seasons
+                        refreshed_shows.add(show_id)
+                        valid = tmdb.get_tv_seasons(show_id, refresh=True)
+                    return valid
+
                 if category == "movie":
                     res = tmdb.search_movie(title_clean, year)
                     if res:
@@ -300,7 +353,7 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
                         # Dynamically validate season against TMDb's available seasons for this show entry
                         req_season = metadata.get("season")
                         if req_season and tmdb_id:
-                            valid_seasons = tmdb.get_tv_seasons(tmdb_id)
+                            valid_seasons = get_valid_seasons(tmdb_id, req_season)
                             if valid_seasons and req_season not in valid_seasons:
                                 metadata["season"] = valid_seasons[0]
 
@@ -359,7 +412,7 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
 
                     if category == "tv":
                         if tmdb_id and season:
-                            valid_seasons = tmdb.get_tv_seasons(tmdb_id)
+                            valid_seasons = get_valid_seasons(tmdb_id, season)
                             if valid_seasons and season not in valid_seasons:
                                 season = valid_seasons[0]
 
@@ -368,7 +421,12 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
 
                         episode_name = None
                         if tmdb_id and season and episode:
-                            episode_name = tmdb.get_episode_name(tmdb_id, season, episode)
+                            # One request per season covers every episode of a pack
+                            season_episodes = tmdb.get_season_episodes(tmdb_id, season)
+                            episode_name = season_episodes.get(episode) if season_episodes else None
+                            if not episode_name:
+                                # Partially published season or a stale cached map
+                                episode_name = tmdb.get_episode_name(tmdb_id, season, episode)
 
                         episode_name_safe = make_safe_filename(episode_name) if episode_name else ""
 
@@ -404,7 +462,7 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
 
                     for attempt in range(1, MAX_RETRIES + 1):
                         # Check if cancelled/deleted from database
-                        exists = db.query("SELECT id FROM downloads WHERE id = ?", (db_download_id,), one=True)
+                        exists = not is_cancelled()
                         if not exists:
                             logger.info(f"Download {db_download_id} was cancelled during transfer. Aborting and cleaning up.")
                             local_transfer_success = False
@@ -496,7 +554,7 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
 
                             with open(temp_dest_path, open_mode) as f_out:
                                 for chunk in resp.iter_content(chunk_size=1024*1024):
-                                    exists = db.query("SELECT id FROM downloads WHERE id = ?", (db_download_id,), one=True)
+                                    exists = not is_cancelled()
                                     if not exists:
                                         logger.info(f"Download {db_download_id} was cancelled during transfer stream. Aborting.")
                                         local_transfer_success = False
@@ -524,9 +582,12 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
 
                                         if now_f - last_file_emit > 1:
                                             moving_status = f"Moving file {idx+1}/{len(video_files)}"
-                                            db.execute(
-                                                "UPDATE downloads SET status = ?, progress = ?, speed = ?, size = ? WHERE id = ?",
-                                                (moving_status, overall_progress, current_speed, total_files_size, db_download_id)
+                                            global_progress_buffer.update(
+                                                db_download_id,
+                                                status=moving_status,
+                                                progress=overall_progress,
+                                                speed=current_speed,
+                                                size=total_files_size
                                             )
                                             socketio.emit('download_progress', {
                                                 'id': torbox_id,
@@ -569,6 +630,7 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
                             if os.path.exists(dest_path):
                                 os.remove(dest_path)
                             os.rename(temp_dest_path, dest_path)
+                            global_library_index.record_file(dest_path)
                             total_downloaded += final_size
                             logger.info(f"Local Transfer complete for file: {file_name}")
                         else:
@@ -581,7 +643,7 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
                         break
 
                 # Check if cancelled before finishing
-                exists = db.query("SELECT id FROM downloads WHERE id = ?", (db_download_id,), one=True)
+                exists = not is_cancelled(force_db_check=True)
                 if not exists:
                     logger.info(f"Download {db_download_id} was cancelled. Cleaning up files.")
                     # Clean up all written files (and any temporary .crdownload duplicates)
@@ -590,6 +652,7 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
                             if os.path.exists(p):
                                 try:
                                     os.remove(p)
+                                    global_library_index.remove_path(p)
                                     logger.info(f"Cleaned up file on cancellation: {p}")
                                 except Exception as clean_ex:
                                     logger.error(f"Failed to delete {p}: {clean_ex}")
@@ -611,7 +674,7 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
                     break # Exit monitor task
 
                 if local_transfer_success:
-                    db.execute("UPDATE downloads SET status = 'completed', progress = 100, speed = 0 WHERE id = ?", (db_download_id,))
+                    global_progress_buffer.update(db_download_id, status='completed', progress=100, speed=0, flush=True)
                     socketio.emit('download_progress', {
                         'id': torbox_id,
                         'title': metadata.get('title'),
@@ -625,7 +688,7 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
                     })
                     logger.info(f"Download complete: {metadata.get('filename')}")
                 else:
-                    db.execute("UPDATE downloads SET status = 'failed' WHERE id = ?", (db_download_id,))
+                    global_progress_buffer.update(db_download_id, status='failed', flush=True)
                     socketio.emit('download_progress', {
                         'id': torbox_id,
                         'title': metadata.get('title'),
@@ -638,12 +701,12 @@ def _execute_monitor_and_download(user_id, torbox_id, metadata, db_download_id):
                         'user_id': user_id
                     })
                 break
-
-            time.sleep(3)
         except Exception as e:
             logger.error(f"Monitor loop error for torrent {torbox_id}: {e}")
             time.sleep(5)
 
+    subscription.close()
+
 
 # AUTHENTICATION ROUTES
 @api_bp.route('/auth/google/login', methods=['GET'])
@@ -779,7 +842,50 @@ def me():
     return jsonify(user_dict)
 
 
+# Bounded worker pool for TMDb poster lookups and the overall time budget per search response
+POSTER_WORKERS = 8
+POSTER_BUDGET_SECONDS = 3.0
+_poster_executor = ThreadPoolExecutor(max_workers=POSTER_WORKERS, thread_name_prefix="tmdb-poster")
+
+
+def resolve_posters(cards, resolve_poster, budget=POSTER_BUDGET_SECONDS):
+    """
+    Resolves card posters concurrently. Cards whose lookup misses the budget keep
+    their previous poster (None for new cards) and are filled in once the lookup
+    finishes, so cached cards carry it into later responses.
+    """
+    def assign(card, future):
+        try:
+            poster_url = future.result()
+        except Exception as e:
+            logger.error(f"Failed to fetch TMDb poster for {card.clean_title}: {e}")
+            return
+        if poster_url or not card.poster_url:
+            card.poster_url = poster_url
+
+    futures = {_poster_executor.submit(resolve_poster, card): card for card in cards}
+    if not futures:
+        return
+
+    done, pending = wait(futures, timeout=budget)
+    for future in done:
+        assign(futures[future], future)
+    for future in pending:
+        future.add_done_callback(lambda f, card=futures[future]: assign(card, f))
+    if pending:
+        logger.info(f"TMDb poster budget of {budget}s exceeded for {len(pending)}/{len(futures)} cards.")
+
+
 def get_library_file_sizes(library_root):
+    # Served from the persistent library index instead of walking the tree on every request
+    try:
+        sizes = global_library_index.file_sizes(library_root)
+        if sizes is not None:
+            return sizes
+    except Exception as e:
+        logger.error(f"Library index lookup failed for {library_root}: {e}")
+
+    # The index is still being built; walk the tree so cards are not all shown as missing
     sizes = set()
     if not library_root or not os.path.exists(library_root):
         return sizes
@@ -795,21 +901,10 @@ def get_library_file_sizes(library_root):
     return sizes
 
 
-# SEARCH ENDPOINT
-@api_bp.route('/search', methods=['GET'])
-@login_required
-def search():
-    query = request.args.get('q')
-    category = request.args.get('category')  # 'movie' or 'tv'
-
-    if not query:
-        return jsonify({"error": "Missing query parameter 'q'"}), 400
-
-    query_str = query.strip()
-
-    settings = get_server_settings()
+def make_poster_resolver(settings):
+    """Returns resolve_poster(card) -> poster URL or None, using the configured TMDb client."""
     tmdb_key = settings.get("tmdb_api_key") or os.environ.get("TMDB_API_KEY", "")
-    tmdb = TmdbClient(api_key=tmdb_key)
+    tmdb = global_client_registry.get("tmdb", TmdbClient, api_key=tmdb_key)
 
     def resolve_poster(agg):
         if not tmdb_key:
@@ -825,18 +920,142 @@ def search():
             logger.error(f"Failed to fetch TMDb poster for {agg.clean_title}: {e}")
         return None
 
-    def populate_card_downloads(card, file_sizes, db):
-        for dl in card["downloads"]:
-            dl["downloaded"] = dl["size"] in file_sizes
-            row = db.query("SELECT torbox_id, user_id, status FROM downloads WHERE magnet = ?", (dl["download_url"],), one=True)
-            if row:
-                dl["torbox_id"] = row["torbox_id"]
-                dl["user_id"] = row["user_id"]
-                dl["db_status"] = row["status"]
-            else:
-                dl["torbox_id"] = None
-                dl["user_id"] = None
-                dl["db_status"] = None
+    return resolve_poster
+
+
+def populate_card_downloads(card, file_sizes, db):
+    for dl in card["downloads"]:
+        dl["downloaded"] = dl["size"] in file_sizes
+        row = db.query("SELECT id, torbox_id, user_id, status FROM downloads WHERE magnet = ?", (dl["download_url"],), one=True)
+        if row:
+            dl["torbox_id"] = row["torbox_id"]
+            dl["user_id"] = row["user_id"]
+            # Same live status as /api/downloads, including progress not flushed yet
+            dl["db_status"] = global_progress_buffer.overlay({"id": row["id"], "status": row["status"]})["status"]
+        else:
+            dl["torbox_id"] = None
+            dl["user_id"] = None
+            dl["db_status"] = None
+
+
+def user_room(user_id):
+    """Socket.IO room every connection of a user joins; per-user events are emitted to it."""
+    return f"user_{user_id}"
+
+
+@socketio.on('connect')
+def socket_connect(auth=None):
+    # Same token sources as login_required: the client's auth payload, then the session cookie
+    token = auth.get("token") if isinstance(auth, dict) else None
+    if not token or token in ("null", "undefined"):
+        token = request.cookies.get("session_token")
+    user = User.verify_session(token)
+    # Anonymous connections are still accepted; they just receive no per-user events
+    if user:
+        join_room(user_room(user.id))
+
+
+def stream_search_task(user_id, search_id, query, category):
+    """
+    Runs a search for the streaming endpoint and pushes the cards to the
+    user's room as they arrive: a search_results event per indexer answer
+    (carrying the updated cards), a search_poster event per resolved poster,
+    and a final search_results event with done=True and the full card list.
+    """
+    room = user_room(user_id)
+    try:
+        settings = get_server_settings()
+        resolve_poster = make_poster_resolver(settings)
+        prowlarr_url = settings.get("prowlarr_url") or os.environ.get("PROWLARR_URL", "")
+        prowlarr_key = settings.get("prowlarr_api_key") or os.environ.get("PROWLARR_API_KEY", "")
+        search_client = global_client_registry.get("prowlarr", SearchClient, base_url=prowlarr_url, api_key=prowlarr_key)
+
+        library_root = settings.get("library_path") or os.environ.get("ROOT_LIBRARY_LOCATION", "./library")
+        file_sizes = get_library_file_sizes(os.path.abspath(library_root))
+        db = Database()
+
+        # Serializes increments so an older version of a card is never sent after a newer one
+        lock = threading.Lock()
+        collected = []
+        posters = {}
+
+        def card_key(agg):
+            return (agg.clean_title.lower(), agg.year, agg.is_tv)
+
+        def poster_done(agg, key, future):
+            try:
+                poster_url = future.result()
+            except Exception as e:
+                logger.error(f"Failed to fetch TMDb poster for {agg.clean_title}: {e}")
+                return
+            if not poster_url:
+                return
+            agg.poster_url = poster_url
+            with lock:
+                posters[key] = poster_url
+            socketio.emit('search_poster', {
+                'search_id': search_id,
+                'clean_title': agg.clean_title,
+                'year': agg.year,
+                'is_tv': agg.is_tv,
+                'poster_url': poster_url
+            }, to=room)
+
+        def emit_cards(cards, done=False):
+            data = []
+            for agg in cards:
+                agg.poster_url = agg.poster_url or posters.get(card_key(agg))
+                card = agg.to_dict()
+                populate_card_downloads(card, file_sizes, db)
+                data.append(card)
+            socketio.emit('search_results', {
+                'search_id': search_id,
+                'data': data,
+                'done': done
+            }, to=room)
+
+            # One TMDb lookup per card for the whole stream
+            for agg in cards:
+                key = card_key(agg)
+                if agg.poster_url or key in posters:
+                    continue
+                posters[key] = None
+                future = _poster_executor.submit(resolve_poster, agg)
+                future.add_done_callback(lambda f, agg=agg, key=key: poster_done(agg, key, f))
+
+        def on_results(indexer, results):
+            with lock:
+                collected.extend(results)
+                keys = {(r.clean_title.lower(), r.year, r.is_tv) for r in results}
+                emit_cards([agg for agg in AggregatedResult.aggregate(collected) if card_key(agg) in keys])
+
+        results = search_client.search_stream(query, category=category, on_results=on_results)
+        with lock:
+            emit_cards(results, done=True)
+    except Exception as e:
+        logger.error(f"Streaming search failed for '{query}': {e}")
+        socketio.emit('search_results', {
+            'search_id': search_id,
+            'data': [],
+            'done': True,
+            'error': str(e)
+        }, to=room)
+
+
+# SEARCH ENDPOINT
+@api_bp.route('/search', methods=['GET'])
+@login_required
+def search():
+    query = request.args.get('q')
+    category = request.args.get('category')  # 'movie' or 'tv'
+
+    if not query:
+        return jsonify({"error": "Missing query parameter 'q'"}), 400
+
+    query_str = query.strip()
+
+    settings = get_server_settings()
+    resolve_poster = make_poster_resolver(settings)
 
     # Check if the query is a magnet link or an info hash (hex or base32)
     query_str_lower = query_str.lower()
@@ -857,7 +1076,7 @@ def search():
 
         # Query Torbox for magnet metadata (like size)
         torbox_key = settings.get("torbox_api_key") or os.environ.get("TORBOX_API_KEY", "")
-        torbox = TorboxClient(api_key=torbox_key)
+        torbox = global_client_registry.get("torbox", TorboxClient, api_key=torbox_key)
         magnet_info = torbox.get_magnet_info(magnet_url)
 
         size = 0
@@ -893,13 +1112,24 @@ def search():
             "data": [card]
         })
 
+    if request.args.get('stream') in ('1', 'true'):
+        # Cards are pushed to the user's Socket.IO room as they arrive. The client may pick the id,
+        # so it can match events that reach it before this response does
+        search_id = request.args.get('search_id', '')
+        if not re.fullmatch(r'[A-Za-z0-9_-]{8,64}', search_id):
+            search_id = uuid.uuid4().hex
+        start_bg_task(stream_search_task, g.user.id, search_id, query, category)
+        return jsonify({
+            "type": "search_stream",
+            "search_id": search_id
+        }), 202
+
     prowlarr_url = settings.get("prowlarr_url") or os.environ.get("PROWLARR_URL", "")
     prowlarr_key = settings.get("prowlarr_api_key") or os.environ.get("PROWLARR_API_KEY", "")
 
-    search_client = SearchClient(base_url=prowlarr_url, api_key=prowlarr_key)
+    search_client = global_client_registry.get("prowlarr", SearchClient, base_url=prowlarr_url, api_key=prowlarr_key)
     results = search_client.search(query, category=category)
-    for r in results:
-        r.poster_url = resolve_poster(r)
+    resolve_posters(results, resolve_poster)
 
     library_root = settings.get("library_path") or os.environ.get("ROOT_LIBRARY_LOCATION", "./library")
     library_root = os.path.abspath(library_root)
@@ -990,7 +1220,7 @@ def download():
     if not torbox_key:
         return jsonify({"error": "Torbox API Key not configured. Please save it in settings first."}), 400
 
-    torbox = TorboxClient(api_key=torbox_key)
+    torbox = global_client_registry.get("torbox", TorboxClient, api_key=torbox_key)
     res = torbox.add_magnet(magnet)
 
     if res and res.get('success'):
@@ -1080,7 +1310,7 @@ def get_downloads():
     if rows:
         for r in rows:
             size = r["size"] if "size" in r.keys() else 0
-            downloads.append({
+            downloads.append(global_progress_buffer.overlay({
                 "id": r["id"],
                 "torbox_id": r["torbox_id"],
                 "title": r["title"],
@@ -1093,7 +1323,7 @@ def get_downloads():
                 "category": r["category"],
                 "created_at": r["created_at"],
                 "user_id": r["user_id"]
-            })
+            }))
     return jsonify(downloads)
 
 
@@ -1119,7 +1349,7 @@ def control_torrent():
 
     settings = get_server_settings()
     torbox_key = settings.get("torbox_api_key") or os.environ.get("TORBOX_API_KEY", "")
-    torbox = TorboxClient(api_key=torbox_key)
+    torbox = global_client_registry.get("torbox", TorboxClient, api_key=torbox_key)
 
     if action == "delete":
         # Best-effort delete from Torbox
@@ -1134,6 +1364,8 @@ def control_torrent():
 
             # Delete from database immediately
             db.execute("DELETE FROM downloads WHERE id = ?", (db_download_id,))
+            global_progress_buffer.discard(db_download_id)
+            global_cancellation_registry.cancel(db_download_id)
 
             # Perform immediate filesystem clean-up of files/folders
             try:
@@ -1145,17 +1377,16 @@ def control_torrent():
                     library_root = os.path.abspath(library_root)
 
                     from ..services.tmdb_client import TmdbClient
-                    from ..models.result import TorrentResult
 
                     tmdb_key = settings.get("tmdb_api_key") or os.environ.get("TMDB_API_KEY", "")
-                    tmdb = TmdbClient(api_key=tmdb_key)
+                    tmdb = global_client_registry.get("tmdb", TmdbClient, api_key=tmdb_key)
 
                     # Parse metadata
-                    torrent = TorrentResult(title=filename, size=0, download_url="", seeders=0, leechers=0, indexer="")
-                    title_clean = torrent.clean_title
-                    year = torrent.year
-                    season = torrent.season
-                    episode = torrent.episode
+                    parsed = parse_release(filename)
+                    title_clean = parsed.clean_title
+                    year = parsed.year
+                    season = parsed.season
+                    episode = parsed.episode
 
                     tmdb_id = None
                     official_title = title_clean
@@ -1199,6 +1430,7 @@ def control_torrent():
                         if category == "movie":
                             try:
                                 shutil.rmtree(dest_dir)
+                                global_library_index.remove_path(dest_dir)
                                 logger.info(f"Removed movie folder on cancel: {dest_dir}")
                             except Exception as ex:
                                 logger.error(f"Failed to remove movie folder {dest_dir}: {ex}")
@@ -1209,6 +1441,7 @@ def control_torrent():
                                 for entry in os.scandir(dest_dir):
                                     if entry.is_file() and entry.name.startswith(prefix):
                                         os.remove(entry.path)
+                                        global_library_index.remove_path(entry.path)
                                         logger.info(f"Deleted TV show episode file on cancel: {entry.path}")
                                 if not os.listdir(dest_dir):
                                     os.rmdir(dest_dir)
@@ -1245,7 +1478,7 @@ def control_torrent():
                 if task_key in ACTIVE_DOWNLOAD_TASKS:
                     return jsonify({"success": True, "message": "Download is already active."})
 
-            db.execute("UPDATE downloads SET status = 'queued' WHERE id = ?", (db_download_id,))
+            global_progress_buffer.update(db_download_id, status='queued', flush=True)
             start_bg_task(
                 monitor_and_download_task,
                 target_user_id,
@@ -1359,7 +1592,7 @@ def admin_downloads():
     downloads = []
     if rows:
         for r in rows:
-            downloads.append({
+            downloads.append(global_progress_buffer.overlay({
                 "id": r["id"],
                 "torbox_id": r["torbox_id"],
                 "title": r["title"],
@@ -1374,7 +1607,7 @@ def admin_downloads():
                 "user_id": r["user_id"],
                 "username": r["username"] or "Unknown",
                 "full_name": r["full_name"] or "Unknown User"
-            })
+            }))
     return jsonify(downloads)
 
 
@@ -1440,6 +1673,7 @@ def admin_update_role():
     if group_name is None or group_name == "None":
         # Unapprove or set group to NULL
         db.execute("UPDATE users SET group_id = NULL WHERE id = ?", (user_id,))
+        User.invalidate_sessions(target["id"])
         return jsonify({"success": True, "message": "User access removed."})
 
     # Find group by name
@@ -1456,6 +1690,7 @@ def admin_update_role():
             return jsonify({"error": f"Invalid group name: {group_name}"}), 400
 
     db.execute("UPDATE users SET group_id = ? WHERE id = ?", (group.id, user_id))
+    User.invalidate_sessions(target["id"])
     return jsonify({"success": True, "message": f"User role updated to {group_name}."})
 
 
@@ -1482,9 +1717,35 @@ def admin_delete_user():
 
     db = Database()
     db.execute("DELETE FROM users WHERE id = ?", (user_id_int,))
+    User.invalidate_sessions(user_id_int)
     return jsonify({"success": True, "message": "User deleted successfully."})
 
 
+# ADMIN: RUNTIME STATS
+@api_bp.route('/admin/stats', methods=['GET'])
+@login_required
+def admin_stats():
+    is_admin_or_mod = g.user.group and g.user.group.name in ("Admin", "Moderator")
+    if not is_admin_or_mod:
+        return jsonify({"error": "Forbidden"}), 403
+
+    return jsonify({
+        "database": Database().pool_stats(),
+        "progress_buffer": global_progress_buffer.stats(),
+        "torbox_poller": global_torbox_poller.stats(),
+        "library_index": global_library_index.stats(),
+        "tmdb_cache": global_tmdb_cache.stats(),
+        "http": http_pool_stats(),
+        "clients": global_client_registry.stats(),
+        "settings": global_settings_cache.stats(),
+        "sessions": session_cache.stats(),
+        "search_cache": global_search_cache.stats(),
+        "prowlarr_flights": prowlarr_flights.stats(),
+        "prowlarr_fanout": fanout_stats(),
+        "release_parser": parse_cache_stats()
+    })
+
+
 def start_bg_task(target, *args, **kwargs):
     if getattr(socketio, 'server', None) is not None:
         socketio.start_background_task(target, *args, **kwargs)
@@ -1538,7 +1799,7 @@ def init_download_resumption():
                     continue
 
             logger.info(f"Startup Recovery: Auto-resuming download ID {db_download_id} (Torbox ID: {torbox_id}) - '{r['title']}'")
-            db.execute("UPDATE downloads SET status = 'queued' WHERE id = ?", (db_download_id,))
+            global_progress_buffer.update(db_download_id, status='queued', flush=True)
             start_bg_task(
                 monitor_and_download_task,
                 user_id,
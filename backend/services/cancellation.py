@@ -0,0 +1,47 @@
+import threading
+from typing import Dict
+
+class CancellationRegistry:
+    """
+    In-memory cancellation tokens keyed by downloads.id. Monitor tasks register
+    a token when they start and check it between transfer chunks; deleting a
+    download signals the token so the task stops without polling SQLite.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # maps downloads.id -> threading.Event set once the download is cancelled
+        self._events: Dict[int, threading.Event] = {}
+
+    def register(self, download_id: int) -> threading.Event:
+        with self.lock:
+            event = self._events.get(download_id)
+            if event is None:
+                event = threading.Event()
+                self._events[download_id] = event
+            return event
+
+    def cancel(self, download_id: int) -> bool:
+        """Signals the running task for a download. Returns False if no task is registered."""
+        with self.lock:
+            event = self._events.get(download_id)
+        if event is None:
+            return False
+        event.set()
+        return True
+
+    def is_cancelled(self, download_id: int) -> bool:
+        with self.lock:
+            event = self._events.get(download_id)
+        return bool(event and event.is_set())
+
+    def release(self, download_id: int):
+        with self.lock:
+            self._events.pop(download_id, None)
+
+    def active_count(self) -> int:
+        with self.lock:
+            return len(self._events)
+
+# Global singleton registry shared by routes and monitor tasks
+global_cancellation_registry = CancellationRegistry()
@@ -0,0 +1,61 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+class ClientRegistry:
+    """
+    Process-wide registry of long-lived service clients keyed by
+    (service, base_url, api_key). Routes and monitor threads share one
+    instance per configuration instead of constructing clients (and the
+    Torbox SDK) per call. Saving server settings invalidates the registry.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # maps (service, base_url, api_key) -> (factory, client)
+        self._clients: Dict[Tuple[str, str, str], Tuple[Callable, Any]] = {}
+        self._stats = {
+            "hits": 0,
+            "builds": 0,
+            "invalidations": 0
+        }
+
+    def get(self, service: str, factory: Callable, **config) -> Any:
+        """Returns the shared client for this configuration, building it with factory(**config) if needed."""
+        key = (service, config.get("base_url") or "", config.get("api_key") or "")
+        with self.lock:
+            entry = self._clients.get(key)
+            # A different factory (e.g. a reloaded class) never reuses the old instance
+            if entry is not None and entry[0] is factory:
+                self._stats["hits"] += 1
+                return entry[1]
+
+            client = factory(**config)
+            # Only the current configuration of a service is kept alive
+            for stale_key in [k for k in self._clients if k[0] == service]:
+                del self._clients[stale_key]
+            self._clients[key] = (factory, client)
+            self._stats["builds"] += 1
+        logger.debug(f"ClientRegistry: Built new {service} client.")
+        return client
+
+    def invalidate(self, service: str = None):
+        """Drops cached clients (all of them, or one service's) so the next get() rebuilds."""
+        with self.lock:
+            if service is None:
+                self._clients.clear()
+            else:
+                for key in [k for k in self._clients if k[0] == service]:
+                    del self._clients[key]
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            stats = dict(self._stats)
+            stats["live"] = sorted(key[0] for key in self._clients)
+        return stats
+
+# Global singleton registry shared by routes and background tasks
+global_client_registry = ClientRegistry()
@@ -0,0 +1,106 @@
+import os
+import time
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.environ.get(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+class PooledSession:
+    """
+    A requests.Session shared by every client of one upstream service. Keeps
+    up to pool_size keep-alive connections per host, so repeated calls skip
+    the TCP/TLS handshake. Safe to use from multiple threads: the session's
+    urllib3 pools hand each thread its own connection.
+    """
+
+    def __init__(self, name: str, pool_size: int = None):
+        self.name = name
+        self.pool_size = pool_size or _env_int("HTTP_POOL_SIZE", 10)
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+        self.lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "errors": 0,
+            "in_flight": 0,
+            "peak_in_flight": 0,
+            "total_time": 0.0
+        }
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self._send(self.session.get, url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self._send(self.session.post, url, **kwargs)
+
+    def _send(self, method, url: str, **kwargs) -> requests.Response:
+        with self.lock:
+            self._stats["requests"] += 1
+            self._stats["in_flight"] += 1
+            self._stats["peak_in_flight"] = max(self._stats["peak_in_flight"], self._stats["in_flight"])
+        started = time.time()
+        try:
+            return method(url, **kwargs)
+        except Exception:
+            with self.lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            elapsed = time.time() - started
+            with self.lock:
+                self._stats["in_flight"] -= 1
+                self._stats["total_time"] += elapsed
+
+    def _connection_stats(self) -> dict:
+        """Reads connection counters from the adapter's urllib3 host pools."""
+        opened = 0
+        idle = 0
+        hosts = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts += 1
+            opened += getattr(pool, "num_connections", 0)
+            queue = getattr(pool, "pool", None)
+            if queue is not None:
+                # Slots hold None until a connection has been returned to the pool
+                idle += sum(1 for conn in list(queue.queue) if conn is not None)
+        return {"hosts": hosts, "connections_opened": opened, "idle_connections": idle}
+
+    def stats(self) -> dict:
+        with self.lock:
+            stats = dict(self._stats)
+        stats.update(self._connection_stats())
+        stats["pool_size"] = self.pool_size
+        stats["avg_latency"] = round(stats["total_time"] / stats["requests"], 4) if stats["requests"] else 0.0
+        stats["total_time"] = round(stats["total_time"], 4)
+        if stats["requests"]:
+            reused = max(0, stats["requests"] - stats["connections_opened"])
+            stats["reuse_ratio"] = round(reused / stats["requests"], 4)
+        else:
+            stats["reuse_ratio"] = 0.0
+        return stats
+
+    def close(self):
+        self.session.close()
+
+# One keep-alive pool per upstream service, shared by all client instances
+prowlarr_http = PooledSession("prowlarr")
+tmdb_http = PooledSession("tmdb")
+torbox_http = PooledSession("torbox")
+
+def http_pool_stats() -> Dict[str, dict]:
+    return {pool.name: pool.stats() for pool in (prowlarr_http, tmdb_http, torbox_http)}
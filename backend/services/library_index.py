@@ -0,0 +1,283 @@
+import os
+import time
+import logging
+import threading
+from collections import Counter
+from typing import Dict, FrozenSet, Optional
+from ..database import Database
+
+logger = logging.getLogger(__name__)
+
+class LibraryIndex:
+    """
+    Persistent index of the files under the library root, stored in the
+    library_files / library_dirs tables. The first lookup starts building it
+    in the background and gets None until the build completes; later
+    lookups are served from memory while an incremental rescan runs in the
+    background, re-listing only directories whose mtime changed. The transfer
+    pipeline records its own writes and deletions directly.
+    """
+
+    # Listed directories written per transaction; the filesystem is read outside of it
+    BATCH_DIRS = 200
+
+    def __init__(self, rescan_interval: float = 60.0):
+        self.rescan_interval = rescan_interval
+        self.lock = threading.Lock()
+        # notified whenever a scan finishes
+        self._scan_done = threading.Condition(self.lock)
+        self._scan_lock = threading.Lock()
+        # maps library root -> Counter of file sizes currently indexed under it
+        self._sizes: Dict[str, Counter] = {}
+        # maps library root -> frozenset snapshot of _sizes, rebuilt after changes
+        self._snapshots: Dict[str, FrozenSet[int]] = {}
+        # maps library root -> time of the last completed scan
+        self._last_scan: Dict[str, float] = {}
+        self._scanning = set()
+        self._stats = {
+            "scans": 0,
+            "dirs_listed": 0,
+            "dirs_skipped": 0
+        }
+
+    def file_sizes(self, library_root: str) -> Optional[FrozenSet[int]]:
+        """
+        Returns the set of file sizes in the library, for O(1) duplicate checks,
+        or None while the root is being indexed for the first time.
+        """
+        if not library_root or not os.path.exists(library_root):
+            return frozenset()
+        library_root = os.path.abspath(library_root)
+
+        with self.lock:
+            loaded = library_root in self._sizes
+        if not loaded:
+            self._load(library_root)
+
+        with self.lock:
+            last_scan = self._last_scan.get(library_root)
+            stale = last_scan is None or time.time() - last_scan > self.rescan_interval
+        if stale:
+            self._rescan_in_background(library_root)
+
+        with self.lock:
+            if last_scan is None and not self._sizes.get(library_root):
+                # Nothing persisted from an earlier run either
+                return None
+            snapshot = self._snapshots.get(library_root)
+            if snapshot is None:
+                snapshot = frozenset(self._sizes.get(library_root, ()))
+                self._snapshots[library_root] = snapshot
+            return snapshot
+
+    def _load(self, library_root: str):
+        db = Database()
+        rows = db.query("SELECT size FROM library_files WHERE root = ?", (library_root,)) or []
+        with self.lock:
+            if library_root not in self._sizes:
+                self._sizes[library_root] = Counter(row["size"] for row in rows)
+                self._snapshots.pop(library_root, None)
+
+    def _rescan_in_background(self, library_root: str):
+        with self.lock:
+            if library_root in self._scanning:
+                return
+            self._scanning.add(library_root)
+
+        def run():
+            try:
+                self.rescan(library_root)
+            except Exception as e:
+                logger.error(f"LibraryIndex: Background rescan of {library_root} failed: {e}")
+            finally:
+                with self.lock:
+                    self._scanning.discard(library_root)
+                    self._scan_done.notify_all()
+
+        threading.Thread(target=run, name="library-index-rescan", daemon=True).start()
+
+    def rescan(self, library_root: str):
+        """Incrementally syncs the index with the filesystem, listing only changed directories."""
+        library_root = os.path.abspath(library_root)
+        with self._scan_lock:
+            db = Database()
+            dir_rows = db.query("SELECT path, parent, mtime FROM library_dirs WHERE root = ?", (library_root,)) or []
+            known_mtimes = {row["path"]: row["mtime"] for row in dir_rows}
+            known_children: Dict[str, list] = {}
+            for row in dir_rows:
+                if row["parent"]:
+                    known_children.setdefault(row["parent"], []).append(row["path"])
+
+            seen_dirs = set()
+            listed = 0
+            skipped = 0
+            # Writes are collected while listing and applied in short transactions, in walk order
+            pending = []
+            pending_dirs = 0
+
+            def write_pending():
+                with db.connection() as conn:
+                    for dir_path, values in pending:
+                        if isinstance(values, list):
+                            conn.execute("DELETE FROM library_files WHERE dir = ?", (dir_path,))
+                            conn.executemany(
+                                "INSERT OR REPLACE INTO library_files (path, root, dir, size) VALUES (?, ?, ?, ?)",
+                                values
+                            )
+                        else:
+                            conn.execute(
+                                "INSERT OR REPLACE INTO library_dirs (path, root, parent, mtime) VALUES (?, ?, ?, ?)",
+                                values
+                            )
+                pending.clear()
+
+            # (path, parent, mtime): mtime is None when entering a directory, and set on the marker
+            # popped once its whole subtree has been indexed
+            stack = [(library_root, None, None)]
+            while stack:
+                dir_path, parent, done_mtime = stack.pop()
+                if done_mtime is not None:
+                    # A directory's mtime is only recorded after its subtree, so an interrupted
+                    # walk lists it again and finds the children it had not reached
+                    pending.append((dir_path, (dir_path, library_root, parent, done_mtime)))
+                    continue
+                try:
+                    mtime = os.stat(dir_path).st_mtime
+                except OSError:
+                    continue
+                seen_dirs.add(dir_path)
+
+                if known_mtimes.get(dir_path) == mtime:
+                    # Directory entries are unchanged; only descend into known subdirectories
+                    skipped += 1
+                    stack.extend((child, dir_path, None) for child in known_children.get(dir_path, []))
+                    continue
+
+                files = []
+                subdirs = []
+                try:
+                    with os.scandir(dir_path) as it:
+                        for entry in it:
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    subdirs.append((entry.path, dir_path, None))
+                                elif entry.is_file():
+                                    files.append((entry.path, library_root, dir_path, entry.stat().st_size))
+                            except OSError:
+                                pass
+                except OSError:
+                    continue
+
+                listed += 1
+                stack.append((dir_path, parent, mtime))
+                stack.extend(subdirs)
+                pending.append((dir_path, files))
+                pending_dirs += 1
+                if pending_dirs >= self.BATCH_DIRS:
+                    write_pending()
+                    pending_dirs = 0
+
+            write_pending()
+            # Directories that disappeared since the last scan
+            with db.connection() as conn:
+                for dir_path in set(known_mtimes) - seen_dirs:
+                    conn.execute("DELETE FROM library_files WHERE dir = ?", (dir_path,))
+                    conn.execute("DELETE FROM library_dirs WHERE path = ?", (dir_path,))
+
+            rows = db.query("SELECT size FROM library_files WHERE root = ?", (library_root,)) or []
+            with self.lock:
+                self._sizes[library_root] = Counter(row["size"] for row in rows)
+                self._snapshots.pop(library_root, None)
+                self._last_scan[library_root] = time.time()
+                self._scan_done.notify_all()
+                self._stats["scans"] += 1
+                self._stats["dirs_listed"] += listed
+                self._stats["dirs_skipped"] += skipped
+            logger.info(f"LibraryIndex: Rescanned {library_root} ({listed} directories listed, {skipped} unchanged).")
+
+    def wait_for_scan(self, library_root: str, timeout: float = None) -> bool:
+        """Blocks until library_root has been scanned at least once; False on timeout."""
+        library_root = os.path.abspath(library_root)
+        with self._scan_done:
+            return self._scan_done.wait_for(lambda: library_root in self._last_scan, timeout=timeout)
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """Blocks until no background rescan is running; False on timeout."""
+        with self._scan_done:
+            return self._scan_done.wait_for(lambda: not self._scanning, timeout=timeout)
+
+    def _root_for(self, path: str) -> Optional[str]:
+        with self.lock:
+            roots = list(self._sizes.keys())
+        for root in roots:
+            if path == root or path.startswith(root + os.sep):
+                return root
+        return None
+
+    def record_file(self, path: str):
+        """Adds or refreshes a file written by the transfer pipeline."""
+        path = os.path.abspath(path)
+        root = self._root_for(path)
+        if root is None:
+            return
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        db = Database()
+        old = db.query("SELECT size FROM library_files WHERE path = ?", (path,), one=True)
+        db.execute(
+            "INSERT OR REPLACE INTO library_files (path, root, dir, size) VALUES (?, ?, ?, ?)",
+            (path, root, os.path.dirname(path), size)
+        )
+        with self.lock:
+            sizes = self._sizes.setdefault(root, Counter())
+            if old:
+                sizes[old["size"]] -= 1
+                if sizes[old["size"]] <= 0:
+                    del sizes[old["size"]]
+            sizes[size] += 1
+            self._snapshots.pop(root, None)
+
+    def remove_path(self, path: str):
+        """Forgets a deleted file, or every file under a deleted directory."""
+        path = os.path.abspath(path)
+        root = self._root_for(path)
+        if root is None:
+            return
+        db = Database()
+        prefix = path.rstrip(os.sep) + os.sep
+        rows = db.query(
+            "SELECT size FROM library_files WHERE path = ? OR substr(path, 1, ?) = ?",
+            (path, len(prefix), prefix)
+        ) or []
+        if not rows:
+            return
+        db.execute(
+            "DELETE FROM library_files WHERE path = ? OR substr(path, 1, ?) = ?",
+            (path, len(prefix), prefix)
+        )
+        with self.lock:
+            sizes = self._sizes.get(root)
+            if sizes is not None:
+                for row in rows:
+                    sizes[row["size"]] -= 1
+                    if sizes[row["size"]] <= 0:
+                        del sizes[row["size"]]
+            self._snapshots.pop(root, None)
+
+    def reset(self):
+        """Drops in-memory state, e.g. after the database has been swapped out."""
+        with self.lock:
+            self._sizes.clear()
+            self._snapshots.clear()
+            self._last_scan.clear()
+
+    def stats(self) -> dict:
+        with self.lock:
+            stats = dict(self._stats)
+            stats["roots"] = {root: sum(sizes.values()) for root, sizes in self._sizes.items()}
+        return stats
+
+# Global singleton library index (incremental rescan at most once a minute)
+global_library_index = LibraryIndex(rescan_interval=60.0)
@@ -0,0 +1,142 @@
+import logging
+import threading
+from typing import Dict, Optional
+from ..database import Database
+
+logger = logging.getLogger(__name__)
+
+# Columns of the downloads table that monitor tasks update while a transfer is running
+PROGRESS_FIELDS = ("status", "progress", "speed", "size")
+
+
+class ProgressBuffer:
+    """
+    Write-behind buffer for live download progress. Monitor tasks record the
+    latest status/progress/speed/size per downloads.id in memory, and a
+    background flusher persists all pending rows in a single transaction
+    every flush_interval seconds. Terminal states are flushed immediately.
+    """
+
+    def __init__(self, flush_interval: float = 5.0):
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        # maps downloads.id -> {field: value} of values not yet written to SQLite
+        self._pending: Dict[int, dict] = {}
+        # rows taken by an in-progress flush, still served to readers until committed
+        self._flushing: Dict[int, dict] = {}
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stop_event = None
+        self._stats = {
+            "updates": 0,
+            "flushes": 0,
+            "rows_written": 0
+        }
+
+    def _ensure_flusher_under_lock(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stop_event,),
+                                            name="progress-buffer-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self, stop_event: threading.Event):
+        while not stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"ProgressBuffer: Background flush failed: {e}")
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Stops the background flusher without flushing, e.g. before the database
+        is swapped out. The next update() starts it again.
+        """
+        with self.lock:
+            thread, stop_event = self._thread, self._stop_event
+            self._thread = self._stop_event = None
+        if thread is not None:
+            stop_event.set()
+            thread.join(timeout)
+
+    def update(self, download_id: int, flush: bool = False, **fields):
+        """Records the latest values for a download. Pass flush=True for terminal states."""
+        values = {k: v for k, v in fields.items() if k in PROGRESS_FIELDS}
+        if not download_id or not values:
+            return
+        with self.lock:
+            self._pending.setdefault(download_id, {}).update(values)
+            self._stats["updates"] += 1
+            self._ensure_flusher_under_lock()
+        if flush:
+            self.flush()
+
+    def get(self, download_id: int) -> Optional[dict]:
+        """Returns buffered values for a download that have not reached the database yet."""
+        with self.lock:
+            merged = {}
+            merged.update(self._flushing.get(download_id, {}))
+            merged.update(self._pending.get(download_id, {}))
+            return merged or None
+
+    def overlay(self, download: dict) -> dict:
+        """Overlays fresher buffered values onto a download dict built from a database row."""
+        pending = self.get(download.get("id"))
+        if pending:
+            download.update(pending)
+        return download
+
+    def discard(self, download_id: int):
+        """Drops buffered values for a download, e.g. after its row has been deleted."""
+        with self.lock:
+            self._pending.pop(download_id, None)
+
+    def flush(self) -> int:
+        """Writes every pending row in one transaction. Returns the number of rows written."""
+        with self._flush_lock:
+            with self.lock:
+                if not self._pending:
+                    return 0
+                self._flushing = self._pending
+                self._pending = {}
+                batch = self._flushing
+
+            rows = [
+                (values.get("status"), values.get("progress"), values.get("speed"), values.get("size"), download_id)
+                for download_id, values in batch.items()
+            ]
+            try:
+                db = Database()
+                with db.connection() as conn:
+                    conn.executemany(
+                        """UPDATE downloads SET
+                           status = COALESCE(?, status), progress = COALESCE(?, progress),
+                           speed = COALESCE(?, speed), size = COALESCE(?, size)
+                           WHERE id = ?""",
+                        rows
+                    )
+            except Exception as e:
+                logger.error(f"ProgressBuffer: Failed to flush {len(rows)} rows: {e}")
+                with self.lock:
+                    # Put the batch back underneath any newer values recorded meanwhile
+                    for download_id, values in batch.items():
+                        newer = self._pending.get(download_id, {})
+                        self._pending[download_id] = {**values, **newer}
+                    self._flushing = {}
+                return 0
+
+            with self.lock:
+                self._flushing = {}
+                self._stats["flushes"] += 1
+                self._stats["rows_written"] += len(rows)
+            return len(rows)
+
+    def stats(self) -> dict:
+        with self.lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._pending)
+        stats["flush_interval"] = self.flush_interval
+        return stats
+
+# Global singleton progress buffer (flushes every 5 seconds)
+global_progress_buffer = ProgressBuffer(flush_interval=5.0)
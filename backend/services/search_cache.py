@@ -1,69 +1,351 @@
+import os
 import time
+import atexit
 import re
+import heapq
+import itertools
+import logging
 import threading
-from typing import List, Dict, Tuple, Optional
+from collections import OrderedDict
+from typing import List, Dict, Set, FrozenSet, Tuple, Optional
 from ..models.result import AggregatedResult
+from .search_cache_store import SearchCacheStore
+
+logger = logging.getLogger(__name__)
+
+CardKey = Tuple[str, Optional[int], bool]
+QueryKey = Tuple[str, Optional[str]]
+
+_SEPARATORS = re.compile(r'[\.\-\_\+\[\]\(\)\:\,]')
+
+# Title words are indexed by every substring up to this length; longer query
+# words are looked up through the intersection of their n-grams of this length.
+GRAM_SIZE = 3
+
+def _tokenize(text: str) -> List[str]:
+    return _SEPARATORS.sub(' ', text.lower()).split()
+
+def _word_grams(word: str) -> Set[str]:
+    """All substrings of a word with length 1..GRAM_SIZE."""
+    grams = set()
+    for n in range(1, min(GRAM_SIZE, len(word)) + 1):
+        for i in range(len(word) - n + 1):
+            grams.add(word[i:i + n])
+    return grams
+
+def _query_grams(word: str) -> Set[str]:
+    """Grams that every title word containing this query word must also contain."""
+    if len(word) <= GRAM_SIZE:
+        return {word}
+    return {word[i:i + GRAM_SIZE] for i in range(len(word) - GRAM_SIZE + 1)}
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+def _estimate_card_bytes(card: AggregatedResult) -> int:
+    """Rough in-memory footprint of a card and its downloads (including their cached serialized form), for the byte budget."""
+    size = 800 + len(card.clean_title) + len(card.poster_url or "")
+    for d in card.downloads:
+        size += 1100 + len(d.title or "") + len(d.download_url or "") + len(d.guid or "") + len(d.indexer or "")
+    return size
+
+def _estimate_query_bytes(query_key: QueryKey, results: List[AggregatedResult]) -> int:
+    # Query entries only hold references to cards, which are budgeted separately
+    return 200 + len(query_key[0]) + 8 * len(results)
 
 class SearchCache:
-    def __init__(self, ttl_seconds: int = 600):
+    """
+    In-memory cache of Prowlarr searches: whole result lists by query, plus the
+    individual cards for sub-query matching. Entries turn stale after ttl_seconds
+    (still served, but the caller should refresh them in the background) and
+    expire after hard_ttl_seconds through a min-heap. They are evicted
+    least-recently-used once max_entries or the approximate max_bytes budget
+    is exceeded. With a persistent store, entries are also written to SQLite
+    in the background and reloaded on the first lookup after a restart.
+    """
+
+    def __init__(self, ttl_seconds: int = 600, hard_ttl_seconds: int = None,
+                 max_entries: int = None, max_bytes: int = None,
+                 persistent: SearchCacheStore = None):
         self.ttl = ttl_seconds
+        if hard_ttl_seconds is None:
+            hard_ttl_seconds = _env_int("SEARCH_CACHE_HARD_TTL", 3600)
+        self.hard_ttl = max(ttl_seconds, hard_ttl_seconds)
+        self.max_entries = max_entries if max_entries is not None else _env_int("SEARCH_CACHE_MAX_ENTRIES", 5000)
+        self.max_bytes = max_bytes if max_bytes is not None else _env_int("SEARCH_CACHE_MAX_BYTES", 64 * 1024 * 1024)
         self.lock = threading.Lock()
-        # maps (query_string, category) -> (List[AggregatedResult], expiry_time)
-        self._query_cache: Dict[Tuple[str, Optional[str]], Tuple[List[AggregatedResult], float]] = {}
-        # maps (clean_title_lower, year, is_tv) -> (AggregatedResult, expiry_time)
-        self._cards_cache: Dict[Tuple[str, Optional[int], bool], Tuple[AggregatedResult, float]] = {}
+        self.persistent = persistent
+        self._persistent_loaded = persistent is None
+        self._load_lock = threading.Lock()
+        # maps (query_string, category) -> (List[AggregatedResult], expiry_time, stale_time)
+        self._query_cache: Dict[QueryKey, Tuple[List[AggregatedResult], float, float]] = {}
+        # maps (clean_title_lower, year, is_tv) -> (AggregatedResult, expiry_time, stale_time)
+        self._cards_cache: Dict[CardKey, Tuple[AggregatedResult, float, float]] = {}
+        # inverted index: title gram -> keys of cached cards with a title word containing it
+        self._gram_index: Dict[str, Set[CardKey]] = {}
+        # maps card key -> grams it is indexed under, for removal
+        self._card_grams: Dict[CardKey, FrozenSet[str]] = {}
+        # (expiry_time, seq, kind, key); entries refreshed since being pushed are skipped lazily
+        self._expiry_heap: List[tuple] = []
+        self._seq = itertools.count()
+        # maps ("query" | "card", key) -> estimated bytes, least recently used first
+        self._lru: OrderedDict = OrderedDict()
+        self._bytes = 0
+        # query keys with a background refresh in progress
+        self._refreshing: Set[QueryKey] = set()
+        self._stats = {
+            "query_hits": 0,
+            "card_hits": 0,
+            "stale_hits": 0,
+            "refreshes": 0,
+            "misses": 0,
+            "expirations": 0,
+            "evictions": 0
+        }
+
+    def _store(self, kind: str) -> dict:
+        return self._query_cache if kind == "query" else self._cards_cache
+
+    def _put_under_lock(self, kind: str, key, value, expiry: float, stale_at: float, size: int):
+        self._store(kind)[key] = (value, expiry, stale_at)
+        heapq.heappush(self._expiry_heap, (expiry, next(self._seq), kind, key))
+        lru_key = (kind, key)
+        self._bytes += size - self._lru.get(lru_key, 0)
+        self._lru[lru_key] = size
+        self._lru.move_to_end(lru_key)
+        if kind == "card":
+            self._index_card_under_lock(key)
+
+    def _remove_under_lock(self, kind: str, key):
+        self._store(kind).pop(key, None)
+        self._bytes -= self._lru.pop((kind, key), 0)
+        if kind == "card":
+            self._unindex_card_under_lock(key)
+
+    def _touch_under_lock(self, kind: str, key):
+        lru_key = (kind, key)
+        if lru_key in self._lru:
+            self._lru.move_to_end(lru_key)
+
+    def _evict_under_lock(self):
+        while self._lru and (len(self._lru) > self.max_entries or self._bytes > self.max_bytes):
+            (kind, key), _ = next(iter(self._lru.items()))
+            self._remove_under_lock(kind, key)
+            self._stats["evictions"] += 1
+
+    def _index_card_under_lock(self, card_key: CardKey):
+        if card_key in self._card_grams:
+            return
+        grams = set()
+        for word in _tokenize(card_key[0]):
+            grams |= _word_grams(word)
+        self._card_grams[card_key] = frozenset(grams)
+        for gram in grams:
+            self._gram_index.setdefault(gram, set()).add(card_key)
+
+    def _unindex_card_under_lock(self, card_key: CardKey):
+        for gram in self._card_grams.pop(card_key, ()):
+            keys = self._gram_index.get(gram)
+            if keys is not None:
+                keys.discard(card_key)
+                if not keys:
+                    del self._gram_index[gram]
 
     def _clean_expired_under_lock(self):
         now = time.time()
-        self._query_cache = {k: v for k, v in self._query_cache.items() if v[1] > now}
-        self._cards_cache = {k: v for k, v in self._cards_cache.items() if v[1] > now}
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expiry, _, kind, key = heapq.heappop(heap)
+            entry = self._store(kind).get(key)
+            # Skip heap entries superseded by a later set() of the same key
+            if entry is not None and entry[1] == expiry:
+                self._remove_under_lock(kind, key)
+                self._stats["expirations"] += 1
+        # Re-set keys leave superseded heap entries behind; compact once they dominate
+        if len(heap) > 2 * len(self._lru) + 64:
+            self._expiry_heap = [
+                item for item in heap
+                if (self._store(item[2]).get(item[3]) or (None, None))[1] == item[0]
+            ]
+            heapq.heapify(self._expiry_heap)
+
+    def _ensure_loaded(self):
+        """Loads the persisted entries once, on first use after startup."""
+        if self._persistent_loaded:
+            return
+        with self._load_lock:
+            if self._persistent_loaded:
+                return
+            try:
+                entries = self.persistent.load(self.max_entries)
+            except Exception as e:
+                logger.error(f"SearchCache: Failed to load persisted searches: {e}")
+                entries = []
+            with self.lock:
+                for query, category, results, expiry, stale_at in entries:
+                    self._set_under_lock(query, category, results, expiry, stale_at)
+                self._evict_under_lock()
+            self._persistent_loaded = True
+            if entries:
+                logger.info(f"SearchCache: Restored {len(entries)} cached searches from disk.")
 
     def get_by_query(self, query: str, category: Optional[str]) -> Optional[List[AggregatedResult]]:
+        return self.lookup_query(query, category)[0]
+
+    def lookup_query(self, query: str, category: Optional[str]) -> Tuple[Optional[List[AggregatedResult]], bool]:
+        """Returns (results or None, stale). Stale results are past the soft TTL and due a refresh."""
+        self._ensure_loaded()
         with self.lock:
             self._clean_expired_under_lock()
             key = (query.lower().strip(), category)
-            if key in self._query_cache:
-                return self._query_cache[key][0]
-            return None
+            entry = self._query_cache.get(key)
+            if entry is None:
+                return None, False
+            results, _, stale_at = entry
+            # A hot query keeps its cards hot too
+            for card in results:
+                self._touch_under_lock("card", (card.clean_title.lower(), card.year, card.is_tv))
+            self._touch_under_lock("query", key)
+            self._stats["query_hits"] += 1
+            stale = stale_at <= time.time()
+            if stale:
+                self._stats["stale_hits"] += 1
+            return results, stale
+
+    def _candidates_under_lock(self, q_words: List[str]) -> Set[CardKey]:
+        """Card keys whose grams cover every query word; a superset of the true matches."""
+        postings = []
+        for gram in set().union(*(_query_grams(qw) for qw in q_words)):
+            keys = self._gram_index.get(gram)
+            if not keys:
+                return set()
+            postings.append(keys)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for keys in postings[1:]:
+            candidates &= keys
+            if not candidates:
+                break
+        return candidates
 
     def get_by_matching_cards(self, query: str, category: Optional[str]) -> List[AggregatedResult]:
+        return self.lookup_matching_cards(query, category)[0]
+
+    def lookup_matching_cards(self, query: str, category: Optional[str]) -> Tuple[List[AggregatedResult], bool]:
+        """Returns (matching cards, stale); stale if any matched card is past the soft TTL."""
+        self._ensure_loaded()
         with self.lock:
             self._clean_expired_under_lock()
-            q_words = re.sub(r'[\.\-\_\+\[\]\(\)\:\,]', ' ', query.lower()).split()
+            q_words = _tokenize(query)
             if not q_words:
-                return []
-            
+                return [], False
+
+            now = time.time()
+            stale = False
             matches = []
-            for (title_lower, year, is_tv), (card, expiry) in list(self._cards_cache.items()):
+            for card_key in self._candidates_under_lock(q_words):
+                entry = self._cards_cache.get(card_key)
+                if entry is None:
+                    continue
+                title_lower, year, is_tv = card_key
                 # Filter by category if specified
                 if category == "movie" and is_tv:
                     continue
                 if category == "tv" and not is_tv:
                     continue
-                
-                # Check keyword containment
-                t_words = re.sub(r'[\.\-\_\+\[\]\(\)\:\,]', ' ', title_lower).split()
+
+                # Check keyword containment (n-gram candidates can be false positives)
+                t_words = _tokenize(title_lower)
                 if all(any(qw in tw for tw in t_words) for qw in q_words):
-                    matches.append(card)
-                    
+                    matches.append(entry[0])
+                    stale = stale or entry[2] <= now
+                    self._touch_under_lock("card", card_key)
+
+            if matches:
+                self._stats["card_hits"] += 1
+                if stale:
+                    self._stats["stale_hits"] += 1
+            else:
+                self._stats["misses"] += 1
+
             # Sort matches by sum of seeders descending
-            matches.sort(key=lambda x: sum(d.seeders for d in x.downloads), reverse=True)
-            return matches
+            matches.sort(key=lambda x: x.total_seeders, reverse=True)
+            return matches, stale
+
+    def claim_refresh(self, query: str, category: Optional[str]) -> bool:
+        """Marks a stale query as being refreshed. Returns False if a refresh is already running."""
+        key = (query.lower().strip(), category)
+        with self.lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._stats["refreshes"] += 1
+            return True
+
+    def release_refresh(self, query: str, category: Optional[str]):
+        with self.lock:
+            self._refreshing.discard((query.lower().strip(), category))
 
     def set(self, query: str, category: Optional[str], results: List[AggregatedResult]):
+        self._ensure_loaded()
         with self.lock:
             self._clean_expired_under_lock()
             now = time.time()
-            expiry = now + self.ttl
-            
-            # Save query
-            query_key = (query.lower().strip(), category)
-            self._query_cache[query_key] = (results, expiry)
-            
-            # Save individual cards
-            for card in results:
-                card_key = (card.clean_title.lower(), card.year, card.is_tv)
-                self._cards_cache[card_key] = (card, expiry)
+            expiry = now + self.hard_ttl
+            stale_at = now + self.ttl
+            query_key = self._set_under_lock(query, category, results, expiry, stale_at)
+            self._evict_under_lock()
+        if self.persistent is not None:
+            self.persistent.save_async(query_key, results, expiry, stale_at)
+
+    def _set_under_lock(self, query: str, category: Optional[str], results: List[AggregatedResult],
+                        expiry: float, stale_at: float) -> QueryKey:
+        # Save individual cards
+        for card in results:
+            card_key = (card.clean_title.lower(), card.year, card.is_tv)
+            self._put_under_lock("card", card_key, card, expiry, stale_at, _estimate_card_bytes(card))
+
+        # Save query (most recently used, so it is evicted after its cards' older neighbours)
+        query_key = (query.lower().strip(), category)
+        self._put_under_lock("query", query_key, results, expiry, stale_at, _estimate_query_bytes(query_key, results))
+        return query_key
+
+    def clear(self):
+        """Empties the in-memory tier; persisted rows are left to expire."""
+        with self.lock:
+            self._query_cache.clear()
+            self._cards_cache.clear()
+            self._gram_index.clear()
+            self._card_grams.clear()
+            self._expiry_heap.clear()
+            self._lru.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self.lock:
+            stats = dict(self._stats)
+            stats["queries"] = len(self._query_cache)
+            stats["cards"] = len(self._cards_cache)
+            stats["bytes"] = self._bytes
+            stats["refreshing"] = len(self._refreshing)
+        lookups = stats["query_hits"] + stats["card_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["query_hits"] + stats["card_hits"]) / lookups, 4) if lookups else 0.0
+        stats["ttl"] = self.ttl
+        stats["hard_ttl"] = self.hard_ttl
+        stats["max_entries"] = self.max_entries
+        stats["max_bytes"] = self.max_bytes
+        if self.persistent is not None:
+            stats["persistent"] = self.persistent.stats()
+        return stats
 
-# Global singleton cache instance (default TTL: 10 minutes)
-global_search_cache = SearchCache(ttl_seconds=600)
+# Global singleton cache instance (fresh for 10 minutes, served stale while refreshing for up to an hour)
+global_search_cache = SearchCache(
+    ttl_seconds=600,
+    persistent=SearchCacheStore() if os.environ.get("SEARCH_CACHE_PERSIST", "False").lower() == "true" else None
+)
+if global_search_cache.persistent is not None:
+    # Searches still queued for the background writer are persisted before the process exits
+    atexit.register(global_search_cache.persistent.flush)
@@ -0,0 +1,143 @@
+import json
+import time
+import queue
+import logging
+import threading
+from typing import List, Optional, Tuple
+from ..database import Database
+from ..models.result import TorrentResult, AggregatedResult
+
+logger = logging.getLogger(__name__)
+
+def serialize_results(results: List[AggregatedResult]) -> str:
+    """Compact JSON of the cards and the raw release fields needed to rebuild them."""
+    return json.dumps([
+        {
+            "t": card.clean_title,
+            "y": card.year,
+            "tv": card.is_tv,
+            "p": card.poster_url,
+            "c": card.collapsed,
+            "d": [
+                [d.title, d.size, d.download_url, d.seeders, d.leechers, d.indexer, d.guid, d.info_hash, list(d.indexers)]
+                for d in card.downloads
+            ]
+        }
+        for card in results
+    ], separators=(",", ":"))
+
+def deserialize_results(payload: str) -> List[AggregatedResult]:
+    results = []
+    for item in json.loads(payload):
+        card = AggregatedResult(item["t"], item["y"], item["tv"])
+        card.poster_url = item.get("p")
+        card.collapsed = item.get("c", 0)
+        # Rows written before duplicates were merged have no indexer list
+        for download in item["d"]:
+            card.add_result(TorrentResult(*download))
+        results.append(card)
+    return results
+
+
+class SearchCacheStore:
+    """
+    SQLite tier behind SearchCache. Cached searches are queued and written by
+    a background thread, so set() never waits on disk; after a restart the
+    unexpired rows are loaded back in one pass on the first lookup.
+    """
+
+    # Expired rows are purged every N batches
+    PURGE_EVERY = 50
+
+    def __init__(self):
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self.lock = threading.Lock()
+        self._thread = None
+        self._stats = {
+            "queued": 0,
+            "written": 0,
+            "batches": 0,
+            "loaded": 0,
+            "errors": 0
+        }
+
+    def save_async(self, query_key: Tuple[str, Optional[str]], results: List[AggregatedResult],
+                   expires_at: float, stale_at: float):
+        with self.lock:
+            self._stats["queued"] += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="search-cache-writer", daemon=True)
+                self._thread.start()
+        self._queue.put((query_key, results, expires_at, stale_at))
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Coalesce everything already queued into one transaction
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                with self.lock:
+                    self._stats["errors"] += 1
+                logger.error(f"SearchCacheStore: Failed to persist {len(batch)} cached searches: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: List[tuple]):
+        # Later entries for the same query win
+        rows = {}
+        for (query, category), results, expires_at, stale_at in batch:
+            rows[(query, category or "")] = (query, category or "", serialize_results(results), stale_at, expires_at)
+
+        with Database().connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO search_cache (query, category, payload, stale_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                list(rows.values())
+            )
+            with self.lock:
+                self._stats["batches"] += 1
+                self._stats["written"] += len(rows)
+                purge = self._stats["batches"] % self.PURGE_EVERY == 0
+            if purge:
+                conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (time.time(),))
+
+    def load(self, limit: int) -> List[tuple]:
+        """Returns (query, category, results, expires_at, stale_at) for unexpired rows, soonest expiry first."""
+        rows = Database().query(
+            "SELECT query, category, payload, stale_at, expires_at FROM search_cache "
+            "WHERE expires_at > ? ORDER BY expires_at DESC LIMIT ?",
+            (time.time(), limit)
+        ) or []
+        entries = []
+        for row in reversed(rows):
+            try:
+                results = deserialize_results(row["payload"])
+            except Exception as e:
+                logger.error(f"SearchCacheStore: Skipping unreadable cached search '{row['query']}': {e}")
+                continue
+            entries.append((row["query"], row["category"] or None, results, row["expires_at"], row["stale_at"]))
+        with self.lock:
+            self._stats["loaded"] += len(entries)
+        return entries
+
+    def flush(self, timeout: float = 10.0):
+        """Blocks until queued writes have been persisted (used on shutdown and in tests)."""
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks and time.time() < deadline:
+            with self._queue.all_tasks_done:
+                self._queue.all_tasks_done.wait(timeout=0.1)
+
+    def clear(self):
+        Database().execute("DELETE FROM search_cache")
+
+    def stats(self) -> dict:
+        with self.lock:
+            stats = dict(self._stats)
+        stats["pending"] = self._queue.qsize()
+        return stats
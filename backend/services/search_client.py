@@ -1,17 +1,56 @@
 import os
-import requests
+import time
 import logging
-from typing import List
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, TimeoutError as FuturesTimeoutError
+from typing import Callable, List, Optional
 from ..models.result import TorrentResult, AggregatedResult
 from .search_cache import global_search_cache
+from .http_pool import PooledSession, prowlarr_http
+from .single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Identical searches in flight at the same time share one Prowlarr request
+prowlarr_flights = SingleFlight()
+
+# Background refreshes of stale cached searches
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="search-refresh")
+
+# Per-indexer requests of fan-out searches
+_fanout_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="indexer-search")
+_fanout_stats_lock = threading.Lock()
+_fanout_stats = {
+    "searches": 0,
+    "partial": 0,
+    "late_indexers": 0
+}
+
 class SearchClient:
-    def __init__(self, base_url: str = None, api_key: str = None):
+    # Seconds the list of enabled indexers is reused for fan-out searches
+    INDEXER_LIST_TTL = 300
+    # Read timeout of one Prowlarr search request
+    FETCH_TIMEOUT = 30
+
+    def __init__(self, base_url: str = None, api_key: str = None, http: PooledSession = None,
+                 fanout: bool = None, deadline: float = None):
         # Allow passing config directly, or fall back to env vars
         self.base_url = (base_url or os.environ.get("PROWLARR_URL", "http://localhost:9696")).rstrip("/")
         self.api_key = api_key or os.environ.get("PROWLARR_API_KEY", "")
+        self.http = http or prowlarr_http
+        # fanout: query each indexer separately and return what has arrived by the deadline
+        if fanout is None:
+            fanout = os.environ.get("PROWLARR_SEARCH_MODE", "single").lower() == "fanout"
+        self.fanout = fanout
+        if deadline is None:
+            try:
+                deadline = float(os.environ.get("PROWLARR_SEARCH_DEADLINE", "8"))
+            except ValueError:
+                deadline = 8.0
+        self.deadline = deadline
+        self._indexers = None
+        self._indexers_fetched_at = 0.0
+        self._indexers_lock = threading.Lock()
 
     def search(self, query: str, category: str = None) -> List[AggregatedResult]:
         """
@@ -23,30 +62,84 @@ class SearchClient:
             return []
 
         # 1. Check exact query cache hit
-        cached_results = global_search_cache.get_by_query(query, category)
+        cached_results, stale = global_search_cache.lookup_query(query, category)
         if cached_results is not None:
-            logger.info(f"Search cache HIT (exact) for query: '{query}' (category: {category})")
+            logger.info(f"Search cache HIT (exact{', stale' if stale else ''}) for query: '{query}' (category: {category})")
+            if stale:
+                self._refresh_in_background(query, category)
             return cached_results
 
         # 2. Check matching cards cache hit (sub-query/fuzzy matching)
-        matching_cards = global_search_cache.get_by_matching_cards(query, category)
+        matching_cards, stale = global_search_cache.lookup_matching_cards(query, category)
         if matching_cards:
-            logger.info(f"Search cache HIT (matching cards) for query: '{query}' (category: {category}) - Found {len(matching_cards)} cards.")
+            logger.info(f"Search cache HIT (matching cards{', stale' if stale else ''}) for query: '{query}' (category: {category}) - Found {len(matching_cards)} cards.")
+            if stale:
+                self._refresh_in_background(query, category)
             return matching_cards
 
         if not self.api_key:
             logger.warning("SearchClient: Prowlarr API Key is not configured. Returning empty list.")
             return []
 
-        url = f"{self.base_url}/api/v1/search"
-        headers = {
-            "X-Api-Key": self.api_key,
-            "Accept": "application/json"
-        }
+        flight_key = (query.lower().strip(), category)
+        try:
+            aggregated, shared = prowlarr_flights.do(flight_key, lambda: self._search_prowlarr(query, category), timeout=60)
+        except FuturesTimeoutError:
+            logger.error(f"SearchClient: Timed out waiting for in-flight Prowlarr search for query: '{query}'")
+            return []
+        if shared:
+            logger.info(f"Search coalesced with an in-flight Prowlarr request for query: '{query}' (category: {category})")
+        return aggregated
+
+    def search_stream(self, query: str, category: str = None,
+                      on_results: Callable[[dict, List[TorrentResult]], None] = None) -> List[AggregatedResult]:
+        """
+        Like search(), but in fan-out mode on_results is called with
+        (indexer, results) as each indexer answers and the search waits for
+        every indexer instead of stopping at the deadline. Cache hits and
+        single-request searches return without calling on_results.
+        """
+        if not query or not query.strip():
+            return []
+        if not self.fanout or not self.api_key:
+            return self.search(query, category)
+
+        cached_results, stale = global_search_cache.lookup_query(query, category)
+        if cached_results is None:
+            cached_results, stale = global_search_cache.lookup_matching_cards(query, category)
+        if cached_results:
+            logger.info(f"Search cache HIT{' (stale)' if stale else ''} for streamed query: '{query}' (category: {category})")
+            if stale:
+                self._refresh_in_background(query, category)
+            return cached_results
+
+        indexers = self.get_indexers()
+        if not indexers:
+            return self.search(query, category)
+        # Partial results are already on the client, so there is no deadline to meet
+        return self._search_fanout(query, category, indexers, on_results=on_results, wait_all=True)
+
+    def _refresh_in_background(self, query: str, category: str = None):
+        """Re-runs a stale search off the request path; at most one refresh per query at a time."""
+        if not self.api_key or not global_search_cache.claim_refresh(query, category):
+            return
+
+        def refresh():
+            try:
+                # Nobody is waiting on a refresh, so it never replaces the stale set with a partial one
+                prowlarr_flights.do((query.lower().strip(), category), lambda: self._search_prowlarr(query, category, wait_all=True))
+            except Exception as e:
+                logger.error(f"SearchClient: Background refresh failed for query '{query}': {e}")
+            finally:
+                global_search_cache.release_refresh(query, category)
+
+        _refresh_executor.submit(refresh)
+
+    def _search_params(self, query: str, category: str = None) -> dict:
         params = {
             "query": query
         }
-        
+
         # Prowlarr categories: Movies = 2000, TV = 5000
         if category == "movie":
             params["categories"] = "2000"
@@ -54,23 +147,36 @@ class SearchClient:
             params["categories"] = "5000"
         else:
             params["categories"] = ["2000", "5000"]
+        return params
+
+    def _headers(self) -> dict:
+        return {
+            "X-Api-Key": self.api_key,
+            "Accept": "application/json"
+        }
+
+    def _fetch_results(self, params: dict, timeout: float = None) -> List[TorrentResult]:
+        """Runs one /api/v1/search request and converts the raw results to TorrentResult models."""
+        resp = self.http.get(f"{self.base_url}/api/v1/search", headers=self._headers(), params=params,
+                             timeout=timeout or self.FETCH_TIMEOUT)
+        resp.raise_for_status()
+        return [TorrentResult.from_prowlarr(item) for item in resp.json()]
+
+    def _search_prowlarr(self, query: str, category: str = None, wait_all: bool = False) -> List[AggregatedResult]:
+        if self.fanout:
+            indexers = self.get_indexers()
+            if indexers:
+                return self._search_fanout(query, category, indexers, wait_all=wait_all)
+            logger.warning("SearchClient: No indexers listed by Prowlarr; falling back to a single search request.")
 
         try:
             logger.info(f"Searching Prowlarr for query: '{query}' (category: {category})")
-            resp = requests.get(url, headers=headers, params=params, timeout=30)
-            resp.raise_for_status()
-            results_data = resp.json()
-            
-            # Convert raw results to TorrentResult models
-            torrent_results = []
-            for item in results_data:
-                torrent_results.append(TorrentResult.from_prowlarr(item))
-                
+            torrent_results = self._fetch_results(self._search_params(query, category))
             logger.info(f"Prowlarr returned {len(torrent_results)} raw torrent results.")
             
             # Aggregate the results by title, year, and category
             aggregated = AggregatedResult.aggregate(torrent_results)
-            logger.info(f"Aggregated into {len(aggregated)} media cards.")
+            logger.info(f"Aggregated into {len(aggregated)} media cards ({sum(card.collapsed for card in aggregated)} duplicate releases collapsed).")
             
             # Cache the query and the individual cards
             global_search_cache.set(query, category, aggregated)
@@ -79,3 +185,121 @@ class SearchClient:
         except Exception as e:
             logger.error(f"SearchClient: Prowlarr search failed: {e}")
             return []
+
+    def get_indexers(self) -> List[dict]:
+        """Returns the enabled Prowlarr indexers, cached for INDEXER_LIST_TTL seconds."""
+        now = time.time()
+        with self._indexers_lock:
+            if self._indexers is not None and now - self._indexers_fetched_at < self.INDEXER_LIST_TTL:
+                return self._indexers
+        try:
+            resp = self.http.get(f"{self.base_url}/api/v1/indexer", headers=self._headers(), timeout=10)
+            resp.raise_for_status()
+            indexers = [
+                {"id": ix.get("id"), "name": ix.get("name", "")}
+                for ix in resp.json()
+                if ix.get("enable", True) and ix.get("id") is not None
+            ]
+        except Exception as e:
+            logger.error(f"SearchClient: Failed to list Prowlarr indexers: {e}")
+            return []
+        with self._indexers_lock:
+            self._indexers = indexers
+            self._indexers_fetched_at = now
+        return indexers
+
+    def _search_fanout(self, query: str, category: str, indexers: List[dict],
+                       on_results: Callable[[dict, List[TorrentResult]], None] = None,
+                       wait_all: bool = False) -> List[AggregatedResult]:
+        """
+        Queries every indexer concurrently and returns what has arrived by the
+        deadline, or once every indexer has answered when wait_all is set
+        (bounded by the request timeout). Indexers that answer later are merged
+        into the cache once the last one finishes. on_results is called with
+        (indexer, results) as each indexer answers before the search returns.
+        Nothing is cached when every indexer failed, like a failed single search.
+        """
+        base_params = self._search_params(query, category)
+        lock = threading.Lock()
+        collected: List[TorrentResult] = []
+        # cached: number of results behind the last cache write, so a smaller set never replaces a larger one
+        state = {"remaining": len(indexers), "answered": 0, "returned": False, "cached": -1}
+        all_done = threading.Event()
+
+        def cache_if_most_complete(results: List[TorrentResult], aggregated: List[AggregatedResult]) -> bool:
+            with lock:
+                if not state["answered"] or len(results) <= state["cached"]:
+                    return False
+                state["cached"] = len(results)
+                global_search_cache.set(query, category, aggregated)
+                return True
+
+        def search_indexer(indexer: dict) -> Optional[List[TorrentResult]]:
+            """Returns the indexer's results, or None if the request failed."""
+            params = dict(base_params, indexerIds=[indexer["id"]])
+            try:
+                return self._fetch_results(params)
+            except Exception as e:
+                logger.warning(f"SearchClient: Indexer '{indexer['name']}' failed for query '{query}': {e}")
+                return None
+
+        def on_done(indexer: dict, future):
+            results = future.result()
+            with lock:
+                if results is None:
+                    results = []
+                else:
+                    state["answered"] += 1
+                collected.extend(results)
+                state["remaining"] -= 1
+                finished = state["remaining"] == 0
+                late = state["returned"]
+                snapshot = list(collected) if finished and late else None
+            if on_results is not None and results and not late:
+                try:
+                    on_results(indexer, results)
+                except Exception as e:
+                    logger.error(f"SearchClient: Result callback failed: {e}")
+            if snapshot is not None:
+                # The caller already got partial results; cache the complete set now
+                if cache_if_most_complete(snapshot, AggregatedResult.aggregate(snapshot)):
+                    logger.info(f"SearchClient: Late indexers finished for '{query}'; cached {len(snapshot)} results.")
+            if finished:
+                all_done.set()
+
+        logger.info(f"Searching {len(indexers)} Prowlarr indexers in parallel for query: '{query}' (category: {category})")
+        futures = []
+        for indexer in indexers:
+            future = _fanout_executor.submit(search_indexer, indexer)
+            future.add_done_callback(lambda f, ix=indexer: on_done(ix, f))
+            futures.append(future)
+
+        if wait_all:
+            # Waits for the callbacks too; indexers still running past the request timeout count as late
+            all_done.wait(timeout=self.FETCH_TIMEOUT + 5)
+        else:
+            wait(futures, timeout=self.deadline)
+        with lock:
+            # Callbacks can lag behind wait(); anything they have not merged yet counts as late
+            state["returned"] = state["remaining"] > 0
+            torrent_results = list(collected)
+            late_count = state["remaining"]
+
+        aggregated = AggregatedResult.aggregate(torrent_results)
+        if late_count:
+            logger.info(f"SearchClient: Deadline of {self.deadline}s reached for '{query}' with {late_count}/{len(indexers)} indexers pending; returning {len(torrent_results)} results.")
+        with _fanout_stats_lock:
+            _fanout_stats["searches"] += 1
+            if late_count:
+                _fanout_stats["partial"] += 1
+                _fanout_stats["late_indexers"] += late_count
+
+        # With wait_all the indexers were given their full timeout, so a late set is left to the last one
+        if not late_count or (torrent_results and not wait_all):
+            cache_if_most_complete(torrent_results, aggregated)
+        return aggregated
+
+
+def fanout_stats() -> dict:
+    with _fanout_stats_lock:
+        return dict(_fanout_stats)
@@ -0,0 +1,60 @@
+import logging
+import threading
+from typing import Callable, Dict, Optional
+from ..database import Database
+
+logger = logging.getLogger(__name__)
+
+class SettingsCache:
+    """
+    In-process copy of the server_settings table. Readers get the cached dict
+    until a write goes through invalidate(), which also bumps the version
+    counter so long-running tasks can tell cheaply whether to re-read. The
+    cache is also dropped when the Database singleton is replaced.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._settings: Optional[Dict[str, str]] = None
+        self._db = None
+        self.version = 0
+        self._stats = {
+            "hits": 0,
+            "loads": 0,
+            "invalidations": 0
+        }
+
+    def get(self, loader: Callable[[], Dict[str, str]]) -> Dict[str, str]:
+        """Returns a copy of the cached settings, calling loader() to (re)build them on a miss."""
+        db = Database()
+        with self.lock:
+            if self._settings is not None and self._db is db:
+                self._stats["hits"] += 1
+                return dict(self._settings)
+            version = self.version
+
+        settings = loader()
+        with self.lock:
+            # An invalidation that raced with the load wins; the next reader reloads
+            if self.version == version:
+                self._settings = dict(settings)
+                self._db = db
+            self._stats["loads"] += 1
+        return dict(settings)
+
+    def invalidate(self):
+        with self.lock:
+            self._settings = None
+            self._db = None
+            self.version += 1
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            stats = dict(self._stats)
+            stats["version"] = self.version
+            stats["cached"] = self._settings is not None
+        return stats
+
+# Global singleton settings cache
+global_settings_cache = SettingsCache()
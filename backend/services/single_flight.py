@@ -0,0 +1,55 @@
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs the
+    function, and callers arriving while it is in flight wait for the same
+    result instead of repeating the work.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # maps key -> Future of the call currently in flight
+        self._calls: Dict[Hashable, Future] = {}
+        self._stats = {
+            "calls": 0,
+            "coalesced": 0
+        }
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: float = None) -> Tuple[Any, bool]:
+        """Returns (result, shared); shared is True when another caller did the work."""
+        with self.lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self._stats["calls"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            return future.result(timeout=timeout), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self.lock:
+                self._calls.pop(key, None)
+
+    def stats(self) -> dict:
+        with self.lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        return stats
@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Optional, Tuple
+from ..database import Database
+
+logger = logging.getLogger(__name__)
+
+def _env_seconds(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+class TmdbCache:
+    """
+    SQLite-backed cache for TMDb lookups keyed by (endpoint, normalized query, year).
+    Successful lookups live for ttl seconds; lookups that TMDb answered with no
+    match are cached as misses for negative_ttl seconds. Transport errors are
+    never cached.
+    """
+
+    # Expired rows are purged every N stores
+    PURGE_EVERY = 200
+
+    def __init__(self, ttl: int = None, negative_ttl: int = None):
+        self.ttl = ttl if ttl is not None else _env_seconds("TMDB_CACHE_TTL", 7 * 24 * 3600)
+        self.negative_ttl = negative_ttl if negative_ttl is not None else _env_seconds("TMDB_CACHE_NEGATIVE_TTL", 12 * 3600)
+        self.lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "stores": 0
+        }
+
+    @staticmethod
+    def make_key(endpoint: str, query: Any, year: Any = None) -> str:
+        normalized = ' '.join(str(query or "").lower().split())
+        year_part = str(int(year)) if year not in (None, "") and str(year).isdigit() else ""
+        return f"{endpoint}|{normalized}|{year_part}"
+
+    def get(self, endpoint: str, query: Any, year: Any = None) -> Tuple[bool, Optional[Any]]:
+        """Returns (hit, value). A hit with a None/empty value is a cached miss."""
+        key = self.make_key(endpoint, query, year)
+        try:
+            row = Database().query(
+                "SELECT payload FROM tmdb_cache WHERE cache_key = ? AND expires_at > ?",
+                (key, time.time()),
+                one=True
+            )
+        except Exception as e:
+            logger.error(f"TmdbCache: Lookup failed for {key}: {e}")
+            row = None
+
+        if row is None:
+            with self.lock:
+                self._stats["misses"] += 1
+            return False, None
+
+        value = json.loads(row["payload"]) if row["payload"] else None
+        with self.lock:
+            if value:
+                self._stats["hits"] += 1
+            else:
+                self._stats["negative_hits"] += 1
+        return True, value
+
+    def set(self, endpoint: str, query: Any, year: Any, value: Any):
+        key = self.make_key(endpoint, query, year)
+        ttl = self.ttl if value else self.negative_ttl
+        if ttl <= 0:
+            return
+        db = Database()
+        db.execute(
+            "INSERT OR REPLACE INTO tmdb_cache (cache_key, endpoint, payload, expires_at) VALUES (?, ?, ?, ?)",
+            (key, endpoint, json.dumps(value), time.time() + ttl)
+        )
+        with self.lock:
+            self._stats["stores"] += 1
+            purge = self._stats["stores"] % self.PURGE_EVERY == 0
+        if purge:
+            db.execute("DELETE FROM tmdb_cache WHERE expires_at <= ?", (time.time(),))
+
+    def stats(self) -> dict:
+        with self.lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["negative_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["negative_hits"]) / lookups, 4) if lookups else 0.0
+        stats["ttl"] = self.ttl
+        stats["negative_ttl"] = self.negative_ttl
+        return stats
+
+# Global singleton TMDb cache shared by all TmdbClient instances
+global_tmdb_cache = TmdbCache()
@@ -1,22 +1,66 @@
 import os
 import re
-import requests
+import time
 import logging
-from typing import Optional, List
+import threading
+from collections import OrderedDict
+from typing import Optional, List, Dict
+from .tmdb_cache import TmdbCache, global_tmdb_cache
+from .http_pool import PooledSession, tmdb_http
 
 logger = logging.getLogger(__name__)
 
 class TmdbClient:
-    def __init__(self, api_key: str = None):
+    # Maximum number of per-show season lists / season episode maps memoized on a client
+    MEMO_SIZE = 256
+    # Clients are long-lived (see ClientRegistry), so memoized entries expire and fall back to the cache
+    MEMO_TTL = 3600
+
+    def __init__(self, api_key: str = None, cache: TmdbCache = None, http: PooledSession = None):
         self.api_key = api_key or os.environ.get("TMDB_API_KEY", "")
         self.base_url = "https://api.themoviedb.org/3"
+        self.cache = cache or global_tmdb_cache
+        self.http = http or tmdb_http
+        self._memo = OrderedDict()
+        self._memo_lock = threading.Lock()
+
+    def _memo_get(self, key: tuple):
+        with self._memo_lock:
+            entry = self._memo.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._memo[key]
+                return None
+            self._memo.move_to_end(key)
+            return value
+
+    def _memo_set(self, key: tuple, value):
+        with self._memo_lock:
+            self._memo[key] = (time.time() + self.MEMO_TTL, value)
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.MEMO_SIZE:
+                self._memo.popitem(last=False)
 
     def search_movie(self, query: str, year: int = None) -> Optional[dict]:
         """Searches for a movie on TMDB and returns title, year, and TMDB ID."""
         if not self.api_key:
             logger.warning("TMDB API Key not configured. Skipping movie search.")
             return None
-            
+
+        hit, cached = self.cache.get("search_movie", query, year)
+        if hit:
+            return cached
+        try:
+            result = self._search_movie(query, year)
+        except Exception as e:
+            logger.error(f"TMDB search_movie failed: {e}")
+            return None
+        self.cache.set("search_movie", query, year, result)
+        return result
+
+    def _search_movie(self, query: str, year: int = None) -> Optional[dict]:
         url = f"{self.base_url}/search/movie"
         params = {
             "api_key": self.api_key,
@@ -24,59 +68,31 @@ class TmdbClient:
         }
         if year:
             params["year"] = int(year)
-            
-        try:
-            resp = requests.get(url, params=params, timeout=10)
+
+        resp = self.http.get(url, params=params, timeout=10)
+        resp.raise_for_status()
+        results = resp.json().get("results", [])
+
+        # Fallback if year constraint returns 0 results
+        if not results and year:
+            params.pop("year", None)
+            resp = self.http.get(url, params=params, timeout=10)
             resp.raise_for_status()
             results = resp.json().get("results", [])
 
-            # Fallback if year constraint returns 0 results
-            if not results and year:
-                params.pop("year", None)
-                resp = requests.get(url, params=params, timeout=10)
-                resp.raise_for_status()
-                results = resp.json().get("results", [])
-
-            if results:
-                query_clean = re.sub(r'[^\w\s]', '', query.lower()).strip()
-
-                def score_candidate(r):
-                    name_raw = r.get("title", "") or r.get("name", "")
-                    name_lower = name_raw.lower()
-                    name_clean = re.sub(r'[^\w\s]', '', name_lower).strip()
-
-                    if name_clean == query_clean:
-                        return 100
-                    if name_clean.rstrip('s') == query_clean.rstrip('s'):
-                        return 90
-                    if re.search(r'\b' + re.escape(query_clean) + r's?\s*[:\-]', name_raw, re.IGNORECASE):
-                        return 80
-                    if re.search(r'\b' + re.escape(query_clean) + r's?\b', name_lower):
-                        return 50
-                    return 0
-
-                best_match = results[0]
-                best_score = -1
-                for r in results:
-                    s = score_candidate(r)
-                    if s > best_score:
-                        best_score = s
-                        best_match = r
-
-                match = best_match
-
-                release_date = match.get("release_date", "")
-                match_year = release_date.split("-")[0] if release_date else ""
-                poster_path = match.get("poster_path")
-                poster_url = f"https://image.tmdb.org/t/p/w185{poster_path}" if poster_path else None
-                return {
-                    "title": match.get("title"),
-                    "year": match_year,
-                    "id": match.get("id"),
-                    "poster_url": poster_url
-                }
-        except Exception as e:
-            logger.error(f"TMDB search_movie failed: {e}")
+        if results:
+            match = self._best_match(query, results, name_keys=("title", "name"))
+
+            release_date = match.get("release_date", "")
+            match_year = release_date.split("-")[0] if release_date else ""
+            poster_path = match.get("poster_path")
+            poster_url = f"https://image.tmdb.org/t/p/w185{poster_path}" if poster_path else None
+            return {
+                "title": match.get("title"),
+                "year": match_year,
+                "id": match.get("id"),
+                "poster_url": poster_url
+            }
         return None
 
     def search_tv(self, query: str, year: int = None) -> Optional[dict]:
@@ -84,7 +100,19 @@ class TmdbClient:
         if not self.api_key:
             logger.warning("TMDB API Key not configured. Skipping TV search.")
             return None
-            
+
+        hit, cached = self.cache.get("search_tv", query, year)
+        if hit:
+            return cached
+        try:
+            result = self._search_tv(query, year)
+        except Exception as e:
+            logger.error(f"TMDB search_tv failed: {e}")
+            return None
+        self.cache.set("search_tv", query, year, result)
+        return result
+
+    def _search_tv(self, query: str, year: int = None) -> Optional[dict]:
         url = f"{self.base_url}/search/tv"
         params = {
             "api_key": self.api_key,
@@ -92,89 +120,165 @@ class TmdbClient:
         }
         if year:
             params["first_air_date_year"] = int(year)
-            
-        try:
-            resp = requests.get(url, params=params, timeout=10)
+
+        resp = self.http.get(url, params=params, timeout=10)
+        resp.raise_for_status()
+        results = resp.json().get("results", [])
+
+        # Fallback if year constraint returns 0 results
+        if not results and year:
+            params.pop("first_air_date_year", None)
+            resp = self.http.get(url, params=params, timeout=10)
             resp.raise_for_status()
             results = resp.json().get("results", [])
 
-            # Fallback if year constraint returns 0 results
-            if not results and year:
-                params.pop("first_air_date_year", None)
-                resp = requests.get(url, params=params, timeout=10)
-                resp.raise_for_status()
-                results = resp.json().get("results", [])
-
-            if results:
-                query_clean = re.sub(r'[^\w\s]', '', query.lower()).strip()
-
-                def score_candidate(r):
-                    name_raw = r.get("name", "") or r.get("title", "")
-                    name_lower = name_raw.lower()
-                    name_clean = re.sub(r'[^\w\s]', '', name_lower).strip()
-
-                    if name_clean == query_clean:
-                        return 100
-                    if name_clean.rstrip('s') == query_clean.rstrip('s'):
-                        return 90
-                    if re.search(r'\b' + re.escape(query_clean) + r's?\s*[:\-]', name_raw, re.IGNORECASE):
-                        return 80
-                    if re.search(r'\b' + re.escape(query_clean) + r's?\b', name_lower):
-                        return 50
-                    return 0
-
-                best_match = results[0]
-                best_score = -1
-                for r in results:
-                    s = score_candidate(r)
-                    if s > best_score:
-                        best_score = s
-                        best_match = r
-
-                match = best_match
-
-                first_air = match.get("first_air_date", "")
-                match_year = first_air.split("-")[0] if first_air else ""
-                poster_path = match.get("poster_path")
-                poster_url = f"https://image.tmdb.org/t/p/w185{poster_path}" if poster_path else None
-                return {
-                    "title": match.get("name"),
-                    "year": match_year,
-                    "id": match.get("id"),
-                    "poster_url": poster_url
-                }
-        except Exception as e:
-            logger.error(f"TMDB search_tv failed: {e}")
+        if results:
+            match = self._best_match(query, results, name_keys=("name", "title"))
+
+            first_air = match.get("first_air_date", "")
+            match_year = first_air.split("-")[0] if first_air else ""
+            poster_path = match.get("poster_path")
+            poster_url = f"https://image.tmdb.org/t/p/w185{poster_path}" if poster_path else None
+            return {
+                "title": match.get("name"),
+                "year": match_year,
+                "id": match.get("id"),
+                "poster_url": poster_url
+            }
         return None
 
-    def get_tv_seasons(self, tv_id: int) -> List[int]:
-        """Returns a sorted list of valid season numbers for a given TV show ID on TMDB."""
+    @staticmethod
+    def _best_match(query: str, results: List[dict], name_keys: tuple) -> dict:
+        """Picks the result whose name best matches the query (exact > plural > subtitle > word match)."""
+        query_clean = re.sub(r'[^\w\s]', '', query.lower()).strip()
+
+        def score_candidate(r):
+            name_raw = r.get(name_keys[0], "") or r.get(name_keys[1], "")
+            name_lower = name_raw.lower()
+            name_clean = re.sub(r'[^\w\s]', '', name_lower).strip()
+
+            if name_clean == query_clean:
+                return 100
+            if name_clean.rstrip('s') == query_clean.rstrip('s'):
+                return 90
+            if re.search(r'\b' + re.escape(query_clean) + r's?\s*[:\-]', name_raw, re.IGNORECASE):
+                return 80
+            if re.search(r'\b' + re.escape(query_clean) + r's?\b', name_lower):
+                return 50
+            return 0
+
+        best_match = results[0]
+        best_score = -1
+        for r in results:
+            s = score_candidate(r)
+            if s > best_score:
+                best_score = s
+                best_match = r
+        return best_match
+
+    def get_tv_seasons(self, tv_id: int, refresh: bool = False) -> List[int]:
+        """
+        Returns a sorted list of valid season numbers for a given TV show ID on TMDB.
+        refresh skips the memo and the cache, e.g. when a season is missing
+        because the list was cached before it aired.
+        """
         if not self.api_key or not tv_id:
             return []
+
+        memo_key = ("tv_seasons", str(tv_id))
+        if not refresh:
+            memoized = self._memo_get(memo_key)
+            if memoized is not None:
+                return memoized
+
+            hit, cached = self.cache.get("tv_seasons", tv_id)
+            if hit:
+                self._memo_set(memo_key, cached or [])
+                return cached or []
         url = f"{self.base_url}/tv/{tv_id}"
         params = {"api_key": self.api_key}
         try:
-            resp = requests.get(url, params=params, timeout=10)
+            resp = self.http.get(url, params=params, timeout=10)
             resp.raise_for_status()
             data = resp.json()
             seasons = [s.get("season_number") for s in data.get("seasons", []) if s.get("season_number") is not None and s.get("season_number") > 0]
-            return sorted(seasons)
+            seasons = sorted(seasons)
         except Exception as e:
             logger.error(f"TMDB get_tv_seasons failed for ID {tv_id}: {e}")
             return []
+        self.cache.set("tv_seasons", tv_id, None, seasons)
+        self._memo_set(memo_key, seasons)
+        return seasons
+
+    def get_season_episodes(self, tv_id: int, season: int) -> Dict[int, str]:
+        """Returns {episode_number: episode_name} for a whole season using a single TMDB request."""
+        if not self.api_key or not tv_id or not season:
+            return {}
+
+        memo_key = ("season_episodes", str(tv_id), int(season))
+        memoized = self._memo_get(memo_key)
+        if memoized is not None:
+            return memoized
+
+        cache_query = f"{tv_id}/{season}"
+        hit, cached = self.cache.get("season_episodes", cache_query)
+        if hit:
+            # JSON object keys come back as strings
+            episodes = {int(k): v for k, v in (cached or {}).items()}
+            self._memo_set(memo_key, episodes)
+            return episodes
+
+        url = f"{self.base_url}/tv/{tv_id}/season/{season}"
+        params = {
+            "api_key": self.api_key
+        }
+        try:
+            resp = self.http.get(url, params=params, timeout=10)
+            if resp.status_code == 404:
+                episodes = {}
+            else:
+                resp.raise_for_status()
+                episodes = {
+                    int(e["episode_number"]): e.get("name")
+                    for e in resp.json().get("episodes", [])
+                    if e.get("episode_number") is not None
+                }
+        except Exception as e:
+            logger.error(f"TMDB get_season_episodes failed for TV ID {tv_id} S{season}: {e}")
+            return {}
+        self.cache.set("season_episodes", cache_query, None, {str(k): v for k, v in episodes.items()})
+        self._memo_set(memo_key, episodes)
+        return episodes
 
     def get_episode_name(self, tv_id: int, season: int, episode: int) -> Optional[str]:
         """Gets the title of a specific episode from TMDB."""
         if not self.api_key:
             return None
+
+        # Reuse a season fetched earlier by this client instead of a per-episode request;
+        # an episode missing from it may have been published since, so ask for it directly
+        memoized = self._memo_get(("season_episodes", str(tv_id), int(season))) if season else None
+        if memoized and memoized.get(int(episode)):
+            return memoized[int(episode)]
+
+        cache_query = f"{tv_id}/{season}/{episode}"
+        hit, cached = self.cache.get("episode_name", cache_query)
+        if hit:
+            return cached
         url = f"{self.base_url}/tv/{tv_id}/season/{season}/episode/{episode}"
         params = {
             "api_key": self.api_key
         }
         try:
-            resp = requests.get(url, params=params, timeout=10)
+            resp = self.http.get(url, params=params, timeout=10)
+            if resp.status_code == 404:
+                # Episode does not exist on TMDb; remember the miss
+                self.cache.set("episode_name", cache_query, None, None)
+                return None
             resp.raise_for_status()
-            return resp.json().get("name")
+            name = resp.json().get("name")
         except Exception as e:
             logger.error(f"TMDB get_episode_name failed for TV ID {tv_id} S{season}E{episode}: {e}")
-        return None
+            return None
+        self.cache.set("episode_name", cache_query, None, name)
+        return name
@@ -2,6 +2,7 @@ import os
 import logging
 import requests
 from typing import List, Dict, Any, Optional
+from .http_pool import PooledSession, torbox_http
 
 logger = logging.getLogger(__name__)
 
@@ -15,9 +16,11 @@ except ImportError:
     logger.warning("torbox-api SDK not found. Falling back to REST API operations.")
 
 class TorboxClient:
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, http: PooledSession = None):
         self.api_key = api_key or os.environ.get("TORBOX_API_KEY", "")
         self.base_url = "https://api.torbox.app/v1/api"
+        # Keep-alive pool for REST calls; torrent file downloads from indexers still use plain requests
+        self.http = http or torbox_http
         
         if SDK_AVAILABLE and self.api_key:
             try:
@@ -148,7 +151,7 @@ class TorboxClient:
         try:
             # Torbox expects form data / multipart for this endpoint
             logger.info(f"Submitting torrent to Torbox (REST)... is_file={bool(files)}")
-            resp = requests.post(url, headers=headers, data=data, files=files, timeout=20)
+            resp = self.http.post(url, headers=headers, data=data, files=files, timeout=20)
             resp.raise_for_status()
             return resp.json()
         except Exception as e:
@@ -169,26 +172,11 @@ class TorboxClient:
         if not self.api_key:
             return []
 
-        # We do NOT pass the torrent_id (id_) to the SDK or the REST API because of a major
-        # serialization bug in the official torbox-api SDK when querying a single torrent by ID.
-        # Instead, we query the full list with bypass_cache and filter client-side.
-        if self.sdk:
-            try:
-                kwargs = {
-                    "bypass_cache": "true"
-                }
-                response = self.sdk.torrents.get_torrent_list(api_version="v1", **kwargs)
-                
-                if response and hasattr(response, 'data') and response.data:
-                    data = response.data
-                    if isinstance(data, list):
-                        return [self._map_sdk_torrent(t) for t in data]
-                    else:
-                        return [self._map_sdk_torrent(data)]
-            except Exception as e:
-                logger.error(f"Torbox SDK get_torrents error: {e}. Trying REST fallback.")
-
-        # REST API Fallback
+        # We do NOT pass the torrent_id (id_) because of a major serialization bug in the
+        # official torbox-api SDK when querying a single torrent by ID. Instead, we query the
+        # full list with bypass_cache and filter client-side.
+        # The list is polled every few seconds, so it always goes through the pooled REST
+        # session: the SDK opens a new connection per call (module-level requests.request).
         url = f"{self.base_url}/torrents/mylist"
         headers = {
             "Authorization": f"Bearer {self.api_key}"
@@ -199,7 +187,7 @@ class TorboxClient:
         }
             
         try:
-            resp = requests.get(url, headers=headers, params=params, timeout=15)
+            resp = self.http.get(url, headers=headers, params=params, timeout=15)
             resp.raise_for_status()
             res_json = resp.json()
             if res_json.get("success") and "data" in res_json:
@@ -228,18 +216,7 @@ class TorboxClient:
         if not self.api_key:
             return False
 
-        if self.sdk:
-            try:
-                body = {
-                    "torrent_id": torrent_id,
-                    "operation": action
-                }
-                response = self.sdk.torrents.control_torrent(api_version="v1", request_body=body)
-                if response and hasattr(response, 'success'):
-                    return response.success
-            except Exception as e:
-                logger.error(f"Torbox SDK control_torrent error: {e}. Trying REST fallback.")
-
+        # Pooled REST session rather than the SDK, which cannot reuse connections
         url = f"{self.base_url}/torrents/controltorrent"
         headers = {
             "Authorization": f"Bearer {self.api_key}"
@@ -249,7 +226,7 @@ class TorboxClient:
             "operation": action
         }
         try:
-            resp = requests.post(url, headers=headers, json=data, timeout=15)
+            resp = self.http.post(url, headers=headers, json=data, timeout=15)
             resp.raise_for_status()
             res_json = resp.json()
             return res_json.get("success", False)
@@ -286,7 +263,7 @@ class TorboxClient:
             "file_id": file_id
         }
         try:
-            resp = requests.get(url, headers=headers, params=params, timeout=15)
+            resp = self.http.get(url, headers=headers, params=params, timeout=15)
             resp.raise_for_status()
             res_json = resp.json()
             if res_json.get("success"):
@@ -320,7 +297,7 @@ class TorboxClient:
             "Authorization": f"Bearer {self.api_key}"
         }
         try:
-            resp = requests.get(cache_url, headers=headers, params={"hash": info_hash}, timeout=3)
+            resp = self.http.get(cache_url, headers=headers, params={"hash": info_hash}, timeout=3)
             resp.raise_for_status()
             res_json = resp.json()
             if res_json.get("success") and "data" in res_json:
@@ -336,35 +313,3 @@ class TorboxClient:
             logger.warning(f"Torbox checkcached failed: {e}")
 
         return None
-
-    def _map_sdk_torrent(self, t) -> dict:
-        """Helper to convert SDK model to a standard dict matching the API response."""
-        sdk_files = getattr(t, 'files', []) or []
-        mapped_files = []
-        for f in sdk_files:
-            if f is not None:
-                fid = getattr(f, 'id_', None)
-                if fid is None:
-                    fid = getattr(f, 'id', None)
-                mapped_files.append({
-                    "id": fid,
-                    "name": getattr(f, 'name', None) or getattr(f, 'short_name', None),
-                    "size": getattr(f, 'size', 0)
-                })
-                
-        tid = getattr(t, 'id_', None)
-        if tid is None:
-            tid = getattr(t, 'id', None)
-            
-        return {
-            "id": tid,
-            "name": getattr(t, 'name', None),
-            "progress": getattr(t, 'progress', 0.0),
-            "active": getattr(t, 'active', False),
-            "download_speed": getattr(t, 'download_speed', 0) or getattr(t, 'downloadSpeed', 0),
-            "download_finished": getattr(t, 'download_finished', False) or getattr(t, 'downloadFinished', False),
-            "download_state": getattr(t, 'download_state', "unknown") or getattr(t, 'downloadState', "unknown"),
-            "size": getattr(t, 'size', 0),
-            "hash": getattr(t, 'hash', None),
-            "files": mapped_files
-        }
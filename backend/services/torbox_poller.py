@@ -0,0 +1,163 @@
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class TorboxSubscription:
+    """Handle returned to a monitor task; yields the torrent's state once per poller tick."""
+
+    def __init__(self, poller: 'TorboxPoller', torbox_id: str, client):
+        self.poller = poller
+        self.torbox_id = torbox_id
+        self.client = client
+        self._seen_tick = 0
+        self._closed = False
+
+    def next(self, timeout: float = None) -> Optional[dict]:
+        """
+        Blocks until a poller tick newer than the last one consumed has completed,
+        then returns this torrent's entry from it (None if Torbox no longer lists it).
+        Falls back to a direct lookup if the poller does not tick within the timeout.
+        A closed subscription is registered with the poller again.
+        """
+        if timeout is None:
+            timeout = self.poller.interval * 10
+        poller = self.poller
+        if self._closed:
+            self._closed = False
+            self._seen_tick = poller._register(self.torbox_id, self.client)
+        with poller.cond:
+            ticked = poller.cond.wait_for(lambda: poller._tick > self._seen_tick, timeout=timeout)
+            if ticked:
+                self._seen_tick = poller._tick
+                return poller._snapshot.get(self.torbox_id)
+        logger.warning(f"TorboxPoller: No tick within {timeout}s for torrent {self.torbox_id}. Querying Torbox directly.")
+        return self.client.get_torrent_info(self.torbox_id)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self.poller.unsubscribe(self.torbox_id)
+
+
+class TorboxPoller:
+    """
+    Central poller for the Torbox torrent list. A single background thread fetches
+    /torrents/mylist once per tick while there are subscribers, and every monitor
+    task reads its torrent's state from the shared snapshot instead of fetching
+    the full list itself.
+    """
+
+    def __init__(self, interval: float = 3.0, history_size: int = 100):
+        self.interval = interval
+        self.cond = threading.Condition()
+        # maps torbox_id -> number of active subscriptions
+        self._subscribers: Dict[str, int] = {}
+        self._client = None
+        # maps torbox_id -> torrent dict from the latest tick
+        self._snapshot: Dict[str, dict] = {}
+        # sequence number of the last tick started / completed
+        self._started = 0
+        self._tick = 0
+        self._refresh_requested = False
+        self._thread = None
+        # per-tick metrics: (finished_at, list_size, latency_seconds, subscribers)
+        self._history = deque(maxlen=history_size)
+        self._total_latency = 0.0
+
+    def subscribe(self, torbox_id, client) -> TorboxSubscription:
+        """Registers interest in a torrent. The client is used for the shared list fetch."""
+        torbox_id = str(torbox_id)
+        subscription = TorboxSubscription(self, torbox_id, client)
+        subscription._seen_tick = self._register(torbox_id, client)
+        return subscription
+
+    def _register(self, torbox_id: str, client) -> int:
+        """Adds a subscriber and returns the tick sequence number its first next() must wait past."""
+        with self.cond:
+            self._subscribers[torbox_id] = self._subscribers.get(torbox_id, 0) + 1
+            self._client = client
+            # New subscribers get a fresh tick right away instead of waiting a full interval
+            self._refresh_requested = True
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="torbox-poller", daemon=True)
+                self._thread.start()
+            self.cond.notify_all()
+            # Ticks already in flight may predate this torrent, so wait for one started after now
+            return self._started
+
+    def unsubscribe(self, torbox_id):
+        torbox_id = str(torbox_id)
+        with self.cond:
+            count = self._subscribers.get(torbox_id, 0) - 1
+            if count > 0:
+                self._subscribers[torbox_id] = count
+            else:
+                self._subscribers.pop(torbox_id, None)
+                self._snapshot.pop(torbox_id, None)
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self._subscribers:
+                    self.cond.wait()
+                client = self._client
+                self._refresh_requested = False
+                self._started += 1
+                seq = self._started
+            try:
+                self._poll_once(client, seq)
+            except Exception as e:
+                logger.error(f"TorboxPoller: Tick failed: {e}")
+            with self.cond:
+                self.cond.wait_for(lambda: self._refresh_requested, timeout=self.interval)
+
+    def _poll_once(self, client, seq: int):
+        started = time.time()
+        torrents = client.get_torrents() if client else []
+        latency = time.time() - started
+
+        snapshot = {}
+        for t in torrents or []:
+            t_id = t.get("id") or t.get("torrent_id")
+            if t_id is not None:
+                snapshot[str(t_id)] = t
+
+        with self.cond:
+            self._snapshot = {k: v for k, v in snapshot.items() if k in self._subscribers}
+            self._tick = seq
+            self._history.append((time.time(), len(torrents or []), latency, len(self._subscribers)))
+            self._total_latency += latency
+            self.cond.notify_all()
+
+        logger.debug(f"TorboxPoller: Tick {seq} fetched {len(torrents or [])} torrents in {latency:.3f}s for {len(self._subscribers)} subscribers.")
+
+    def stats(self) -> dict:
+        with self.cond:
+            history = list(self._history)
+            stats = {
+                "ticks": self._tick,
+                "subscribers": len(self._subscribers),
+                "interval": self.interval
+            }
+            total_latency = self._total_latency
+        if history:
+            last = history[-1]
+            stats["last_tick"] = {
+                "at": last[0],
+                "list_size": last[1],
+                "latency": round(last[2], 4),
+                "subscribers": last[3]
+            }
+            stats["avg_latency"] = round(sum(h[2] for h in history) / len(history), 4)
+            stats["max_latency"] = round(max(h[2] for h in history), 4)
+            stats["avg_list_size"] = round(sum(h[1] for h in history) / len(history), 1)
+        if stats["ticks"]:
+            stats["lifetime_avg_latency"] = round(total_latency / stats["ticks"], 4)
+        return stats
+
+# Global singleton poller shared by all monitor tasks (polls every 3 seconds)
+global_torbox_poller = TorboxPoller(interval=3.0)
@@ -47,6 +47,7 @@ let state = {
   searchResults: savedSearchData ? (savedSearchData.searchResults || []) : [],
   downloads: [],
   socket: null,
+  activeSearchId: null,
   sidebarOpen: false
 };
 
@@ -198,7 +199,8 @@ function initSocket() {
 
   const socketUrl = window.location.origin;
   state.socket = io(socketUrl, {
-    transports: ["websocket", "polling"]
+    transports: ["websocket", "polling"],
+    auth: { token: state.token }
   });
 
   state.socket.on("connect", () => {
@@ -217,6 +219,14 @@ function initSocket() {
     handleDownloadDeletedSocket(data);
   });
 
+  state.socket.on("search_results", (data) => {
+    handleSearchResultsSocket(data);
+  });
+
+  state.socket.on("search_poster", (data) => {
+    handleSearchPosterSocket(data);
+  });
+
   state.socket.on("disconnect", () => {
     console.log("Downloads WebSocket disconnected");
   });
@@ -263,33 +273,108 @@ async function fetchDownloads() {
   }
 }
 
+function searchCardKey(card) {
+  return `${card.clean_title.toLowerCase()}|${card.year}|${card.is_tv}`;
+}
+
+function newSearchId() {
+  if (window.crypto && window.crypto.randomUUID) return window.crypto.randomUUID().replace(/-/g, "");
+  return Date.now().toString(36) + Math.random().toString(36).slice(2, 12);
+}
+
+function finishStreamedSearch() {
+  state.activeSearchId = null;
+  const loaderEl = document.getElementById("search-loading");
+  if (loaderEl) loaderEl.style.display = "none";
+  saveRecentSearch();
+  renderSearchResults();
+  updateClearButtonVisibility();
+}
+
+// Streamed search increments replace cards with the same title/year/type, new cards are appended
+function handleSearchResultsSocket(data) {
+  if (!data || data.search_id !== state.activeSearchId) return;
+
+  if (data.done) {
+    state.searchResults = data.data;
+  } else {
+    const index = new Map(state.searchResults.map((card, i) => [searchCardKey(card), i]));
+    data.data.forEach(card => {
+      const existing = index.get(searchCardKey(card));
+      if (existing === undefined) {
+        index.set(searchCardKey(card), state.searchResults.length);
+        state.searchResults.push(card);
+      } else {
+        state.searchResults[existing] = card;
+      }
+    });
+  }
+
+  if (data.error) {
+    console.error("Streamed search failure:", data.error);
+  }
+  if (data.done) {
+    finishStreamedSearch();
+  } else {
+    renderSearchResults();
+  }
+}
+
+// Posters may still arrive after the final increment of a search
+function handleSearchPosterSocket(data) {
+  if (!data || !state.searchResults) return;
+  const key = searchCardKey(data);
+  const card = state.searchResults.find(c => searchCardKey(c) === key);
+  if (card && card.poster_url !== data.poster_url) {
+    card.poster_url = data.poster_url;
+    renderSearchResults();
+  }
+}
+
 async function searchTrackers(query, category) {
   const container = document.getElementById("results-list");
   const loaderEl = document.getElementById("search-loading");
   
   if (loaderEl) loaderEl.style.display = "flex";
   container.innerHTML = "";
+  let streaming = false;
   
   try {
     const headers = {};
     if (state.token) {
       headers["Authorization"] = `Bearer ${state.token}`;
     }
-    const resp = await fetch(`/api/search?q=${encodeURIComponent(query)}&category=${category || ""}`, { headers });
+    // With a live socket the server pushes cards as indexers answer instead of replying once.
+    // The id is chosen here because a cache hit's only event can arrive before the response
+    let streamParam = "";
+    state.activeSearchId = null;
+    if (state.socket && state.socket.connected) {
+      const searchId = newSearchId();
+      state.activeSearchId = searchId;
+      state.searchResults = [];
+      streamParam = `&stream=1&search_id=${searchId}`;
+    }
+    const resp = await fetch(`/api/search?q=${encodeURIComponent(query)}&category=${category || ""}${streamParam}`, { headers });
     const resData = await resp.json();
-    if (resp.ok) {
+    if (resp.ok && resData.type === "search_stream") {
+      // The search may already have finished, with its final event handled before this response
+      streaming = state.activeSearchId === resData.search_id;
+    } else if (resp.ok) {
+      state.activeSearchId = null;
       state.searchResults = resData.data;
       saveRecentSearch();
       renderSearchResults();
       updateClearButtonVisibility();
     } else {
+      state.activeSearchId = null;
       container.innerHTML = `<div class="alert-box alert-error">Error: ${resData.error}</div>`;
     }
   } catch (err) {
     console.error("Search API failure:", err);
+    state.activeSearchId = null;
     container.innerHTML = `<div class="alert-box alert-error">Failed to query search indexers.</div>`;
   } finally {
-    if (loaderEl) loaderEl.style.display = "none";
+    if (loaderEl && !streaming) loaderEl.style.display = "none";
   }
 }
 
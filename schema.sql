@@ -20,6 +20,7 @@ CREATE TABLE IF NOT EXISTS users (
     last_name TEXT,
     profile_picture TEXT,          -- Stores Google Profile Picture URL
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    session_generation INTEGER DEFAULT 0, -- Bumped to revoke signed session tokens
     FOREIGN KEY(group_id) REFERENCES groups(id)
 );
 
@@ -55,7 +56,45 @@ CREATE TABLE IF NOT EXISTS server_settings (
     value TEXT
 );
 
--- 6. Seed Default User Groups
+-- 6. Create Library Index Tables (sizes of files under the library root, refreshed by directory mtime)
+CREATE TABLE IF NOT EXISTS library_dirs (
+    path TEXT PRIMARY KEY,
+    root TEXT NOT NULL,
+    parent TEXT,
+    mtime REAL
+);
+
+CREATE TABLE IF NOT EXISTS library_files (
+    path TEXT PRIMARY KEY,
+    root TEXT NOT NULL,
+    dir TEXT NOT NULL,
+    size INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_library_dirs_root ON library_dirs(root);
+CREATE INDEX IF NOT EXISTS idx_library_files_root ON library_files(root);
+CREATE INDEX IF NOT EXISTS idx_library_files_dir ON library_files(dir);
+
+-- 7. Create TMDb Metadata Cache Table (payload is JSON; 'null' marks a cached miss)
+CREATE TABLE IF NOT EXISTS tmdb_cache (
+    cache_key TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    payload TEXT,
+    expires_at REAL NOT NULL
+);
+
+-- 8. Create Search Cache Table (persistent tier of the in-memory search cache; payload is compact JSON)
+CREATE TABLE IF NOT EXISTS search_cache (
+    query TEXT NOT NULL,
+    category TEXT NOT NULL DEFAULT '',
+    payload TEXT NOT NULL,
+    stale_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (query, category)
+);
+CREATE INDEX IF NOT EXISTS idx_search_cache_expires ON search_cache(expires_at);
+
+-- 9. Seed Default User Groups
 INSERT OR IGNORE INTO groups (id, name, permissions) VALUES (1, 'Admin', '["admin"]');
 INSERT OR IGNORE INTO groups (id, name, permissions) VALUES (2, 'User', '["search", "download"]');
 INSERT OR IGNORE INTO groups (id, name, permissions) VALUES (3, 'Moderator', '["moderate"]');
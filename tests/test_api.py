@@ -5,6 +5,9 @@ import os
 from backend.app import create_app
 from backend.database import Database
 from backend.models.user import User
+from backend.routes.api import save_server_settings
+from backend.services.progress_buffer import global_progress_buffer
+from backend.services.library_index import global_library_index
 
 class TestAPI(unittest.TestCase):
     def setUp(self):
@@ -32,6 +35,10 @@ class TestAPI(unittest.TestCase):
         self.client.set_cookie('session_token', self.token)
 
     def tearDown(self):
+        # Background writers must not outlive this test's database
+        global_progress_buffer.stop()
+        global_library_index.wait_idle(timeout=10)
+        global_library_index.reset()
         # Reset singleton instance
         Database.reset_instance()
         if os.path.exists(self.db_path):
@@ -42,7 +49,7 @@ class TestAPI(unittest.TestCase):
         if "DATABASE_PATH" in os.environ:
             del os.environ["DATABASE_PATH"]
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_search_generic(self, mock_get):
         # Mock Prowlarr search API response
         mock_resp = MagicMock()
@@ -62,7 +69,7 @@ class TestAPI(unittest.TestCase):
         mock_get.return_value = mock_resp
 
         # Configure server settings with api key so SearchClient tries to search
-        self.db.execute("INSERT OR REPLACE INTO server_settings (key, value) VALUES (?, ?)", ("prowlarr_api_key", "dummy_prowlarr_key"))
+        save_server_settings({"prowlarr_api_key": "dummy_prowlarr_key"})
 
         response = self.client.get('/api/search?q=Inception')
         data = json.loads(response.data)
@@ -85,10 +92,10 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(data['data'][0]['year'], 2009)
         self.assertEqual(data['data'][0]['downloads'][0]['download_url'], magnet)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_search_magnet_with_torbox_metadata(self, mock_get):
         # Configure server settings with torbox API key so it tries to query Torbox
-        self.db.execute("INSERT OR REPLACE INTO server_settings (key, value) VALUES (?, ?)", ("torbox_api_key", "dummy_torbox_key"))
+        save_server_settings({"torbox_api_key": "dummy_torbox_key"})
 
         # Mock Torbox metadata response from checkcached
         mock_resp = MagicMock()
@@ -156,6 +163,25 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(data['prowlarr_api_key'], 'new_prowlarr_key')
         self.assertEqual(data['library_path'], '/media/library')
 
+    def test_server_settings_are_cached_until_saved(self):
+        from backend.routes.api import get_server_settings
+        from backend.services.settings_cache import global_settings_cache
+
+        self.assertEqual(get_server_settings()["prowlarr_url"], "")
+        version = global_settings_cache.version
+
+        # Reads between writes are served from memory, so a direct table edit is not seen
+        self.db.execute("INSERT OR REPLACE INTO server_settings (key, value) VALUES (?, ?)", ("prowlarr_url", "http://direct:9696"))
+        self.assertEqual(get_server_settings()["prowlarr_url"], "")
+
+        save_server_settings({"prowlarr_url": "http://localhost:9696"})
+        self.assertEqual(get_server_settings()["prowlarr_url"], "http://localhost:9696")
+        self.assertEqual(global_settings_cache.version, version + 1)
+
+        # Callers get their own copy
+        get_server_settings()["prowlarr_url"] = "mutated"
+        self.assertEqual(get_server_settings()["prowlarr_url"], "http://localhost:9696")
+
     @patch('backend.routes.api.TorboxClient')
     @patch('backend.routes.api.TmdbClient')
     @patch('backend.services.tmdb_client.TmdbClient')
@@ -164,33 +190,44 @@ class TestAPI(unittest.TestCase):
     @patch('time.sleep')
     def test_tv_show_downloads_tmdb_tag_formatting_and_cleanup(self, mock_sleep, mock_get, mock_socketio, mock_tmdb_services_class, mock_tmdb_routes_class, mock_torbox_routes_class):
         # 1. Setup server settings
-        self.db.execute("INSERT OR REPLACE INTO server_settings (key, value) VALUES (?, ?)", ("torbox_api_key", "dummy_torbox_key"))
-        self.db.execute("INSERT OR REPLACE INTO server_settings (key, value) VALUES (?, ?)", ("tmdb_api_key", "dummy_tmdb_key"))
-        self.db.execute("INSERT OR REPLACE INTO server_settings (key, value) VALUES (?, ?)", ("library_path", "./test_library"))
+        save_server_settings({
+            "torbox_api_key": "dummy_torbox_key",
+            "tmdb_api_key": "dummy_tmdb_key",
+            "library_path": "./test_library"
+        })
 
         # 2. Setup TMDB mocks
         mock_tmdb1 = mock_tmdb_routes_class.return_value
         mock_tmdb1.search_tv.return_value = {"title": "My Adventures with Superman", "year": 2023, "id": 125928}
+        mock_tmdb1.get_tv_seasons.return_value = [1, 2, 3]
+        # A stale season map without the episode still resolves through the per-episode lookup
+        mock_tmdb1.get_season_episodes.return_value = {1: "Adventures in Space", 2: "Let's Kill the Man of Steel", 3: "Most Wanted"}
         mock_tmdb1.get_episode_name.return_value = "Guess Who's Slammin' to Dinner"
 
         mock_tmdb2 = mock_tmdb_services_class.return_value
         mock_tmdb2.search_tv.return_value = {"title": "My Adventures with Superman", "year": 2023, "id": 125928}
+        mock_tmdb2.get_tv_seasons.return_value = [1, 2, 3]
+        mock_tmdb2.get_season_episodes.return_value = {4: "Guess Who's Slammin' to Dinner"}
         mock_tmdb2.get_episode_name.return_value = "Guess Who's Slammin' to Dinner"
 
         # 3. Setup Torbox mocks
         mock_torbox = mock_torbox_routes_class.return_value
-        mock_torbox.get_torrent_info.return_value = {
+        torrent_info = {
+            "id": "torbox_12345",
             "progress": 1.0,
             "download_speed": 0,
             "download_state": "completed",
             "size": 18,
             "files": [{"id": 1, "name": "My Adventures with Superman S03E04 Guess Whos Slammin to Dinner.mkv", "size": 18}]
         }
+        mock_torbox.get_torrents.return_value = [torrent_info]
+        mock_torbox.get_torrent_info.return_value = torrent_info
         mock_torbox.get_download_link.return_value = "http://example.com/file.mkv"
 
         # 4. Setup requests.get mock for streaming
         mock_resp = MagicMock()
         mock_resp.status_code = 200
+        mock_resp.headers = {}
         mock_resp.iter_content.return_value = [b"mock chunk content"]
         mock_get.return_value = mock_resp
 
@@ -246,12 +283,125 @@ class TestAPI(unittest.TestCase):
         if os.path.exists("./test_library"):
             shutil.rmtree("./test_library")
 
+    @patch('backend.routes.api.TorboxClient')
+    @patch('backend.routes.api.TmdbClient')
+    @patch('backend.routes.api.socketio')
     @patch('requests.get')
+    @patch('time.sleep')
+    def test_unknown_season_refreshes_tmdb_seasons_once_per_task(self, mock_sleep, mock_get, mock_socketio, mock_tmdb_class, mock_torbox_class):
+        save_server_settings({
+            "torbox_api_key": "dummy_torbox_key",
+            "tmdb_api_key": "dummy_tmdb_key",
+            "library_path": "./test_library"
+        })
+        mock_tmdb = mock_tmdb_class.return_value
+        mock_tmdb.search_tv.return_value = {"title": "Taskmaster", "year": 2015, "id": 63404}
+        # Season 9 is not on TMDb at all, so the refreshed list is missing it too
+        mock_tmdb.get_tv_seasons.return_value = [1, 2]
+        mock_tmdb.get_season_episodes.return_value = {}
+        mock_tmdb.get_episode_name.return_value = None
+
+        files = [{"id": n, "name": f"Taskmaster S09E0{n} 1080p.mkv", "size": 18} for n in range(1, 4)]
+        torrent_info = {"id": "torbox_pack", "progress": 1.0, "download_state": "completed", "size": 54, "files": files}
+        mock_torbox = mock_torbox_class.return_value
+        mock_torbox.get_torrents.return_value = [torrent_info]
+        mock_torbox.get_torrent_info.return_value = torrent_info
+        mock_torbox.get_download_link.return_value = "http://example.com/file.mkv"
+
+        mock_resp = MagicMock()
+        mock_resp.status_code = 200
+        mock_resp.headers = {}
+        mock_resp.iter_content.return_value = [b"mock chunk content"]
+        mock_get.return_value = mock_resp
+
+        db_download_id = self.db.execute(
+            "INSERT INTO downloads (user_id, torbox_id, title, filename, magnet, status, category, size) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.user.id, "torbox_pack", "Taskmaster", "Taskmaster S09 1080p", "magnet:?", "queued", "tv", 0)
+        )
+        try:
+            from backend.routes.api import monitor_and_download_task
+            monitor_and_download_task(self.user.id, "torbox_pack", {
+                'title': 'Taskmaster',
+                'filename': 'Taskmaster S09 1080p',
+                'magnet': 'magnet:?',
+                'category': 'tv',
+                'year': 2015,
+                'season': 9
+            }, db_download_id)
+
+            refreshes = [c for c in mock_tmdb.get_tv_seasons.call_args_list if c.kwargs.get("refresh")]
+            self.assertEqual(len(refreshes), 1)
+            self.assertTrue(os.path.exists("./test_library/TV SHOWS/Taskmaster (2015) {tmdb-63404}/Season 01/Taskmaster (2015) - S01E03.mkv"))
+        finally:
+            if os.path.exists("./test_library"):
+                import shutil
+                shutil.rmtree("./test_library")
+
+    @patch('requests.Session.get')
+    def test_search_stream_pushes_cards_to_user_room(self, mock_get):
+        from backend.app import socketio
+        from backend.services.search_cache import global_search_cache
+        from backend.services.client_registry import global_client_registry
+        global_search_cache.clear()
+        global_client_registry.invalidate()
+
+        releases = {
+            1: {"title": "Inception 2010 1080p BluRay", "guid": "guid1", "size": 1000, "indexer": "A",
+                "downloadUrl": "magnet:?xt=urn:btih:hash1", "seeders": 50, "peers": 5},
+            2: {"title": "Inception 2010 2160p WEB-DL", "guid": "guid2", "size": 2000, "indexer": "B",
+                "downloadUrl": "magnet:?xt=urn:btih:hash2", "seeders": 80, "peers": 8}
+        }
+
+        def fake_get(url, headers=None, params=None, timeout=None):
+            resp = MagicMock()
+            resp.status_code = 200
+            if url.endswith("/api/v1/indexer"):
+                resp.json.return_value = [{"id": 1, "name": "A"}, {"id": 2, "name": "B"}]
+            else:
+                resp.json.return_value = [releases[params["indexerIds"][0]]]
+            return resp
+        mock_get.side_effect = fake_get
+
+        save_server_settings({"prowlarr_api_key": "dummy_prowlarr_key"})
+        user_socket = socketio.test_client(self.app, auth={"token": self.token})
+        anonymous_socket = socketio.test_client(self.app)
+        try:
+            # Run the background task inline so the events are queued when the request returns
+            with patch.dict(os.environ, {"PROWLARR_SEARCH_MODE": "fanout"}), \
+                 patch('backend.routes.api.start_bg_task', side_effect=lambda target, *args: target(*args)):
+                response = self.client.get('/api/search?q=Inception&stream=1')
+            data = json.loads(response.data)
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(data['type'], 'search_stream')
+
+            events = [e for e in user_socket.get_received() if e['name'] == 'search_results']
+            payloads = [e['args'][0] for e in events]
+            self.assertTrue(all(p['search_id'] == data['search_id'] for p in payloads))
+            # One increment per indexer, then the complete card
+            self.assertEqual([p['done'] for p in payloads], [False, False, True])
+            self.assertEqual(len(payloads[0]['data'][0]['downloads']), 1)
+            self.assertEqual(len(payloads[1]['data'][0]['downloads']), 2)
+            self.assertEqual(payloads[2]['data'][0]['clean_title'], 'Inception')
+            self.assertEqual(len(payloads[2]['data'][0]['downloads']), 2)
+
+            self.assertEqual(anonymous_socket.get_received(), [])
+
+            # A client-chosen id is used for the events, so the client can match them before the response arrives
+            with patch('backend.routes.api.start_bg_task', side_effect=lambda target, *args: target(*args)):
+                response = self.client.get('/api/search?q=Inception&stream=1&search_id=client0search1')
+            self.assertEqual(json.loads(response.data)['search_id'], 'client0search1')
+            payloads = [e['args'][0] for e in user_socket.get_received() if e['name'] == 'search_results']
+            self.assertEqual([(p['search_id'], p['done']) for p in payloads], [('client0search1', True)])
+        finally:
+            user_socket.disconnect()
+            anonymous_socket.disconnect()
+            global_client_registry.invalidate()
+
+    @patch('requests.Session.get')
     def test_search_caching(self, mock_get):
         # Clear global search cache before test
         from backend.services.search_cache import global_search_cache
-        global_search_cache._query_cache.clear()
-        global_search_cache._cards_cache.clear()
+        global_search_cache.clear()
 
         # 1. First search: "John Wick" - hits mock Prowlarr
         mock_resp = MagicMock()
@@ -281,7 +431,7 @@ class TestAPI(unittest.TestCase):
         mock_get.return_value = mock_resp
 
         # Configure server settings with api key
-        self.db.execute("INSERT OR REPLACE INTO server_settings (key, value) VALUES (?, ?)", ("prowlarr_api_key", "dummy_prowlarr_key"))
+        save_server_settings({"prowlarr_api_key": "dummy_prowlarr_key"})
 
         # Run first search
         response = self.client.get('/api/search?q=John+Wick')
@@ -305,6 +455,100 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(len(data3['data']), 1)
         self.assertEqual(data3['data'][0]['clean_title'], "John Wick Chapter 2")
 
+    def test_downloads_list_reads_buffered_progress(self):
+        from backend.services.progress_buffer import ProgressBuffer
+        from backend.routes.api import populate_card_downloads
+
+        # A buffer of its own: the global one has a flusher running and rows from other tests
+        buffer = ProgressBuffer(flush_interval=3600)
+        self.addCleanup(buffer.stop)
+        patcher = patch('backend.routes.api.global_progress_buffer', buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        db_download_id = self.db.execute(
+            "INSERT INTO downloads (user_id, torbox_id, title, filename, magnet, status, category, size) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.user.id, "torbox_buffered", "Inception", "Inception.2010.mkv", "magnet:?xt=urn:btih:buffered", "queued", "movie", 0)
+        )
+        buffer.update(db_download_id, status="downloading (metadata)", progress=42, speed=1024, size=2048)
+
+        # Unflushed values are served from the buffer
+        response = self.client.get('/api/downloads')
+        data = json.loads(response.data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data[0]["progress"], 42)
+        self.assertEqual(data[0]["status"], "downloading (metadata)")
+
+        row = self.db.query("SELECT status, progress FROM downloads WHERE id = ?", (db_download_id,), one=True)
+        self.assertEqual(row["status"], "queued")
+
+        # Search cards show the same live status
+        card = {"downloads": [{"size": 0, "download_url": "magnet:?xt=urn:btih:buffered"}]}
+        populate_card_downloads(card, frozenset(), self.db)
+        self.assertEqual(card["downloads"][0]["db_status"], "downloading (metadata)")
+
+        # A flush persists all pending rows in one batch
+        self.assertEqual(buffer.flush(), 1)
+        row = self.db.query("SELECT status, progress, size FROM downloads WHERE id = ?", (db_download_id,), one=True)
+        self.assertEqual(row["status"], "downloading (metadata)")
+        self.assertEqual(row["progress"], 42)
+        self.assertEqual(row["size"], 2048)
+        self.assertIsNone(buffer.get(db_download_id))
+
+    @patch('backend.routes.api.TorboxClient')
+    @patch('backend.routes.api.socketio')
+    def test_delete_signals_cancellation_registry(self, mock_socketio, mock_torbox_routes_class):
+        from backend.services.cancellation import global_cancellation_registry
+
+        db_download_id = self.db.execute(
+            "INSERT INTO downloads (user_id, torbox_id, title, filename, magnet, status, category, size) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.user.id, "torbox_cancel", "Inception", "Inception.2010.mkv", "magnet:?", "moving", "movie", 0)
+        )
+        cancel_event = global_cancellation_registry.register(db_download_id)
+        try:
+            response = self.client.post(
+                '/api/torbox/control',
+                data=json.dumps({"torbox_id": "torbox_cancel", "action": "delete"}),
+                content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(cancel_event.is_set())
+            self.assertTrue(global_cancellation_registry.is_cancelled(db_download_id))
+        finally:
+            global_cancellation_registry.release(db_download_id)
+
+    def test_resolve_posters_respects_budget(self):
+        import time
+        import threading
+        from backend.models.result import AggregatedResult
+        from backend.routes.api import resolve_posters
+
+        fast_cards = [AggregatedResult(f"Fast Movie {i}", 2020, False) for i in range(6)]
+        slow_card = AggregatedResult("Slow Movie", 2020, False)
+        release = threading.Event()
+
+        def resolve(card):
+            if card is slow_card:
+                release.wait(5)
+                return "https://image.tmdb.org/t/p/w185/slow.jpg"
+            return f"https://image.tmdb.org/t/p/w185/{card.clean_title}.jpg"
+
+        started = time.time()
+        resolve_posters(fast_cards + [slow_card], resolve, budget=0.5)
+        self.assertLess(time.time() - started, 2)
+
+        for card in fast_cards:
+            self.assertEqual(card.poster_url, f"https://image.tmdb.org/t/p/w185/{card.clean_title}.jpg")
+        self.assertIsNone(slow_card.to_dict()["poster_url"])
+
+        # The late lookup still lands on the card for later cache hits
+        release.set()
+        for _ in range(50):
+            if slow_card.poster_url:
+                break
+            time.sleep(0.05)
+        self.assertEqual(slow_card.poster_url, "https://image.tmdb.org/t/p/w185/slow.jpg")
+
     def test_search_tv_show_magnet_detection(self):
         magnet = "magnet:?xt=urn:btih:B4938B2D9D47CE9947C1B511536E91731BEE57D7&dn=Monsters.The.Lyle.and.Erik.Menendez.Story.S01.COMPLETE.1080p.NF.WEB-DL.H.264-EniaHD&tr=http%3A%2F%2Fbt.t-ru.org%2Fann"
         import urllib.parse
@@ -349,6 +593,70 @@ class TestAPI(unittest.TestCase):
             self.assertEqual(tr.clean_title, expected_clean)
             self.assertEqual(tr.year, expected_year)
 
+    def test_release_parser_matches_regression_corpus(self):
+        from backend.models.result import TorrentResult
+
+        # Expected fields were recorded from the previous pattern-per-field parser
+        corpus_path = os.path.join(os.path.dirname(__file__), "data", "release_corpus.json")
+        with open(corpus_path, encoding="utf-8") as f:
+            corpus = json.load(f)
+
+        for expected in corpus:
+            tr = TorrentResult(title=expected["title"], size=100, download_url="", seeders=0, leechers=0, indexer="")
+            parsed = tr.to_dict()
+            for field, value in expected.items():
+                self.assertEqual(parsed[field], value, f"{field} differs for {expected['title']!r}")
+
+    def test_release_parse_is_memoized_and_immutable(self):
+        from backend.models.result import TorrentResult
+        from backend.models.release_parser import parse_release, parse_cache_stats
+
+        title = "Severance.S02E03.Who.Is.Alive.2160p.ATVP.WEB-DL.DDP5.1.Atmos.DV.HDR.H.265"
+        hits = parse_cache_stats()["hits"]
+        first = TorrentResult(title=title, size=1, download_url="magnet:?a", seeders=5, leechers=0, indexer="A")
+        second = TorrentResult(title=title, size=2, download_url="magnet:?b", seeders=9, leechers=1, indexer="B")
+
+        self.assertIs(first.parsed, second.parsed)
+        self.assertIs(parse_release(title), first.parsed)
+        self.assertGreaterEqual(parse_cache_stats()["hits"], hits + 2)
+        self.assertEqual((second.size, second.seeders, second.indexer), (2, 9, "B"))
+        self.assertEqual(first.features, ("HDR", "DV"))
+        with self.assertRaises(AttributeError):
+            first.parsed.season = 3
+
+    def test_aggregate_collapses_duplicate_torrents(self):
+        from backend.models.result import TorrentResult, AggregatedResult
+
+        results = [
+            # The same torrent from three indexers, matched by info hash
+            TorrentResult("Inception.2010.1080p.BluRay.x264", 2000, "https://a/1", 40, 1, "A", info_hash="ABCDEF"),
+            TorrentResult("Inception 2010 1080p BluRay x264", 2000, "https://b/1", 90, 2, "B", info_hash="abcdef"),
+            TorrentResult("Inception.2010.1080p.BluRay.x264", 2000, "magnet:?xt=urn:btih:ABCDEF&dn=x", 10, 0, "C"),
+            # No hash: same size and title
+            TorrentResult("Inception.2010.720p.WEB", 900, "https://a/2", 5, 0, "A"),
+            TorrentResult("Inception.2010.720p.WEB", 900, "https://c/2", 7, 0, "C"),
+            # Same title, different size: a different release
+            TorrentResult("Inception.2010.720p.WEB", 950, "https://d/2", 3, 0, "D")
+        ]
+        cards = AggregatedResult.aggregate(results)
+        self.assertEqual(len(cards), 1)
+        card = cards[0]
+
+        self.assertEqual(card.collapsed, 3)
+        self.assertEqual(len(card.downloads), 3)
+        best = card.downloads[0]
+        self.assertEqual((best.seeders, best.indexer, best.download_url), (90, "B", "https://b/1"))
+        self.assertEqual(best.indexers, ("B", "A", "C"))
+        self.assertEqual(card.downloads[1].indexers, ("C", "A"))
+        self.assertEqual(card.downloads[2].indexers, ("D",))
+        self.assertEqual(card.total_seeders, 100)
+
+        data = card.to_dict()
+        self.assertEqual(data["collapsed"], 3)
+        self.assertEqual(data["downloads"][0]["indexers"], ["B", "A", "C"])
+        # The input results are not modified
+        self.assertEqual(results[1].indexers, ("B",))
+
 if __name__ == '__main__':
     unittest.main()
 
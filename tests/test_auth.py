@@ -5,6 +5,7 @@ import json
 from backend.app import create_app
 from backend.database import Database
 from backend.models.user import User
+from backend.models.group import Group
 
 class TestAuth(unittest.TestCase):
     def setUp(self):
@@ -86,6 +87,86 @@ class TestAuth(unittest.TestCase):
         verified_user = User.verify_session(token)
         self.assertIsNone(verified_user)
 
+    def test_cached_sessions_skip_database_and_follow_role_changes(self):
+        user = User.create(
+            username="cached@example.com",
+            password="password123",
+            group_name="User"
+        )
+        token = User.create_session(user.id)
+        self.assertEqual(User.verify_session(token).group.name, "User")
+
+        # A warm lookup, including the group, costs no queries
+        with patch.object(Database, 'query', side_effect=AssertionError("unexpected query")):
+            cached = User.verify_session(token)
+            self.assertEqual(cached.group.name, "User")
+
+        # Role changes made through save() are visible on the next request
+        admin = Group.get_by_name("Admin") or Group.create("Admin", ["admin"])
+        user.group_id = admin.id
+        user.save()
+        self.assertEqual(User.verify_session(token).group.name, "Admin")
+
+        # Removing access outside save() is invalidated explicitly
+        self.db.execute("UPDATE users SET group_id = NULL WHERE id = ?", (user.id,))
+        User.invalidate_sessions(user.id)
+        self.assertIsNone(User.verify_session(token).group)
+
+    @patch.dict(os.environ, {"SESSION_TOKEN_MODE": "signed"})
+    def test_signed_session_tokens(self):
+        self.app.secret_key = "test-only-private-secret"
+        ctx = self.app.app_context()
+        ctx.push()
+        self.addCleanup(ctx.pop)
+        user = User.create(
+            username="signed@example.com",
+            password="password123",
+            group_name="User"
+        )
+        token = User.create_session(user.id)
+        self.assertTrue(token.startswith("v1."))
+        # Nothing is stored server-side
+        self.assertIsNone(self.db.query("SELECT 1 FROM sessions WHERE session_token = ?", (token,), one=True))
+        self.assertEqual(User.verify_session(token).id, user.id)
+
+        # Tampering with the payload breaks the signature
+        parts = token.split(".")
+        parts[1] = str(user.id + 1)
+        self.assertIsNone(User.verify_session(".".join(parts)))
+
+        # Logout bumps the generation, revoking every outstanding token
+        other = User.create_session(user.id)
+        User.delete_session(token)
+        self.assertIsNone(User.verify_session(token))
+        self.assertIsNone(User.verify_session(other))
+        self.assertIsNotNone(User.verify_session(User.create_session(user.id)))
+
+    @patch.dict(os.environ, {"SESSION_TOKEN_MODE": "signed"})
+    def test_signed_session_tokens_refused_with_default_secret(self):
+        import hmac
+        import hashlib
+        import time
+        from backend.app import DEFAULT_SECRET_KEY
+
+        user = User.create(
+            username="default-key@example.com",
+            password="password123",
+            group_name="Admin"
+        )
+        with self.app.app_context():
+            self.assertEqual(self.app.secret_key, DEFAULT_SECRET_KEY)
+            self.assertFalse(User.signed_sessions_enabled())
+            # Falls back to database sessions
+            self.assertFalse(User.create_session(user.id).startswith("v1."))
+
+            # A token minted with the public default key is rejected
+            payload = f"v1.{user.id}.{int(time.time()) + 3600}.0"
+            forged = f"{payload}.{hmac.new(DEFAULT_SECRET_KEY.encode(), payload.encode(), hashlib.sha256).hexdigest()}"
+            self.assertIsNone(User.verify_session(forged))
+
+        self.client.set_cookie('session_token', forged)
+        self.assertEqual(self.client.get('/api/auth/me').status_code, 401)
+
     def test_auth_me_unauthorized(self):
         # GET /api/auth/me without token should return 401
         response = self.client.get('/api/auth/me')
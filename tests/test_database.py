@@ -0,0 +1,97 @@
+import unittest
+import os
+import threading
+from backend.database import Database
+
+class TestDatabase(unittest.TestCase):
+    def setUp(self):
+        # Configure DATABASE_PATH to isolate database tests
+        self.db_path = "test_database_ricocx.db"
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+        os.environ["DATABASE_PATH"] = self.db_path
+
+        # Reset Database class singleton instance
+        Database.reset_instance()
+        self.db = Database()
+
+    def tearDown(self):
+        # Reset singleton instance (closes pooled connections and the WAL files)
+        Database.reset_instance()
+        for path in (self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except Exception:
+                    pass
+        if "DATABASE_PATH" in os.environ:
+            del os.environ["DATABASE_PATH"]
+
+    def test_wal_journal_mode(self):
+        row = self.db.query("PRAGMA journal_mode", one=True)
+        self.assertEqual(row[0].lower(), "wal")
+
+    def test_connections_are_reused(self):
+        for i in range(20):
+            self.db.execute("INSERT OR REPLACE INTO server_settings (key, value) VALUES (?, ?)", (f"key_{i}", str(i)))
+            self.db.query("SELECT value FROM server_settings WHERE key = ?", (f"key_{i}",), one=True)
+
+        stats = self.db.pool_stats()
+        self.assertEqual(stats["checkouts"], 40)
+        self.assertEqual(stats["opened"], 1)
+        self.assertEqual(stats["in_use"], 0)
+
+    def test_concurrent_writers_share_bounded_pool(self):
+        errors = []
+
+        def writer(n):
+            for i in range(25):
+                row_id = self.db.execute(
+                    "INSERT INTO downloads (torbox_id, title, status) VALUES (?, ?, ?)",
+                    (f"t{n}_{i}", "Title", "queued")
+                )
+                if row_id == -1:
+                    errors.append(row_id)
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        count = self.db.query("SELECT COUNT(*) FROM downloads", one=True)[0]
+        self.assertEqual(count, 16 * 25)
+        stats = self.db.pool_stats()
+        self.assertLessEqual(stats["open"], stats["size"])
+
+    def test_connection_block_commits_or_rolls_back(self):
+        with self.db.connection() as conn:
+            conn.execute("INSERT INTO server_settings (key, value) VALUES (?, ?)", ("kept", "1"))
+
+        with self.assertRaises(ValueError):
+            with self.db.connection() as conn:
+                conn.execute("INSERT INTO server_settings (key, value) VALUES (?, ?)", ("dropped", "1"))
+                raise ValueError("boom")
+
+        # The failed block's write did not go back into the pool with its connection
+        with self.db.connection() as conn:
+            self.assertFalse(conn.in_transaction)
+        self.assertIsNotNone(self.db.query("SELECT value FROM server_settings WHERE key = ?", ("kept",), one=True))
+        self.assertIsNone(self.db.query("SELECT value FROM server_settings WHERE key = ?", ("dropped",), one=True))
+
+    def test_exhausted_pool_is_reported_like_a_failed_query(self):
+        self.db.pool_timeout = 0.1
+        held = []
+        try:
+            for _ in range(self.db.pool_size):
+                held.append(self.db._checkout())
+            self.assertIsNone(self.db.query("SELECT 1"))
+            self.assertEqual(self.db.execute("INSERT INTO server_settings (key, value) VALUES ('k', 'v')"), -1)
+        finally:
+            for conn in held:
+                self.db._release(conn)
+        self.assertEqual(self.db.query("SELECT 1", one=True)[0], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,684 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+from backend.database import Database
+from backend.services.torbox_poller import TorboxPoller
+from backend.services.library_index import LibraryIndex
+from backend.services.http_pool import PooledSession
+from backend.services.client_registry import ClientRegistry
+from backend.services.search_cache import SearchCache, _tokenize
+from backend.services.search_client import SearchClient
+from backend.services.search_cache_store import SearchCacheStore
+from backend.models.result import AggregatedResult
+
+class TestTorboxPoller(unittest.TestCase):
+    def test_single_list_fetch_fans_out_to_subscribers(self):
+        client = MagicMock()
+        client.get_torrents.return_value = [
+            {"id": 1, "progress": 0.5, "download_state": "downloading"},
+            {"id": 2, "progress": 1.0, "download_state": "completed"},
+            {"id": 3, "progress": 0.1, "download_state": "stalled"}
+        ]
+        poller = TorboxPoller(interval=60)
+
+        sub1 = poller.subscribe(1, client)
+        sub2 = poller.subscribe("2", client)
+        info1 = sub1.next(timeout=5)
+        info2 = sub2.next(timeout=5)
+
+        self.assertEqual(info1["progress"], 0.5)
+        self.assertEqual(info2["download_state"], "completed")
+        # Both subscribers were served by shared ticks rather than one list fetch each per tick
+        self.assertEqual(client.get_torrents.call_count, poller.stats()["ticks"])
+        self.assertLessEqual(client.get_torrents.call_count, 2)
+        client.get_torrent_info.assert_not_called()
+
+        stats = poller.stats()
+        self.assertEqual(stats["subscribers"], 2)
+        self.assertEqual(stats["last_tick"]["list_size"], 3)
+
+        sub1.close()
+        sub2.close()
+        self.assertEqual(poller.stats()["subscribers"], 0)
+
+    def test_missing_torrent_returns_none(self):
+        client = MagicMock()
+        client.get_torrents.return_value = [{"id": 1, "progress": 0.5}]
+        poller = TorboxPoller(interval=60)
+
+        sub = poller.subscribe(99, client)
+        self.assertIsNone(sub.next(timeout=5))
+        sub.close()
+
+    def test_next_after_close_resubscribes(self):
+        client = MagicMock()
+        client.get_torrents.return_value = [{"id": 1, "progress": 1.0, "files": []}]
+        poller = TorboxPoller(interval=60)
+
+        sub = poller.subscribe(1, client)
+        self.assertEqual(sub.next(timeout=5)["progress"], 1.0)
+        sub.close()
+        self.assertEqual(poller.stats()["subscribers"], 0)
+
+        # A monitor retrying after closing is served by the poller again rather than direct lookups
+        self.assertEqual(sub.next(timeout=5)["progress"], 1.0)
+        self.assertEqual(poller.stats()["subscribers"], 1)
+        client.get_torrent_info.assert_not_called()
+        sub.close()
+        sub.close()
+        self.assertEqual(poller.stats()["subscribers"], 0)
+
+class TestLibraryIndex(unittest.TestCase):
+    def setUp(self):
+        # Configure DATABASE_PATH to isolate database tests
+        self.db_path = "test_services_ricocx.db"
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+        os.environ["DATABASE_PATH"] = self.db_path
+        Database.reset_instance()
+        Database()
+
+        self.library = tempfile.mkdtemp()
+        movie_dir = os.path.join(self.library, "MOVIES", "Inception (2010)")
+        os.makedirs(movie_dir)
+        self._write(os.path.join(movie_dir, "Inception (2010).mkv"), 1234)
+        self.indexes = []
+
+    def tearDown(self):
+        # Background rescans must not outlive this test's database
+        for index in self.indexes:
+            index.wait_idle(timeout=10)
+        Database.reset_instance()
+        shutil.rmtree(self.library, ignore_errors=True)
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+        if "DATABASE_PATH" in os.environ:
+            del os.environ["DATABASE_PATH"]
+
+    def _index(self):
+        index = LibraryIndex(rescan_interval=3600)
+        self.indexes.append(index)
+        return index
+
+    def _write(self, path, size):
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+
+    def test_index_build_and_incremental_rescan(self):
+        index = self._index()
+        # The first lookup does not block on the walk; the build runs in the background
+        self.assertIsNone(index.file_sizes(self.library))
+        self.assertTrue(index.wait_for_scan(self.library, timeout=10))
+        self.assertEqual(index.file_sizes(self.library), frozenset({1234}))
+
+        # Unchanged directories are not listed again
+        index.rescan(self.library)
+        self.assertEqual(index.stats()["dirs_listed"], 3)
+
+        show_dir = os.path.join(self.library, "TV SHOWS", "Severance (2022)", "Season 01")
+        os.makedirs(show_dir)
+        self._write(os.path.join(show_dir, "Severance (2022) - S01E01.mkv"), 4321)
+        index.rescan(self.library)
+        self.assertIn(4321, index.file_sizes(self.library))
+
+        # A fresh index loads persisted entries without walking the tree
+        restarted = self._index()
+        restarted._last_scan[os.path.abspath(self.library)] = float("inf")
+        self.assertEqual(restarted.file_sizes(self.library), frozenset({1234, 4321}))
+
+    def test_interrupted_rescan_resumes(self):
+        for n in range(5):
+            movie_dir = os.path.join(self.library, "MOVIES", f"Movie {n}")
+            os.makedirs(movie_dir)
+            self._write(os.path.join(movie_dir, f"Movie {n}.mkv"), 100 + n)
+        index = self._index()
+        index.BATCH_DIRS = 2
+
+        # The walk dies after a few batches have been committed
+        scandir = os.scandir
+        listings = []
+
+        def failing_scandir(path):
+            listings.append(path)
+            if len(listings) > 4:
+                raise KeyboardInterrupt
+            return scandir(path)
+
+        with patch('backend.services.library_index.os.scandir', side_effect=failing_scandir):
+            with self.assertRaises(KeyboardInterrupt):
+                index.rescan(self.library)
+
+        index.rescan(self.library)
+        self.assertEqual(index.file_sizes(self.library), frozenset({1234, 100, 101, 102, 103, 104}))
+
+    def test_pipeline_writes_and_deletes(self):
+        index = self._index()
+        index.rescan(self.library)
+
+        new_file = os.path.join(self.library, "MOVIES", "Inception (2010)", "extra.mkv")
+        self._write(new_file, 999)
+        index.record_file(new_file)
+        self.assertIn(999, index.file_sizes(self.library))
+
+        movie_dir = os.path.join(self.library, "MOVIES", "Inception (2010)")
+        shutil.rmtree(movie_dir)
+        index.remove_path(movie_dir)
+        self.assertEqual(index.file_sizes(self.library), frozenset())
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class TestPooledSession(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused(self):
+        http = PooledSession("test", pool_size=2)
+        for _ in range(5):
+            resp = http.get(self.url, timeout=5)
+            self.assertEqual(resp.json(), {"ok": True})
+
+        stats = http.stats()
+        self.assertEqual(stats["requests"], 5)
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["idle_connections"], 1)
+        self.assertEqual(stats["in_flight"], 0)
+        http.close()
+
+class TestTorboxClient(unittest.TestCase):
+    def test_list_and_control_use_the_pooled_session(self):
+        from backend.services.torbox_client import TorboxClient
+        http = MagicMock()
+        http.get.return_value.json.return_value = {"success": True, "data": [{"id": 7, "progress": 0.5}]}
+        http.post.return_value.json.return_value = {"success": True}
+
+        client = TorboxClient(api_key="key", http=http)
+        client.sdk = MagicMock()
+        self.assertEqual(client.get_torrent_info("7")["progress"], 0.5)
+        self.assertTrue(client.control_torrent("7", "delete"))
+
+        self.assertTrue(http.get.call_args.args[0].endswith("/torrents/mylist"))
+        self.assertTrue(http.post.call_args.args[0].endswith("/torrents/controltorrent"))
+        client.sdk.torrents.get_torrent_list.assert_not_called()
+        client.sdk.torrents.control_torrent.assert_not_called()
+
+class TestClientRegistry(unittest.TestCase):
+    def test_clients_are_shared_until_settings_change(self):
+        factory = MagicMock(side_effect=lambda **config: MagicMock(config=config))
+        registry = ClientRegistry()
+
+        first = registry.get("torbox", factory, api_key="key1")
+        self.assertIs(registry.get("torbox", factory, api_key="key1"), first)
+        self.assertEqual(factory.call_count, 1)
+
+        # A new API key builds a new client and retires the old one
+        second = registry.get("torbox", factory, api_key="key2")
+        self.assertIsNot(second, first)
+        self.assertEqual(registry.stats()["live"], ["torbox"])
+
+        registry.invalidate()
+        self.assertIsNot(registry.get("torbox", factory, api_key="key2"), second)
+        self.assertEqual(factory.call_count, 3)
+
+class TestSearchCache(unittest.TestCase):
+    TITLES = [
+        ("The Matrix", 1999, False),
+        ("The Matrix Reloaded", 2003, False),
+        ("Matrix-Resurrections", 2021, False),
+        ("Monsters Inc", 2001, False),
+        ("Monster", 2003, False),
+        ("Monsters", 2022, True),
+        ("My Adventures with Superman", 2023, True),
+        ("Superman & Lois", 2021, True),
+        ("Inception", 2010, False)
+    ]
+
+    def _cache(self, ttl=600, hard_ttl=None):
+        cache = SearchCache(ttl_seconds=ttl, hard_ttl_seconds=hard_ttl)
+        cache.set("seed", None, [AggregatedResult(t, y, tv) for t, y, tv in self.TITLES])
+        return cache
+
+    def test_index_matches_substring_scan(self):
+        cache = self._cache()
+        for query in ["matrix", "the mat", "atri", "x", "mon", "monsters inc", "man", "superman lois",
+                      "s", "re", "inception 2010", "zzz", "ion", "m", "tr"]:
+            for category in (None, "movie", "tv"):
+                q_words = _tokenize(query)
+                expected = {
+                    t for t, y, tv in self.TITLES
+                    if (category != "movie" or not tv) and (category != "tv" or tv)
+                    and all(any(qw in tw for tw in _tokenize(t)) for qw in q_words)
+                }
+                got = {card.clean_title for card in cache.get_by_matching_cards(query, category)}
+                self.assertEqual(got, expected, f"query={query!r} category={category}")
+
+    def test_expired_cards_leave_the_index(self):
+        cache = self._cache(ttl=0, hard_ttl=0)
+        self.assertEqual(cache.get_by_matching_cards("matrix", None), [])
+        self.assertEqual(cache._cards_cache, {})
+        self.assertEqual(cache._gram_index, {})
+
+    def test_lru_eviction_and_counters(self):
+        cache = SearchCache(ttl_seconds=600, max_entries=4)
+        cache.set("matrix", None, [AggregatedResult("The Matrix", 1999, False)])
+        cache.set("inception", None, [AggregatedResult("Inception", 2010, False)])
+        # Touch the older query so the newer one becomes least recently used
+        self.assertIsNotNone(cache.get_by_query("matrix", None))
+        cache.set("monsters", None, [AggregatedResult("Monsters", 2022, True)])
+
+        self.assertIsNotNone(cache.get_by_query("matrix", None))
+        self.assertIsNone(cache.get_by_query("inception", None))
+        self.assertEqual(cache.get_by_matching_cards("incep", None), [])
+
+        stats = cache.stats()
+        self.assertEqual(stats["queries"] + stats["cards"], 4)
+        self.assertEqual(stats["evictions"], 2)
+        self.assertEqual(stats["query_hits"], 2)
+        self.assertEqual(stats["misses"], 1)
+
+        # A byte budget smaller than one entry keeps the cache empty
+        tiny = SearchCache(ttl_seconds=600, max_bytes=100)
+        tiny.set("matrix", None, [AggregatedResult("The Matrix", 1999, False)])
+        self.assertEqual(tiny.stats()["bytes"], 0)
+
+    def test_cached_card_serialization_is_reused(self):
+        from backend.models.result import TorrentResult
+
+        cache = SearchCache(ttl_seconds=600)
+        card = AggregatedResult.aggregate([
+            TorrentResult("Dune Part Two 2024 2160p WEB-DL DV", 5000, "magnet:?xt=urn:btih:a", 10, 1, "A"),
+            TorrentResult("Dune Part Two 2024 1080p BluRay", 2000, "magnet:?xt=urn:btih:b", 30, 2, "B")
+        ])[0]
+        cache.set("dune", None, [card])
+
+        first = cache.get_by_query("dune", None)[0].to_dict()
+        # Per-request overlays never leak into the cached form
+        first["downloads"][0]["downloaded"] = True
+        card.poster_url = "https://image.tmdb.org/t/p/w185/dune.jpg"
+        second = cache.get_by_query("dune", None)[0].to_dict()
+
+        self.assertNotIn("downloaded", second["downloads"][0])
+        self.assertEqual(second["poster_url"], "https://image.tmdb.org/t/p/w185/dune.jpg")
+        self.assertIs(first["resolutions"], second["resolutions"])
+        self.assertEqual(second["resolutions"], ["1080p", "2160p"])
+        self.assertEqual([d["seeders"] for d in second["downloads"]], [30, 10])
+        self.assertEqual(card.total_seeders, 40)
+
+        # Adding a download rebuilds the derived fields
+        card.add_result(TorrentResult("Dune Part Two 2024 720p WEBRip", 900, "magnet:?xt=urn:btih:c", 5, 0, "C"))
+        third = card.to_dict()
+        self.assertEqual(third["resolutions"], ["1080p", "2160p", "720p"])
+        self.assertEqual(len(third["downloads"]), 3)
+        self.assertEqual(card.total_seeders, 45)
+
+
+class TestResultMemory(unittest.TestCase):
+    def test_results_share_parsed_records(self):
+        from backend.models.result import TorrentResult
+
+        titles = [
+            "Dune.Part.Two.2024.2160p.WEB-DL.DV.HDR10+.DDP5.1.Atmos.H.265",
+            "Oppenheimer.2023.1080p.BluRay.DTS-HD.MA.5.1.x264",
+            "The.Last.of.Us.S01E09.2160p.HMAX.WEB-DL.DDP5.1.Atmos.DV.HDR10.H.265",
+            "Severance.Season.1.1080p.WEB-DL",
+            "Inception.2010.720p.BRRip.XviD.AC3"
+        ]
+        # Several indexers listing the same releases, as in a broad search
+        results = [
+            TorrentResult.from_prowlarr({
+                "title": titles[i % len(titles)],
+                "size": 1_000_000_000 + i * 7919,
+                "downloadUrl": f"magnet:?xt=urn:btih:{i:040x}",
+                "seeders": i % 500,
+                "indexer": "".join(["Indexer ", str(i % 6)]),
+                "guid": f"https://indexer.example/details/{i}"
+            })
+            for i in range(30)
+        ]
+
+        self.assertFalse(hasattr(results[0], "__dict__"))
+        # Equal titles share one parsed record, and equal indexer names one string
+        self.assertIs(results[0].parsed, results[5].parsed)
+        self.assertIs(results[0].indexer, results[6].indexer)
+        # Label tuples are shared between records with the same labels, and empty ones are the same object
+        self.assertIs(results[0].parsed.audio, results[2].parsed.audio)
+        self.assertIs(results[3].features, ())
+        self.assertIs(results[3].audio, results[4].features)
+
+
+    @unittest.skipUnless(os.environ.get("RUN_MEMORY_BENCHMARK"), "set RUN_MEMORY_BENCHMARK=1 to measure")
+    def test_bytes_per_cached_result(self):
+        """Reports the search cache footprint per result; the figure depends on the interpreter, so nothing is asserted."""
+        import gc
+        import json
+        import tracemalloc
+        from backend.models.result import TorrentResult
+        from backend.models.release_parser import parse_release
+
+        titles = [
+            "Dune.Part.Two.2024.2160p.WEB-DL.DV.HDR10+.DDP5.1.Atmos.H.265",
+            "Oppenheimer.2023.1080p.BluRay.DTS-HD.MA.5.1.x264",
+            "The.Last.of.Us.S01E09.2160p.HMAX.WEB-DL.DDP5.1.Atmos.DV.HDR10.H.265",
+            "Severance.Season.1.1080p.WEB-DL",
+            "Inception.2010.720p.BRRip.XviD.AC3"
+        ]
+        # A broad search: 2,000 releases, many sharing a name across indexers
+        payload = json.dumps([
+            {
+                "title": f"{titles[i % len(titles)]}-GRP{i % 300}",
+                "size": 1_000_000_000 + i * 7919,
+                "downloadUrl": f"magnet:?xt=urn:btih:{i:040x}",
+                "seeders": i % 500,
+                "leechers": i % 50,
+                "indexer": f"Indexer {i % 6}",
+                "guid": f"https://indexer.example/details/{i}",
+                "infoHash": f"{i:040x}"
+            }
+            for i in range(2000)
+        ])
+        cache = SearchCache(ttl_seconds=600)
+        parse_release.cache_clear()
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            items = json.loads(payload)
+            results = [TorrentResult.from_prowlarr(item) for item in items]
+            cache.set("benchmark", None, AggregatedResult.aggregate(results))
+            del items
+            gc.collect()
+            used = tracemalloc.get_traced_memory()[0] - start
+        finally:
+            tracemalloc.stop()
+
+        print(f"\nSearch cache footprint: {used / len(results):.0f} bytes per cached result ({len(results)} results)")
+
+class TestSearchClient(unittest.TestCase):
+    def setUp(self):
+        # Searches in these tests read and fill a cache of their own rather than the process-wide one
+        self.cache = SearchCache(ttl_seconds=600)
+        patcher = patch('backend.services.search_client.global_search_cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('requests.Session.get')
+    def test_concurrent_identical_searches_share_one_request(self, mock_get):
+        def slow_prowlarr(*args, **kwargs):
+            time.sleep(0.3)
+            resp = MagicMock()
+            resp.json.return_value = [{
+                "title": "Dune Part Two 2024 2160p WEB-DL",
+                "guid": "guid-dune",
+                "size": 1000,
+                "indexer": "Indexer",
+                "downloadUrl": "magnet:?xt=urn:btih:dune",
+                "seeders": 10,
+                "peers": 1
+            }]
+            return resp
+        mock_get.side_effect = slow_prowlarr
+
+        client = SearchClient(base_url="http://prowlarr:9696", api_key="key")
+        barrier = threading.Barrier(5)
+        results = []
+
+        def search(query):
+            barrier.wait()
+            results.append(client.search(query, category="movie"))
+
+        threads = [threading.Thread(target=search, args=(q,)) for q in ["Dune Part Two", "dune part two ", "Dune Part Two", "DUNE PART TWO", "Dune Part Two"]]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=10)
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(r and r[0].clean_title == "Dune Part Two" for r in results))
+
+    @patch('requests.Session.get')
+    def test_stale_results_are_served_while_refreshing(self, mock_get):
+        release = threading.Event()
+
+        def prowlarr(*args, **kwargs):
+            if mock_get.call_count > 1:
+                # Hold the background refresh until the stale reads are done
+                release.wait(timeout=5)
+            resp = MagicMock()
+            resp.json.return_value = [{
+                "title": "Arcane S02E01 1080p WEB-DL",
+                "guid": f"guid-{mock_get.call_count}",
+                "size": 1000,
+                "indexer": "Indexer",
+                "downloadUrl": "magnet:?xt=urn:btih:arcane",
+                "seeders": mock_get.call_count,
+                "peers": 1
+            }]
+            return resp
+        mock_get.side_effect = prowlarr
+
+        client = SearchClient(base_url="http://prowlarr:9696", api_key="key")
+        first = client.search("Arcane", category="tv")
+        self.assertEqual(first[0].downloads[0].seeders, 1)
+
+        # Past the soft TTL: the old list comes back at once and one refresh starts
+        with patch('time.time', return_value=time.time() + self.cache.ttl + 1):
+            self.assertIs(client.search("Arcane", category="tv"), first)
+            self.assertIs(client.search("Arcane", category="tv"), first)
+            release.set()
+
+        for _ in range(50):
+            if self.cache.stats()["refreshing"] == 0:
+                break
+            time.sleep(0.05)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(client.search("Arcane", category="tv")[0].downloads[0].seeders, 2)
+
+    @patch('requests.Session.get')
+    def test_fanout_returns_partial_results_by_deadline(self, mock_get):
+        release_slow = threading.Event()
+        searched = []
+
+        def prowlarr(url, params=None, **kwargs):
+            resp = MagicMock()
+            if url.endswith("/api/v1/indexer"):
+                resp.json.return_value = [
+                    {"id": 1, "name": "Fast", "enable": True},
+                    {"id": 2, "name": "Slow", "enable": True},
+                    {"id": 3, "name": "Disabled", "enable": False}
+                ]
+                return resp
+            indexer_id = params["indexerIds"][0]
+            searched.append(indexer_id)
+            if indexer_id == 2:
+                release_slow.wait(timeout=5)
+            resp.json.return_value = [{
+                "title": f"Severance S02E01 1080p WEB-DL {indexer_id}",
+                "guid": f"guid-{indexer_id}",
+                "size": 1000 * indexer_id,
+                "indexer": f"Indexer{indexer_id}",
+                "downloadUrl": f"magnet:?xt=urn:btih:sev{indexer_id}",
+                "seeders": 10,
+                "peers": 1
+            }]
+            return resp
+        mock_get.side_effect = prowlarr
+
+        client = SearchClient(base_url="http://prowlarr:9696", api_key="key", fanout=True, deadline=0.3)
+        results = client.search("Severance", category="tv")
+        self.assertEqual([d.indexer for d in results[0].downloads], ["Indexer1"])
+
+        # The slow indexer answers after the deadline and completes the cached entry
+        release_slow.set()
+        for _ in range(100):
+            cached = self.cache.get_by_query("Severance", "tv")
+            if cached and len(cached[0].downloads) == 2:
+                break
+            time.sleep(0.05)
+        self.assertEqual(sorted(d.indexer for d in cached[0].downloads), ["Indexer1", "Indexer2"])
+        self.assertEqual(sorted(searched), [1, 2])
+
+    @patch('requests.Session.get')
+    def test_fanout_partial_set_never_replaces_complete_set(self, mock_get):
+        release_slow = threading.Event()
+
+        def prowlarr(url, params=None, **kwargs):
+            resp = MagicMock()
+            if url.endswith("/api/v1/indexer"):
+                resp.json.return_value = [{"id": 1, "name": "Fast"}, {"id": 2, "name": "Slow"}]
+                return resp
+            indexer_id = params["indexerIds"][0]
+            if indexer_id == 2:
+                release_slow.wait(timeout=5)
+            resp.json.return_value = [{
+                "title": "Silo S02E01 1080p WEB-DL",
+                "guid": f"guid-{indexer_id}",
+                "size": 1000 * indexer_id,
+                "indexer": f"Indexer{indexer_id}",
+                "downloadUrl": f"magnet:?xt=urn:btih:silo{indexer_id}",
+                "seeders": 10
+            }]
+            return resp
+        mock_get.side_effect = prowlarr
+
+        aggregate = AggregatedResult.aggregate
+        caller = threading.current_thread()
+
+        def aggregate_partial_slowly(results):
+            if threading.current_thread() is caller:
+                # The late indexer finishes and caches the complete set before the caller writes its partial one
+                release_slow.set()
+                for _ in range(100):
+                    cached = self.cache.get_by_query("Silo", "tv")
+                    if cached and len(cached[0].downloads) == 2:
+                        break
+                    time.sleep(0.05)
+            return aggregate(results)
+
+        client = SearchClient(base_url="http://prowlarr:9696", api_key="key", fanout=True, deadline=0.3)
+        with patch('backend.services.search_client.AggregatedResult.aggregate', side_effect=aggregate_partial_slowly):
+            results = client.search("Silo", category="tv")
+        self.assertEqual(len(results[0].downloads), 1)
+        cached = self.cache.get_by_query("Silo", "tv")
+        self.assertEqual(sorted(d.indexer for d in cached[0].downloads), ["Indexer1", "Indexer2"])
+
+    @patch('requests.Session.get')
+    def test_fanout_does_not_cache_when_every_indexer_fails(self, mock_get):
+        def prowlarr(url, params=None, **kwargs):
+            resp = MagicMock()
+            if url.endswith("/api/v1/indexer"):
+                resp.json.return_value = [{"id": 1, "name": "A"}, {"id": 2, "name": "B"}]
+            else:
+                resp.raise_for_status.side_effect = Exception("503 Service Unavailable")
+            return resp
+        mock_get.side_effect = prowlarr
+
+        client = SearchClient(base_url="http://prowlarr:9696", api_key="key", fanout=True, deadline=5)
+        self.assertEqual(client.search("Shogun", category="tv"), [])
+        # An outage is not remembered as "no results"
+        self.assertIsNone(self.cache.get_by_query("Shogun", "tv"))
+
+    @patch('requests.Session.get')
+    def test_fanout_refresh_waits_for_every_indexer(self, mock_get):
+        calls = {1: 0, 2: 0}
+        release_slow = threading.Event()
+
+        def prowlarr(url, params=None, **kwargs):
+            resp = MagicMock()
+            if url.endswith("/api/v1/indexer"):
+                resp.json.return_value = [{"id": 1, "name": "Fast"}, {"id": 2, "name": "Slow"}]
+                return resp
+            indexer_id = params["indexerIds"][0]
+            calls[indexer_id] += 1
+            if indexer_id == 2 and calls[2] > 1:
+                # The refresh's slow indexer answers well after the search deadline
+                release_slow.wait(timeout=5)
+            resp.json.return_value = [{
+                "title": "Andor S02E01 1080p WEB-DL",
+                "guid": f"guid-{indexer_id}-{calls[indexer_id]}",
+                "size": 1000 * indexer_id,
+                "indexer": f"Indexer{indexer_id}",
+                "downloadUrl": f"magnet:?xt=urn:btih:andor{indexer_id}",
+                "seeders": calls[indexer_id]
+            }]
+            return resp
+        mock_get.side_effect = prowlarr
+
+        client = SearchClient(base_url="http://prowlarr:9696", api_key="key", fanout=True, deadline=0.3)
+        self.assertEqual(len(client.search("Andor", category="tv")[0].downloads), 2)
+
+        with patch('time.time', return_value=time.time() + self.cache.ttl + 1):
+            client.search("Andor", category="tv")
+        # Past the search deadline the stale complete set is still what the cache holds
+        for _ in range(10):
+            time.sleep(0.05)
+        self.assertEqual(len(self.cache.get_by_query("Andor", "tv")[0].downloads), 2)
+
+        release_slow.set()
+        for _ in range(100):
+            if self.cache.stats()["refreshing"] == 0:
+                break
+            time.sleep(0.05)
+        downloads = self.cache.get_by_query("Andor", "tv")[0].downloads
+        self.assertEqual(sorted(d.seeders for d in downloads), [2, 2])
+
+class TestSearchCacheStore(unittest.TestCase):
+    def setUp(self):
+        self.db_path = "test_services_ricocx.db"
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+        os.environ["DATABASE_PATH"] = self.db_path
+        Database.reset_instance()
+
+    def tearDown(self):
+        Database.reset_instance()
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+        if "DATABASE_PATH" in os.environ:
+            del os.environ["DATABASE_PATH"]
+
+    def test_cached_searches_survive_restart(self):
+        from backend.models.result import TorrentResult
+        card = AggregatedResult.aggregate([
+            TorrentResult("Dune Part Two 2024 2160p WEB-DL DV", 5000, "magnet:?xt=urn:btih:dune", 42, 3, "Indexer", "guid-1", "dune"),
+            TorrentResult("Dune Part Two 2024 2160p WEB-DL DV", 5000, "magnet:?xt=urn:btih:dune", 40, 3, "Other", "guid-2", "dune")
+        ])[0]
+        card.poster_url = "https://image.tmdb.org/t/p/w185/dune.jpg"
+
+        cache = SearchCache(ttl_seconds=600, persistent=SearchCacheStore())
+        cache.set("Dune", "movie", [card])
+        cache.persistent.flush()
+
+        # A fresh process: nothing in memory until the first lookup loads the disk tier
+        restarted = SearchCache(ttl_seconds=600, persistent=SearchCacheStore())
+        restored = restarted.get_by_query("dune", "movie")
+        self.assertEqual(len(restored), 1)
+        self.assertEqual(restored[0].to_dict(), card.to_dict())
+        self.assertEqual(restarted.get_by_matching_cards("part two", None)[0].clean_title, "Dune Part Two")
+        self.assertEqual(restarted.stats()["persistent"]["loaded"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
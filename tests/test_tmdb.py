@@ -1,9 +1,33 @@
 import unittest
 from unittest.mock import patch, MagicMock
+import os
+from backend.database import Database
 from backend.services.tmdb_client import TmdbClient
 
 class TestTmdbClient(unittest.TestCase):
-    @patch('requests.get')
+    def setUp(self):
+        # Configure DATABASE_PATH to isolate the TMDb cache between tests
+        self.db_path = "test_tmdb_ricocx.db"
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+        os.environ["DATABASE_PATH"] = self.db_path
+
+        # Reset Database class singleton instance
+        Database.reset_instance()
+        Database()
+
+    def tearDown(self):
+        # Reset singleton instance
+        Database.reset_instance()
+        if os.path.exists(self.db_path):
+            try:
+                os.remove(self.db_path)
+            except Exception:
+                pass
+        if "DATABASE_PATH" in os.environ:
+            del os.environ["DATABASE_PATH"]
+
+    @patch('requests.Session.get')
     def test_search_movie(self, mock_get):
         mock_resp = MagicMock()
         mock_resp.json.return_value = {
@@ -24,7 +48,7 @@ class TestTmdbClient(unittest.TestCase):
         self.assertEqual(res["year"], "2010")
         self.assertEqual(res["id"], 27205)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_search_tv(self, mock_get):
         mock_resp = MagicMock()
         mock_resp.json.return_value = {
@@ -45,7 +69,7 @@ class TestTmdbClient(unittest.TestCase):
         self.assertEqual(res["year"], "2008")
         self.assertEqual(res["id"], 1396)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_episode_name(self, mock_get):
         mock_resp = MagicMock()
         mock_resp.json.return_value = {
@@ -59,7 +83,7 @@ class TestTmdbClient(unittest.TestCase):
 
         self.assertEqual(res, "Pilot")
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_search_tv_exact_and_plural_matching(self, mock_get):
         # Simulate TMDB returning Monster High as results[0] and Monsters as results[1] when query is "Monster"
         mock_resp = MagicMock()
@@ -87,5 +111,93 @@ class TestTmdbClient(unittest.TestCase):
         self.assertEqual(res["title"], "Monsters")
         self.assertEqual(res["id"], 225634)
 
+    @patch('requests.Session.get')
+    def test_repeat_lookups_are_cached(self, mock_get):
+        mock_resp = MagicMock()
+        mock_resp.json.return_value = {
+            "results": [{
+                "title": "Inception",
+                "release_date": "2010-07-16",
+                "id": 27205
+            }]
+        }
+        mock_resp.raise_for_status = MagicMock()
+        mock_get.return_value = mock_resp
+
+        client = TmdbClient(api_key="test_key")
+        first = client.search_movie("Inception", 2010)
+        # Query normalization: case and whitespace differences share one cache entry
+        second = TmdbClient(api_key="test_key").search_movie("  inception ", "2010")
+
+        self.assertEqual(first, second)
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('requests.Session.get')
+    def test_misses_are_negatively_cached_but_errors_are_not(self, mock_get):
+        mock_resp = MagicMock()
+        mock_resp.json.return_value = {"results": []}
+        mock_resp.raise_for_status = MagicMock()
+        mock_get.return_value = mock_resp
+
+        client = TmdbClient(api_key="test_key")
+        self.assertIsNone(client.search_tv("Nonexistent Show"))
+        self.assertIsNone(client.search_tv("Nonexistent Show"))
+        self.assertEqual(mock_get.call_count, 1)
+
+        mock_get.reset_mock()
+        mock_get.side_effect = Exception("Connection reset")
+        self.assertIsNone(client.search_tv("Flaky Show"))
+        self.assertIsNone(client.search_tv("Flaky Show"))
+        self.assertEqual(mock_get.call_count, 2)
+
+        stats = client.cache.stats()
+        self.assertGreaterEqual(stats["negative_hits"], 1)
+
+    @patch('requests.Session.get')
+    def test_season_episodes_fetched_once_per_season(self, mock_get):
+        mock_resp = MagicMock()
+        mock_resp.status_code = 200
+        mock_resp.json.return_value = {
+            "episodes": [
+                {"episode_number": 1, "name": "Adventures of a Normal Man"},
+                {"episode_number": 2, "name": "My Interview with Superman"}
+            ]
+        }
+        mock_resp.raise_for_status = MagicMock()
+        mock_get.return_value = mock_resp
+
+        client = TmdbClient(api_key="test_key")
+        episodes = client.get_season_episodes(125928, 1)
+        self.assertEqual(episodes, {1: "Adventures of a Normal Man", 2: "My Interview with Superman"})
+
+        # Per-episode lookups reuse the fetched season
+        self.assertEqual(client.get_episode_name(125928, 1, 2), "My Interview with Superman")
+        self.assertEqual(mock_get.call_count, 1)
+
+        # A fresh client is served from the persistent cache with integer keys restored
+        self.assertEqual(TmdbClient(api_key="test_key").get_season_episodes(125928, 1), episodes)
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('requests.Session.get')
+    def test_tv_seasons_refresh_bypasses_cache(self, mock_get):
+        def show(seasons):
+            resp = MagicMock()
+            resp.status_code = 200
+            resp.json.return_value = {"seasons": [{"season_number": n} for n in seasons]}
+            resp.raise_for_status = MagicMock()
+            return resp
+
+        mock_get.side_effect = [show([0, 1, 2]), show([0, 1, 2, 3])]
+        client = TmdbClient(api_key="test_key")
+        self.assertEqual(client.get_tv_seasons(1396), [1, 2])
+        self.assertEqual(TmdbClient(api_key="test_key").get_tv_seasons(1396), [1, 2])
+        self.assertEqual(mock_get.call_count, 1)
+
+        # A season aired after the list was cached shows up on refresh, and replaces the cached list
+        self.assertEqual(client.get_tv_seasons(1396, refresh=True), [1, 2, 3])
+        self.assertEqual(client.get_tv_seasons(1396), [1, 2, 3])
+        self.assertEqual(TmdbClient(api_key="test_key").get_tv_seasons(1396), [1, 2, 3])
+        self.assertEqual(mock_get.call_count, 2)
+
 if __name__ == '__main__':
     unittest.main()